@@ -23,4 +23,18 @@ def initialize_logger(app: FastAPI):
     logger.add_handler(error_file_handler)
 
     # Сохраняем логгер в состоянии приложения
-    app.state.logger = logger
\ No newline at end of file
+    app.state.logger = logger
+
+def create_slow_query_logger() -> Logger:
+    logger = Logger(name="slow_query_logger")
+    formatter = Formatter('%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    stream_handler = AsyncStreamHandler(stream=sys.stdout)
+    stream_handler.formatter = formatter
+    logger.add_handler(stream_handler)
+
+    file_handler = AsyncFileHandler(filename='logs/slow_queries.log')
+    file_handler.formatter = formatter
+    logger.add_handler(file_handler)
+
+    return logger
@@ -1,14 +1,165 @@
+import asyncio
+import signal
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
+from app.metrics import CacheMetricsPublisher, mark_worker_stopped, slow_query_log
+from app.middlewares.admission_control import AdmissionController
+from app.middlewares.admission_middleware import AdmissionMiddleware
+from app.middlewares.disconnect_middleware import DisconnectMiddleware
 from app.middlewares.logging_middleware import LoggingMiddleware
+from app.middlewares.metrics_middleware import MetricsMiddleware
+from app.middlewares.profiling_middleware import ProfilingMiddleware
+from app.middlewares.read_your_writes_middleware import ReadYourWritesMiddleware
+from app.middlewares.server_timing_middleware import ServerTimingMiddleware
+from app.middlewares.request_stats import RequestStats
 from app.routers.auth_router import auth_router
+from app.routers.jwks_router import jwks_router
+from app.routers.metrics_router import metrics_router
+from app.routers.stats_router import stats_router
+from app.services.jwt_keys import JWTKeyRing
+from app.services.password_service import PasswordHashingPool, PasswordService
+from app.security.verified_token_cache import VerifiedTokenCache
+from app.security.revoked_token_filter import RevokedTokenFilter, REFRESH_TOKENS_REVOKED_CHANNEL
+from app.services.refresh_token_sweeper import RefreshTokenSweeper
+from app.services.user_response_cache import UserResponseCache, USERS_CHANNEL
+from app.security.primary_token_cache import PrimaryTokenCache, PRIMARY_TOKENS_CHANNEL, \
+    PRIMARY_TOKENS_FINGERPRINT_QUERY
 from app.routers.user_router import user_router
-from app.logging import initialize_logger
-app = FastAPI()
+from app.logging import initialize_logger, create_slow_query_logger
+from app.utils.single_flight import SingleFlight
+from db.connection import create_engine, create_session_maker, create_replica_router
+from db.notifications import PgNotificationListener
+from db.session_manager import SessionManager
+from settings.settings import get_settings, reload_settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Один движок с пулом соединений на процесс воркера
+    settings = get_settings()
+    install_settings_reload_handler(app)
+    slow_query_log.configure(settings.DB_SLOW_QUERY_THRESHOLD_MS / 1000, create_slow_query_logger())
+    engine = create_engine(settings)
+    app.state.engine = engine
+    app.state.session_factory = create_session_maker(engine)
+
+    replica_router = create_replica_router(settings, logger=app.state.logger)
+    app.state.replica_router = replica_router
+    if replica_router is not None:
+        replica_router.start()
+
+    # Инвалидация кэшей воркера при изменениях в БД (LISTEN/NOTIFY с опросом как запасным вариантом)
+    pg_listener = PgNotificationListener(create_engine(settings, use_pool=False),
+                                         poll_interval=settings.DB_NOTIFY_POLL_INTERVAL_SECONDS,
+                                         logger=app.state.logger)
+    app.state.pg_listener = pg_listener
+
+    user_response_cache = UserResponseCache.from_settings(settings)
+    app.state.user_response_cache = user_response_cache
+    # Без опроса: пока LISTEN недоступен, устаревание ограничено TTL кэша
+    pg_listener.subscribe(USERS_CHANNEL, user_response_cache.invalidate)
+
+    app.state.admission_controller = AdmissionController.from_settings(settings)
+
+    # Одновременные одинаковые чтения воркера выполняются одним запросом
+    app.state.single_flight = SingleFlight()
+
+    primary_token_cache = PrimaryTokenCache.from_settings(settings)
+    app.state.primary_token_cache = primary_token_cache
+    pg_listener.subscribe(PRIMARY_TOKENS_CHANNEL, primary_token_cache.invalidate,
+                          poll_query=PRIMARY_TOKENS_FINGERPRINT_QUERY)
+
+    password_hashing_pool = PasswordHashingPool(max_workers=settings.PASSWORD_HASH_WORKERS,
+                                                max_pending=settings.PASSWORD_HASH_MAX_PENDING)
+    app.state.password_service = PasswordService.from_settings(settings, password_hashing_pool)
+
+    # Ротация по расписанию идет по activates_at/retires_at без рестарта;
+    # новые ключи из sh/generate_jwt_key.sh подхватываются по SIGHUP
+    app.state.jwt_key_ring = JWTKeyRing.from_settings(settings)
+    app.state.verified_token_cache = VerifiedTokenCache.from_settings(settings)
+
+    revoked_token_filter = RevokedTokenFilter.from_settings(settings)
+    app.state.revoked_token_filter = revoked_token_filter
+    pg_listener.subscribe(REFRESH_TOKENS_REVOKED_CHANNEL, revoked_token_filter.on_notification)
+    refresh_token_sweeper = RefreshTokenSweeper(SessionManager(app.state.session_factory), revoked_token_filter,
+                                                sync_interval=settings.REFRESH_TOKEN_FILTER_SYNC_SECONDS,
+                                                sweep_interval=settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS,
+                                                batch_size=settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE,
+                                                logger=app.state.logger)
+
+    def collect_cache_stats() -> dict[str, dict[str, int]]:
+        return {
+            "users": user_response_cache.stats(),
+            "verified_tokens": app.state.verified_token_cache.stats(),
+            "primary_tokens": primary_token_cache.valid.stats(),
+            "primary_tokens_negative": primary_token_cache.invalid.stats(),
+        }
+
+    cache_metrics_publisher = CacheMetricsPublisher(collect_cache_stats,
+                                                    interval=settings.METRICS_CACHE_PUBLISH_SECONDS)
+    app.state.cache_metrics_publisher = cache_metrics_publisher
+
+    pg_listener.start()
+    refresh_token_sweeper.start()
+    cache_metrics_publisher.start()
+    try:
+        yield
+    finally:
+        await cache_metrics_publisher.stop()
+        mark_worker_stopped()
+        await refresh_token_sweeper.stop()
+        await asyncio.to_thread(password_hashing_pool.shutdown)
+        await pg_listener.stop()
+        if replica_router is not None:
+            await replica_router.stop()
+        await engine.dispose()
+
+
+def install_settings_reload_handler(app: FastAPI) -> None:
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_app_settings, app)
+    except (NotImplementedError, RuntimeError, ValueError, AttributeError):
+        # Сигналы недоступны вне главного потока (TestClient) и на Windows
+        pass
+
+
+def reload_app_settings(app: FastAPI) -> None:
+    # SIGHUP перечитывает env-файл и ключи JWT без рестарта воркера
+    try:
+        settings = reload_settings()
+    except Exception as e:
+        app.state.logger.error(f"Settings reload failed: {e}")
+        return
+    try:
+        # Новый набор ключей подменяет старый целиком; при ошибке остается прежний
+        app.state.jwt_key_ring = JWTKeyRing.from_settings(settings)
+    except Exception as e:
+        app.state.logger.error(f"JWT key ring reload failed: {e}")
+        return
+    # Токены удаленных или выведенных из оборота ключей не должны проверяться из кэша
+    app.state.verified_token_cache.clear()
+
+
+# orjson вместо stdlib json для всех ответов с response_model
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 app.include_router(user_router)
 app.include_router(auth_router)
+app.include_router(jwks_router)
+app.include_router(stats_router)
+app.include_router(metrics_router)
 
-app.add_middleware(LoggingMiddleware)
+app.state.request_stats = RequestStats()
+# Первым добавленный - ближайший к роутерам: отказы 503 видны в логах, метриках и Server-Timing
+app.add_middleware(AdmissionMiddleware)
+# Снаружи допуска: при отмене слот пула освобождается, а статус 499 попадает в логи и метрики
+app.add_middleware(DisconnectMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(LoggingMiddleware, request_stats=app.state.request_stats)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 initialize_logger(app)
-
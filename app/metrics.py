@@ -0,0 +1,289 @@
+import asyncio
+import functools
+import inspect
+import os
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Callable
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.requests import Request
+
+from app.utils.sql import normalize_sql
+
+# Каталог, в который воркеры пишут значения метрик (mmap-файлы); задается до запуска воркеров,
+# иначе каждый воркер отдает только свои метрики
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+OTHER_QUERY_SOURCE = ("other", "other")
+
+FAST_BUCKETS = (.00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request duration by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being processed",
+    ["method", "route"], multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections checked out of the pool",
+    ["pool"], multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections", "Connections open above pool_size",
+    ["pool"], multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pool connection",
+    ["pool"], buckets=FAST_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQL statement duration by repository method",
+    ["repository", "method"], buckets=FAST_BUCKETS,
+)
+
+JWT_DURATION = Histogram(
+    "jwt_operation_duration_seconds", "JWT signing and signature verification time",
+    ["operation"], buckets=FAST_BUCKETS,
+)
+
+ADMISSION_REJECTED = Counter(
+    "admission_rejected", "Requests answered 503 by admission control (queue full or deadline)", ["pool"],
+)
+
+CACHE_SIZE = Gauge("cache_entries", "Entries in worker caches", ["cache"], multiprocess_mode="livesum")
+CACHE_EVENTS = {
+    name: Counter(f"cache_{name}", f"Cache {name}", ["cache"])
+    for name in ("hits", "misses", "evictions")
+}
+
+# (репозиторий, метод), из которого выполняется текущий SQL-запрос
+_query_source: ContextVar[tuple[str, str] | None] = ContextVar("query_source", default=None)
+
+
+class DBTiming:
+    """Время и число SQL-запросов, выполненных в рамках одного HTTP-запроса."""
+
+    __slots__ = ("duration", "count")
+
+    def __init__(self):
+        self.duration = 0.0
+        self.count = 0
+
+
+_request_db_timing: ContextVar[DBTiming | None] = ContextVar("request_db_timing", default=None)
+
+
+def start_request_db_timing() -> tuple[DBTiming, Token]:
+    db_timing = DBTiming()
+    return db_timing, _request_db_timing.set(db_timing)
+
+
+def finish_request_db_timing(token: Token) -> None:
+    _request_db_timing.reset(token)
+
+
+class SlowQueryLog:
+    """Запросы дольше порога пишутся в лог без параметров, с нормализованным SQL и методом репозитория."""
+
+    def __init__(self):
+        self.threshold: float | None = None
+        self.logger = None
+
+    def configure(self, threshold: float | None, logger) -> None:
+        # threshold=None или <= 0 - лог выключен
+        self.threshold = threshold if threshold and threshold > 0 else None
+        self.logger = logger
+
+    def observe(self, statement: str, duration: float, source: tuple[str, str]) -> None:
+        if self.threshold is None or duration < self.threshold:
+            return
+        repository, method = source
+        # aiologger ставит запись в очередь задачей event loop: запрос не ждет записи в файл
+        self.logger.warning(f"Slow query {duration * 1000:.1f}ms {repository}.{method}: "
+                            f"{_normalize_sql(statement)}")
+
+
+slow_query_log = SlowQueryLog()
+
+
+@functools.lru_cache(maxsize=256)
+def _normalize_sql(statement: str) -> str:
+    return normalize_sql(statement)
+
+
+def track_query_source(repository: str, method: str, fn: Callable,
+                       on_enter: Callable[[Any, str], Awaitable[None]] | None = None) -> Callable:
+    """Помечает запросы метода репозитория; вложенные вызовы (get_one_or_none и т.п.) метку не меняют.
+
+    on_enter(self, method) вызывается только для внешнего вызова, уже под его меткой.
+    """
+    source = (repository, method)
+    fn = getattr(fn, "__wrapped__", fn) if getattr(fn, "tracks_query_source", False) else fn
+
+    if inspect.isasyncgenfunction(fn):
+        @functools.wraps(fn)
+        async def generator_wrapper(self, *args, **kwargs):
+            outermost = _query_source.get() is None
+            generator = fn(self, *args, **kwargs)
+            try:
+                while True:
+                    # Метка ставится на каждый шаг: между шагами генератор выполняет чужой код
+                    token = _query_source.set(_query_source.get() or source)
+                    try:
+                        if outermost and on_enter is not None:
+                            outermost = False
+                            await on_enter(self, method)
+                        item = await generator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        _query_source.reset(token)
+                    yield item
+            finally:
+                await generator.aclose()
+        generator_wrapper.tracks_query_source = True
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        if _query_source.get() is not None:
+            return await fn(self, *args, **kwargs)
+        token = _query_source.set(source)
+        try:
+            if on_enter is not None:
+                await on_enter(self, method)
+            return await fn(self, *args, **kwargs)
+        finally:
+            _query_source.reset(token)
+    wrapper.tracks_query_source = True
+    return wrapper
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, который отдает в метрики ожидание, занятые и сверхлимитные соединения."""
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.labels(self.metrics_name).observe(time.perf_counter() - started_at)
+            self._publish_usage()
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        self._publish_usage()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+    def _publish_usage(self) -> None:
+        DB_POOL_CHECKED_OUT.labels(self.metrics_name).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(self.metrics_name).set(max(self.overflow(), 0))
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.metrics_name = name
+
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _observe_query(conn, statement)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        if exception_context.connection is not None:
+            _observe_query(exception_context.connection, exception_context.statement or "")
+
+
+def _observe_query(conn, statement: str) -> None:
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+
+    duration = time.perf_counter() - started.pop()
+    source = _query_source.get() or OTHER_QUERY_SOURCE
+    DB_QUERY_DURATION.labels(*source).observe(duration)
+
+    db_timing = _request_db_timing.get()
+    if db_timing is not None:
+        db_timing.duration += duration
+        db_timing.count += 1
+
+    slow_query_log.observe(statement, duration, source)
+
+
+class CacheMetricsPublisher:
+    """Переносит статистику кэшей воркера в метрики: приращения счетчиков и текущий размер.
+
+    Счетчики кэшей обновляются на горячем пути без блокировок, поэтому в метрики
+    они попадают периодически, а не на каждое обращение.
+    """
+
+    def __init__(self, collect: Callable[[], dict[str, dict[str, int]]], interval: float):
+        self.collect = collect
+        self.interval = interval
+        self._published: dict[tuple[str, str], int] = {}
+        self._task: asyncio.Task | None = None
+
+    def publish(self) -> None:
+        for cache, stats in self.collect().items():
+            CACHE_SIZE.labels(cache).set(stats["size"])
+            for name, counter in CACHE_EVENTS.items():
+                value, published = stats[name], self._published.get((cache, name), 0)
+                # Счетчик кэша мог начаться заново: тогда все его значение - приращение
+                delta = value - published if value >= published else value
+                if delta:
+                    counter.labels(cache).inc(delta)
+                self._published[(cache, name)] = value
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.publish()
+
+
+def get_cache_metrics_publisher(request: Request) -> CacheMetricsPublisher:
+    return request.app.state.cache_metrics_publisher
+
+
+def render_metrics() -> bytes:
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        # Сумма по файлам всех воркеров, включая завершившиеся (кроме live-gauge)
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_worker_stopped() -> None:
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from collections import deque
+
+from starlette.requests import Request
+
+from settings.settings import Settings
+
+DECREASE_FACTOR = 0.75
+
+
+class AdmissionLimiter:
+    """Ограничение одновременных запросов пула с очередью ожидания и крайним сроком в ней.
+
+    adaptive=True: лимит подбирается по AIMD - растет на 1 за каждые limit запросов,
+    уложившихся в latency_target, и умножается на DECREASE_FACTOR при превышении.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float,
+                 adaptive: bool = False, min_limit: int = 1, max_limit: int | None = None,
+                 latency_target: float = 0.1):
+        self.name = name
+        self.limit = float(limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive
+        self.min_limit = min_limit
+        self.max_limit = max_limit or limit
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    async def acquire(self) -> bool:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self._stats["admitted"] += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            self._stats["rejected"] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._stats["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже передан этому запросу: возвращаем его следующему
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._stats["timed_out"] += 1
+            return False
+
+        self._stats["admitted"] += 1
+        return True
+
+    def release(self, latency: float | None = None) -> None:
+        self.in_flight -= 1
+        if latency is not None and self.adaptive:
+            self._adapt(latency)
+        # Слот передается ожидающему напрямую, чтобы новый запрос не обогнал очередь
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> dict[str, int]:
+        return {"limit": int(self.limit), "in_flight": self.in_flight, "waiting": len(self._waiters),
+                **self._stats}
+
+    def _adapt(self, latency: float) -> None:
+        if latency > self.latency_target:
+            # Одно снижение за окно, равное целевой задержке: запросы, принятые при старом
+            # лимите, успевают завершиться, прежде чем задержку оценивают снова
+            now = time.monotonic()
+            if now - self._last_decrease >= self.latency_target:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+        elif self.in_flight + 1 >= int(self.limit):
+            # Растем, только когда лимит действительно ограничивал
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+class AdmissionController:
+    """Пулы допуска по префиксу пути: всплеск логинов не отнимает слоты у чтения профилей."""
+
+    def __init__(self, pools: dict[str, AdmissionLimiter]):
+        self.pools = pools
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionController":
+        def limiter(name: str, limit: int, latency_target_ms: float) -> AdmissionLimiter:
+            return AdmissionLimiter(
+                name, limit,
+                max_queue=settings.ADMISSION_QUEUE_SIZE,
+                queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+                adaptive=settings.ADMISSION_ADAPTIVE,
+                min_limit=settings.ADMISSION_MIN_LIMIT,
+                max_limit=settings.ADMISSION_MAX_LIMIT,
+                latency_target=latency_target_ms / 1000,
+            )
+
+        return cls({
+            "/tokens/": limiter("tokens", settings.ADMISSION_TOKENS_LIMIT, settings.ADMISSION_TOKENS_LATENCY_TARGET_MS),
+            "/users/": limiter("users", settings.ADMISSION_USERS_LIMIT, settings.ADMISSION_USERS_LATENCY_TARGET_MS),
+        })
+
+    def pool_for(self, path: str) -> AdmissionLimiter | None:
+        # Прочие маршруты (/stats, /metrics, JWKS) не ограничиваются
+        for prefix, limiter in self.pools.items():
+            if path.startswith(prefix):
+                return limiter
+        return None
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {limiter.name: limiter.stats() for limiter in self.pools.values()}
+
+
+def get_admission_controller(request: Request) -> AdmissionController:
+    return request.app.state.admission_controller
@@ -0,0 +1,52 @@
+import time
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Scope, Receive, Send
+
+from app.metrics import ADMISSION_REJECTED
+
+RETRY_AFTER_SECONDS = 1
+
+
+class AdmissionMiddleware:
+    """Чистый ASGI перед роутерами: при исчерпании пула и очереди сразу отвечает 503.
+
+    Пулы берутся из app.state.admission_controller (создается в lifespan).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        controller = getattr(scope["app"].state, "admission_controller", None)
+        limiter = controller.pool_for(scope["path"]) if controller is not None else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            ADMISSION_REJECTED.labels(limiter.name).inc()
+            response = JSONResponse({"detail": "Service is overloaded"}, status_code=503,
+                                    headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+            await response(scope, receive, send)
+            return
+
+        # Задержка для AIMD - до отправки заголовков: тело StreamingResponse
+        # (GET /users/?stream=true) отдается со скоростью клиента и не говорит о перегрузке
+        started_at = time.perf_counter()
+        latency = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal latency
+            if message["type"] == "http.response.start":
+                latency = time.perf_counter() - started_at
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(latency if latency is not None else time.perf_counter() - started_at)
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.middlewares.logging_middleware import LoggingMiddleware
+from app.middlewares.metrics_middleware import MetricsMiddleware
+from app.middlewares.request_stats import RequestStats
+
+
+class BaseHTTPLoggingMiddleware(BaseHTTPMiddleware):
+    # Прежняя реализация LoggingMiddleware, для сравнения
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception as e:
+            if os.environ.get("ENV", "dev") != "test":
+                await request.app.state.logger.error(f"Unhandled exception: {e}", exc_info=True)
+            raise e
+
+
+async def endpoint(request: Request) -> JSONResponse:
+    return JSONResponse({"id": 1, "login": "user1"})
+
+
+def build_app(middleware: list[Middleware]) -> Starlette:
+    return Starlette(routes=[Route("/users/{id}", endpoint)], middleware=middleware)
+
+
+async def call(app, path: str) -> None:
+    # Запрос напрямую через ASGI: без сети и HTTP-клиента меряется только стек приложения
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80)}
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, requests: int, concurrency: int) -> float:
+    async def worker(count: int) -> None:
+        for i in range(count):
+            await call(app, f"/users/{i}")
+
+    await worker(100)  # прогрев
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started_at)
+
+
+async def run(requests: int, concurrency: int) -> None:
+    variants = {
+        "no middleware": [],
+        "BaseHTTPMiddleware": [Middleware(BaseHTTPLoggingMiddleware)],
+        "pure ASGI + timing": [Middleware(LoggingMiddleware, request_stats=RequestStats())],
+        "+ prometheus metrics": [Middleware(MetricsMiddleware),
+                                 Middleware(LoggingMiddleware, request_stats=RequestStats())],
+    }
+    for name, middleware in variants.items():
+        rps = await measure(build_app(middleware), requests, concurrency)
+        print(f"{name:<20} {rps:>10.0f} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare request throughput of logging middleware variants.")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import asyncio
+
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+# Как у nginx: клиент закрыл соединение до ответа
+CLIENT_CLOSED_REQUEST = 499
+
+
+class DisconnectMiddleware:
+    """Чистый ASGI: отменяет задачу запроса, если клиент отключился до конца ответа.
+
+    CancelledError проходит через обработчик, и единица работы SessionManager откатывает
+    транзакцию и возвращает соединение в пул, не дожидаясь ненужных клиенту запросов к БД.
+
+    Отключение ждет отдельная задача, но только после последнего сообщения с телом запроса:
+    пока приложение читает тело, его вызовы receive идут напрямую к серверу, и сервер
+    не читает тело впрок (backpressure, 100 Continue по запросу приложения). Если приложение
+    ответит, не дочитав тело, отключение во время обработки не отслеживается.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_task = asyncio.current_task()
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        watcher: asyncio.Task | None = None
+        disconnected = False
+        response_started = False
+        response_complete = False
+
+        async def watch_disconnect() -> None:
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not response_complete:
+                        disconnected = True
+                        request_task.cancel()
+                    return
+
+        def start_watcher() -> None:
+            nonlocal watcher
+            watcher = asyncio.create_task(watch_disconnect())
+
+        async def receive_wrapper() -> Message:
+            if watcher is not None:
+                return await messages.get()
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                # Тело прочитано целиком: дальше сервер пришлет только http.disconnect
+                start_watcher()
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        if not _has_body(scope):
+            # Запрос без тела: единственное http.request с пустым телом не нарушает backpressure
+            start_watcher()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except asyncio.CancelledError:
+            # Отмена не из-за отключения клиента (остановка сервера) пробрасывается дальше
+            if not disconnected or request_task.uncancel() > 0:
+                raise
+            if not response_started:
+                # Сервер отбросит ответ отключенному клиенту, но статус 499 увидят логи и метрики
+                await send({"type": "http.response.start", "status": CLIENT_CLOSED_REQUEST, "headers": []})
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+
+def _has_body(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"transfer-encoding" or (name == b"content-length" and value.strip() != b"0"):
+            return True
+    return False
@@ -1,16 +1,51 @@
 import os
+import time
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
 
+from app.middlewares.request_stats import RequestStats
+
+# Запросы мимо маршрутов (404) сводятся в одну строку статистики
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class LoggingMiddleware:
+    """Чистый ASGI: логирует необработанные исключения и пишет тайминги запросов.
+
+    В отличие от BaseHTTPMiddleware не создает задачу и поток ответа на каждый запрос.
+    """
+
+    def __init__(self, app: ASGIApp, request_stats: RequestStats | None = None):
+        self.app = app
+        self.request_stats = request_stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             if os.environ.get("ENV", "dev") != "test":
-                logger = request.app.state.logger
+                logger = scope["app"].state.logger
                 await logger.error(f"Unhandled exception: {e}", exc_info=True)
-            raise e
\ No newline at end of file
+            raise e
+        finally:
+            if self.request_stats is not None:
+                # Маршрут FastAPI кладет в scope при сопоставлении: шаблон вместо конкретного пути
+                route = scope.get("route")
+                self.request_stats.record(scope["method"], getattr(route, "path", UNMATCHED_ROUTE),
+                                          status_code, time.perf_counter() - started_at, response_bytes)
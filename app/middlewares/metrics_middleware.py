@@ -0,0 +1,66 @@
+import time
+
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from app.metrics import REQUEST_DURATION, REQUESTS_IN_PROGRESS
+from app.middlewares.logging_middleware import UNMATCHED_ROUTE
+
+# Метод приходит от клиента: произвольные значения не должны плодить метки
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class MetricsMiddleware:
+    """Чистый ASGI: гистограмма длительности по шаблону маршрута и число запросов в работе по префиксу пути.
+
+    Шаблон маршрута известен только после обработки (FastAPI кладет его в scope["route"]),
+    поэтому счетчик в работе, который нужен до нее, размечается первым сегментом пути.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # labels() берет блокировку и собирает ключ: дочерние метрики кэшируются на весь срок жизни
+        self._in_progress = {}
+        self._durations = {}
+        self._prefixes: frozenset[str] | None = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+        in_progress_key = (method, self._path_prefix(scope))
+        in_progress = self._in_progress.get(in_progress_key)
+        if in_progress is None:
+            in_progress = self._in_progress[in_progress_key] = REQUESTS_IN_PROGRESS.labels(*in_progress_key)
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            key = (method, getattr(scope.get("route"), "path", UNMATCHED_ROUTE), status_code)
+            duration = self._durations.get(key)
+            if duration is None:
+                duration = self._durations[key] = REQUEST_DURATION.labels(*key[:2], str(status_code))
+            duration.observe(time.perf_counter() - started_at)
+
+    def _path_prefix(self, scope: Scope) -> str:
+        # Только первые сегменты путей маршрутов приложения: путь от клиента не должен плодить метки
+        if self._prefixes is None:
+            self._prefixes = frozenset(_first_segment(route.path) for route in scope["app"].router.routes
+                                       if hasattr(route, "path"))
+        prefix = _first_segment(scope["path"])
+        return prefix if prefix in self._prefixes else UNMATCHED_ROUTE
+
+
+def _first_segment(path: str) -> str:
+    return "/" + path.lstrip("/").split("/", 1)[0]
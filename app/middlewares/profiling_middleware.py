@@ -0,0 +1,125 @@
+import asyncio
+import fcntl
+import hmac
+import os
+import time
+import uuid
+from datetime import datetime
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from app.utils.sampling_profiler import SamplingProfiler
+from settings.settings import get_settings
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_KEY_HEADER = b"x-admin-key"
+PROFILE_RESULT_HEADER = "X-Profile-Result"
+RATE_LIMITED = "rate-limited"
+RATE_WINDOW_SECONDS = 60
+# Значение X-Profile -> расширение файла
+PROFILE_FORMATS = {
+    "collapsed": ".collapsed.txt",
+    "speedscope": ".speedscope.json",
+}
+
+
+class ProfilingMiddleware:
+    """Чистый ASGI: профилирует один запрос с заголовками X-Profile и X-Admin-Key.
+
+    Запрос без X-Profile проходит без дополнительной работы, кроме поиска заголовка.
+    Лимит - PROFILING_MAX_PER_MINUTE профилей в минуту на каталог (общий для воркеров хоста)
+    и один профиль одновременно на воркер. В каталоге хранится не больше PROFILING_MAX_FILES
+    профилей не старше PROFILING_RETENTION_MINUTES.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        settings = get_settings()
+        admin_key = settings.PROFILING_ADMIN_KEY.encode()
+        # Без ключа в настройках или с неверным ключом запрос выполняется как обычно
+        if not admin_key or not hmac.compare_digest(headers.get(ADMIN_KEY_HEADER, b""), admin_key):
+            await self.app(scope, receive, send)
+            return
+
+        profile_format = headers[PROFILE_HEADER].decode("latin-1").strip().lower()
+        if profile_format not in PROFILE_FORMATS:
+            profile_format = "collapsed"
+
+        path = None
+        if not self._active:
+            self._active = True
+            try:
+                path = await asyncio.to_thread(_reserve_profile_file, settings.PROFILING_DIR,
+                                               settings.PROFILING_MAX_PER_MINUTE, PROFILE_FORMATS[profile_format],
+                                               settings.PROFILING_RETENTION_MINUTES * 60, settings.PROFILING_MAX_FILES)
+            finally:
+                self._active = path is not None
+
+        if path is None:
+            await self.app(scope, receive, _with_header(send, RATE_LIMITED))
+            return
+
+        profiler = SamplingProfiler(interval=settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+        profiler.start()
+        try:
+            await self.app(scope, receive, _with_header(send, os.path.basename(path)))
+        finally:
+            profiler.stop()
+            self._active = False
+            name = f"{scope['method']} {scope['path']}"
+            content = profiler.speedscope(name) if profile_format == "speedscope" else profiler.collapsed()
+            await asyncio.to_thread(_write_profile, path, content)
+
+
+def _with_header(send: Send, result: str) -> Send:
+    async def send_wrapper(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            MutableHeaders(scope=message).append(PROFILE_RESULT_HEADER, result)
+        await send(message)
+    return send_wrapper
+
+
+def _reserve_profile_file(directory: str, max_per_minute: int, extension: str,
+                          retention: float, max_files: int) -> str | None:
+    # Лимит считается по файлам каталога, поэтому он общий для всех воркеров, пишущих в него
+    os.makedirs(directory, exist_ok=True)
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        # Подсчет и создание файла под блокировкой каталога: воркеры не превысят лимит одновременно
+        fcntl.flock(directory_fd, fcntl.LOCK_EX)
+        now = time.time()
+        with os.scandir(directory) as entries:
+            profiles = sorted(((entry.stat().st_mtime, entry.path) for entry in entries if entry.is_file()),
+                              reverse=True)
+
+        # Старше срока хранения и сверх max_files (с учетом нового) удаляются, начиная со старых
+        keep = [p for p in profiles[:max(max_files - 1, 0)] if p[0] >= now - retention]
+        for _, stale_path in profiles[len(keep):]:
+            try:
+                os.remove(stale_path)
+            except FileNotFoundError:
+                pass
+
+        if sum(1 for mtime, _ in keep if mtime >= now - RATE_WINDOW_SECONDS) >= max_per_minute:
+            return None
+
+        path = os.path.join(directory,
+                            f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}-{uuid.uuid4().hex[:8]}{extension}")
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        return path
+    finally:
+        os.close(directory_fd)
+
+
+def _write_profile(path: str, content: str) -> None:
+    with open(path, "w") as f:
+        f.write(content)
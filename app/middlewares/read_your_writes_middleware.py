@@ -0,0 +1,28 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from db.replica_router import LAST_WRITE_HEADER, start_write_marker, finish_write_marker
+
+
+class ReadYourWritesMiddleware:
+    """Чистый ASGI: метка X-Last-Write запроса для выбора реплики и ее обновление в ответе после записи."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        write_marker, token = start_write_marker(Headers(scope=scope).get(LAST_WRITE_HEADER))
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and write_marker.wrote:
+                MutableHeaders(scope=message).append(LAST_WRITE_HEADER, f"{write_marker.last_write_at:.3f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish_write_marker(token)
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+
+from starlette.requests import Request
+
+
+@dataclass
+class RouteStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    response_bytes: int = 0
+
+
+class RequestStats:
+    """Агрегированные тайминги запросов воркера по (метод, шаблон маршрута, статус)."""
+
+    def __init__(self):
+        self._routes: dict[tuple[str, str, int], RouteStats] = {}
+
+    def record(self, method: str, route: str, status_code: int, duration: float, response_bytes: int) -> None:
+        key = (method, route, status_code)
+        stats = self._routes.get(key)
+        if stats is None:
+            stats = self._routes[key] = RouteStats()
+        stats.count += 1
+        stats.total_seconds += duration
+        stats.response_bytes += response_bytes
+        if duration > stats.max_seconds:
+            stats.max_seconds = duration
+
+    def snapshot(self) -> list[dict]:
+        return [
+            {
+                "method": method,
+                "route": route,
+                "status": status_code,
+                "count": stats.count,
+                "avg_ms": stats.total_seconds / stats.count * 1000,
+                "max_ms": stats.max_seconds * 1000,
+                "response_bytes": stats.response_bytes,
+            }
+            for (method, route, status_code), stats in self._routes.items()
+        ]
+
+
+def get_request_stats(request: Request) -> RequestStats:
+    return request.app.state.request_stats
@@ -0,0 +1,39 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+from app.metrics import start_request_db_timing, finish_request_db_timing
+
+
+class ServerTimingMiddleware:
+    """Чистый ASGI: заголовок Server-Timing с временем и числом SQL-запросов и общим временем до ответа.
+
+    Разница app - db примерно равна времени Python-кода и ожидания вне БД.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        db_timing, token = start_request_db_timing()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Запросы потоковых ответов после заголовков сюда уже не попадают
+                app_ms = (time.perf_counter() - started_at) * 1000
+                MutableHeaders(scope=message).append(
+                    "Server-Timing",
+                    f'db;dur={db_timing.duration * 1000:.2f};desc="{db_timing.count} queries", app;dur={app_ms:.2f}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish_request_db_timing(token)
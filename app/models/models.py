@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index, text
 
 from app.models.base import AbsId, AbsCreated
 
@@ -7,10 +7,12 @@ class User(AbsId, AbsCreated):
     __tablename__ = 'users'
 
     login = Column(String(100), nullable=False, index=True, unique=True)
-    hashed_password = Column(String(100), nullable=False, index=True)
+    hashed_password = Column(String(255), nullable=False)
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
     second_name = Column(String(50), nullable=False)
+    # Увеличивается триггером БД при каждом изменении строки; из него строится ETag
+    version = Column(Integer, nullable=False, server_default=text('1'))
 
 
 class PrimaryToken(AbsId, AbsCreated):
@@ -18,3 +20,17 @@ class PrimaryToken(AbsId, AbsCreated):
 
     token = Column(String(255), nullable=False, index=True, unique=True)
     name = Column(String(100), nullable=False)
+
+
+class RefreshToken(AbsId, AbsCreated):
+    __tablename__ = 'refresh_tokens'
+
+    jti = Column(String(64), nullable=False, index=True, unique=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Синхронизация фильтра отозванных токенов читает только отозванные строки
+        Index('ix_refresh_tokens_revoked_at', 'revoked_at', postgresql_where=text('revoked_at IS NOT NULL')),
+    )
@@ -1,8 +1,16 @@
-from typing import Sequence
+import functools
+import inspect
+from typing import Sequence, AsyncIterator
 
-from sqlalchemy import select
+from sqlalchemy import select, delete, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.metrics import track_query_source
+from settings.settings import get_settings
+
+# (транзакция, таймаут в мс), выставленный SET LOCAL в этой сессии
+STATEMENT_TIMEOUT_INFO_KEY = "statement_timeout"
+
 
 class BaseRepository:
     model = None
@@ -10,6 +18,36 @@ class BaseRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Запросы публичных методов, включая унаследованные, попадают в метрики как <репозиторий>.<метод>
+        # и выполняются с statement_timeout этого метода
+        for name in dir(cls):
+            fn = inspect.getattr_static(cls, name)
+            if name.startswith("_") or not (inspect.iscoroutinefunction(fn) or inspect.isasyncgenfunction(fn)):
+                continue
+            setattr(cls, name, track_query_source(cls.__name__, name, fn, on_enter=cls._apply_statement_timeout))
+
+    async def _apply_statement_timeout(self, method: str) -> None:
+        # Таймаут по умолчанию задается соединению при подключении (DB_STATEMENT_TIMEOUT_MS);
+        # SET LOCAL действует до конца транзакции, поэтому запрос отправляется, только когда
+        # таймаут метода отличается от действующего в текущей транзакции
+        settings = get_settings()
+        timeout = parse_statement_timeouts(settings.DB_STATEMENT_TIMEOUTS).get(
+            f"{type(self).__name__}.{method}", settings.DB_STATEMENT_TIMEOUT_MS)
+
+        transaction = self.session.get_transaction()
+        current = self.session.info.get(STATEMENT_TIMEOUT_INFO_KEY)
+        if transaction is not None and current is not None and current[0] is transaction:
+            current_timeout = current[1]
+        else:
+            current_timeout = settings.DB_STATEMENT_TIMEOUT_MS
+        if timeout == current_timeout or self.session.bind.dialect.name != "postgresql":
+            return
+
+        await self.session.execute(text(f"SET LOCAL statement_timeout = {int(timeout)}"))
+        self.session.info[STATEMENT_TIMEOUT_INFO_KEY] = (self.session.get_transaction(), timeout)
+
     async def get_by_id(self, id: int) -> model:
         query = self.select().filter_by(id=id)
         return await self.get_one_or_none(query)
@@ -18,6 +56,23 @@ class BaseRepository:
         query = self.select()
         return await self.get_list(query)
 
+    async def get_page(self, limit: int, after: int | None = None) -> Sequence[model]:
+        # Keyset-пагинация по id: стоимость не зависит от номера страницы
+        query = self.select().order_by(self.model.id).limit(limit)
+        if after is not None:
+            query = query.where(self.model.id > after)
+        return await self.get_list(query)
+
+    async def stream_all(self, batch_size: int, after: int | None = None) -> AsyncIterator[model]:
+        # Серверный курсор: строки читаются пачками, не загружая всю таблицу в память
+        query = self.select().order_by(self.model.id).execution_options(yield_per=batch_size)
+        if after is not None:
+            query = query.where(self.model.id > after)
+
+        result = await self.session.stream_scalars(query)
+        async for obj in result:
+            yield obj
+
     async def save(self, obj: model) -> model:
         self.session.add(obj)
         await self.session.flush()
@@ -25,21 +80,34 @@ class BaseRepository:
         return obj
 
     async def save_all(self, objs: Sequence[model]) -> Sequence[model]:
+        # Один flush отправляет вставки пачками (insertmanyvalues) и сразу заполняет id
         self.session.add_all(objs)
-        for obj in objs:
-            await self.session.refresh(obj)
+        await self.session.flush()
         return objs
 
     async def delete_by_id(self, id: int) -> model:
-        obj = await self.get_by_id(id)
-        await self.session.delete(obj)
-        return obj
+        # Удаленная строка возвращается через RETURNING; если ее нет - NoResultFound
+        stmt = delete(self.model).where(self.model.id == id).returning(self.model)
+        result = await self.session.execute(stmt)
+        return result.scalars().one()
 
-    async def delete_all(self) -> Sequence[model]:
-        objs = await self.get_all()
-        for obj in objs:
-            await self.session.delete(obj)
-        return objs
+    async def delete_where(self, *criteria) -> Sequence[int]:
+        stmt = delete(self.model).where(*criteria).returning(self.model.id)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def delete_all(self) -> int:
+        result = await self.session.execute(delete(self.model))
+        return result.rowcount
+
+    async def truncate(self, restart_identity: bool = True, cascade: bool = False) -> None:
+        # Для очистки тестовой БД: быстрее DELETE, но берет эксклюзивную блокировку таблицы
+        stmt = f"TRUNCATE {self.model.__tablename__}"
+        if restart_identity:
+            stmt += " RESTART IDENTITY"
+        if cascade:
+            stmt += " CASCADE"
+        await self.session.execute(text(stmt))
 
     def select(self) -> select:
         return select(self.model)
@@ -50,4 +118,15 @@ class BaseRepository:
 
     async def get_list(self, query) -> Sequence[model]:
         result = await self.session.execute(query)
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
+
+
+@functools.lru_cache(maxsize=4)
+def parse_statement_timeouts(value: str) -> dict[str, int]:
+    # "UserRepository.insert_many_skip_existing=60000,UserRepository.stream_all=0" -> {метод: мс}
+    timeouts = {}
+    for item in value.split(","):
+        if item.strip():
+            method, timeout = item.split("=")
+            timeouts[method.strip()] = int(timeout)
+    return timeouts
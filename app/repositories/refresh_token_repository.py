@@ -0,0 +1,109 @@
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import Row, update, select, delete, func, literal, tuple_, any_, bindparam, String, union_all
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+
+from app.models.models import RefreshToken
+from app.repositories.base import BaseRepository
+
+
+class RefreshTokenRepository(BaseRepository):
+    model = RefreshToken
+
+    async def add(self, jti: str, user_id: int, expires_at: datetime) -> None:
+        stmt = insert(self.model).values(jti=jti, user_id=user_id, expires_at=expires_at)
+        await self.session.execute(stmt)
+
+
+    async def rotate(self, jti: str, user_id: int, expires_at: datetime,
+                     new_jti: str, new_expires_at: datetime) -> int | None:
+        # Один запрос: старый токен отзывается, только если он еще действителен, и новый
+        # вставляется для того же пользователя. Токен без строки (выдан до учета jti) принимается
+        # один раз: его jti вставляется сразу отозванным, повтор упрется в ON CONFLICT.
+        # None - токен уже отозван или истек
+        table = self.model.__table__
+        revoked = (
+            update(table)
+            .where(table.c.jti == jti, table.c.revoked_at.is_(None), table.c.expires_at > func.now())
+            .values(revoked_at=func.now())
+            .returning(table.c.user_id)
+            .cte("revoked")
+        )
+        legacy = (
+            insert(table)
+            .from_select(["jti", "user_id", "expires_at", "revoked_at"],
+                         select(literal(jti), literal(user_id), literal(expires_at), func.now())
+                         .where(~select(revoked.c.user_id).exists()))
+            .on_conflict_do_nothing(index_elements=[table.c.jti])
+            .returning(table.c.user_id)
+            .cte("legacy")
+        )
+        rotated = union_all(select(revoked.c.user_id), select(legacy.c.user_id)).subquery("rotated")
+        stmt = (
+            insert(table)
+            .from_select(["jti", "user_id", "expires_at"],
+                         select(literal(new_jti), rotated.c.user_id, literal(new_expires_at)))
+            .returning(table.c.user_id)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+
+    async def revoke(self, jti: str) -> bool:
+        stmt = (
+            update(self.model)
+            .where(self.model.jti == jti, self.model.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount == 1
+
+
+    async def revoke_all_for_user(self, user_id: int) -> int:
+        stmt = (
+            update(self.model)
+            .where(self.model.user_id == user_id, self.model.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+
+    async def find_revoked_jtis(self, jtis: Sequence[str]) -> set[str]:
+        # Один запрос на всю пачку: WHERE jti = ANY(:jtis)
+        if not jtis:
+            return set()
+        ids = bindparam("jtis", list(jtis), type_=ARRAY(String))
+        stmt = select(self.model.jti).where(self.model.jti == any_(ids), self.model.revoked_at.is_not(None))
+        result = await self.session.execute(stmt)
+        return set(result.scalars().all())
+
+
+    async def find_revoked_since(self, since: tuple[datetime, int] | None, limit: int) -> Sequence[Row]:
+        # (id, jti, revoked_at) еще не истекших отозванных токенов; keyset по (revoked_at, id)
+        stmt = (
+            select(self.model.id, self.model.jti, self.model.revoked_at)
+            .where(self.model.revoked_at.is_not(None), self.model.expires_at > func.now())
+            .order_by(self.model.revoked_at, self.model.id)
+            .limit(limit)
+        )
+        if since is not None:
+            stmt = stmt.where(tuple_(self.model.revoked_at, self.model.id) > tuple_(*since))
+        result = await self.session.execute(stmt)
+        return result.all()
+
+
+    async def delete_expired(self, batch_size: int) -> int:
+        # Пачками и SKIP LOCKED: чистка не держит долгих блокировок и не мешает другим воркерам
+        expired = (
+            select(self.model.id)
+            .where(self.model.expires_at <= func.now())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = delete(self.model).where(self.model.id.in_(expired.scalar_subquery()))
+        result = await self.session.execute(stmt)
+        return result.rowcount
@@ -1,20 +1,19 @@
 from typing import Sequence
 
+from sqlalchemy import Row, text, update, select, exists, or_
+from sqlalchemy.dialects.postgresql import insert
+
 from app.models.models import User
 from app.repositories.base import BaseRepository
 
+# asyncpg ограничивает запрос 32767 параметрами
+INSERT_BATCH_SIZE = 1000
+BULK_INSERT_COLUMNS = ("login", "hashed_password", "first_name", "last_name", "second_name")
+
 
 class UserRepository(BaseRepository):
     model = User
 
-    async def find_by_login_and_password(self, login: str, hashed_password: str) -> User | None:
-        stmt = self.select().where(
-            (self.model.login == login) &
-            (self.model.hashed_password == hashed_password)
-        )
-        return await self.get_one_or_none(stmt)
-
-
     async def find_by_login(self, login: str) -> Sequence[User]:
         stmt = self.select().where(self.model.login == login)
         return await self.get_list(stmt)
@@ -23,3 +22,105 @@ class UserRepository(BaseRepository):
     async def find_by_id(self, id: int) -> User | None:
         stmt = self.select().where(self.model.id == id)
         return await self.get_one_or_none(stmt)
+
+
+    async def find_version(self, id: int) -> int | None:
+        stmt = select(self.model.version).where(self.model.id == id)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+
+    async def get_page_versions(self, limit: int, after: int | None = None) -> Sequence[Row]:
+        # (id, version) страницы get_page: хватает, чтобы посчитать ETag без чтения всей строки
+        stmt = select(self.model.id, self.model.version).order_by(self.model.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        result = await self.session.execute(stmt)
+        return result.all()
+
+
+    async def update_by_id(self, id: int, values: dict) -> Row | None:
+        # Один запрос: UPDATE пропускается, если значения не изменились, а строка
+        # возвращается в обоих случаях; пустой результат означает, что пользователя нет
+        table = self.model.__table__
+        changed = or_(*(table.c[attr].is_distinct_from(value) for attr, value in values.items()))
+
+        updated = (
+            update(table)
+            .where(table.c.id == id, changed)
+            .values(**values)
+            .returning(*table.c)
+            .cte("updated")
+        )
+        unchanged = select(*table.c).where(table.c.id == id, ~exists(select(updated.c.id)))
+        stmt = select(*updated.c).union_all(unchanged)
+
+        result = await self.session.execute(stmt)
+        return result.one_or_none()
+
+
+    async def update_password_hash(self, id: int, old_hashed_password: str, new_hashed_password: str) -> bool:
+        # Условие на старый хэш защищает от перезаписи пароля, измененного параллельно
+        stmt = (
+            update(self.model)
+            .where(self.model.id == id, self.model.hashed_password == old_hashed_password)
+            .values(hashed_password=new_hashed_password)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount == 1
+
+
+    async def insert_skip_existing(self, values: dict) -> int | None:
+        # None, если логин уже занят: конфликт разрешается в БД без исключения
+        stmt = (
+            insert(self.model)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=[self.model.login])
+            .returning(self.model.id)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+
+    async def insert_many_skip_existing(self, rows: Sequence[dict], copy_threshold: int) -> Sequence[Row]:
+        # Возвращает (id, login) только вставленных строк; занятые логины пропускаются
+        if len(rows) >= copy_threshold and self.session.get_bind().dialect.driver == "asyncpg":
+            return await self.__insert_via_copy(rows)
+
+        inserted = []
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            stmt = (
+                insert(self.model)
+                .values(rows[i:i + INSERT_BATCH_SIZE])
+                .on_conflict_do_nothing(index_elements=[self.model.login])
+                .returning(self.model.id, self.model.login)
+            )
+            result = await self.session.execute(stmt)
+            inserted.extend(result.all())
+        return inserted
+
+
+    async def __insert_via_copy(self, rows: Sequence[dict]) -> Sequence[Row]:
+        # COPY не умеет ON CONFLICT, поэтому строки идут через временную таблицу
+        columns = ", ".join(BULK_INSERT_COLUMNS)
+        await self.session.execute(text(
+            f"CREATE TEMP TABLE IF NOT EXISTS users_bulk_insert ON COMMIT DROP AS "
+            f"SELECT {columns} FROM users WITH NO DATA"
+        ))
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "users_bulk_insert",
+            records=[tuple(row[c] for c in BULK_INSERT_COLUMNS) for row in rows],
+            columns=BULK_INSERT_COLUMNS,
+        )
+
+        result = await self.session.execute(text(
+            f"INSERT INTO users ({columns}) SELECT {columns} FROM users_bulk_insert "
+            f"ON CONFLICT (login) DO NOTHING RETURNING id, login"
+        ))
+        inserted = result.all()
+        await self.session.execute(text("TRUNCATE users_bulk_insert"))
+        return inserted
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, status, Response, Depends, HTTPException
-from jwt import DecodeError
+from jwt import InvalidTokenError
 
-from app.schemas.requests.auth_requests import TokensRequest, RefreshTokensRequest
-from app.schemas.responses.token_responses import TokensResponse
-from app.schemas.schemas import Token
+from app.schemas.requests.auth_requests import TokensRequest, RefreshTokensRequest, IntrospectTokenRequest, \
+    RevokeTokensRequest, VerifyTokensBatchRequest
+from app.schemas.responses.token_responses import TokensResponse, IntrospectTokenResponse, RefreshTokensResponse, \
+    VerifyTokensBatchResponse
 from app.security.security import valid_primary_token
+from app.security.verified_token_cache import VerifiedTokenCache, get_verified_token_cache
 from app.services.rest_service import get_tokens_rest_service, TokensRestService
 from app.utils.datetime_utils import utcnow
 
@@ -33,8 +35,8 @@ async def get_token_access(request: TokensRequest, response: Response,
 @auth_router.post("/refresh",
                   responses={
                       status.HTTP_200_OK: {
-                          "model": Token,
-                          "description": "Tokens refreshed successfully.",
+                          "model": RefreshTokensResponse,
+                          "description": "Tokens refreshed successfully. The refresh token is rotated.",
                       },
                   }
 )
@@ -42,13 +44,65 @@ async def refresh_tokens(request: RefreshTokensRequest,
                          response: Response,
                          api_key = Depends(valid_primary_token),
                          tokens_rest_service: TokensRestService = Depends(get_tokens_rest_service)) \
-        -> Token:
+        -> RefreshTokensResponse:
     try:
         response.status_code = status.HTTP_200_OK
         return await tokens_rest_service.refresh_tokens(request.refresh_token)
 
-    except DecodeError as e:
+    except InvalidTokenError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid refresh token",
         ) from e
+
+
+@auth_router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_tokens(request: RevokeTokensRequest,
+                        api_key = Depends(valid_primary_token),
+                        tokens_rest_service: TokensRestService = Depends(get_tokens_rest_service)) -> None:
+    try:
+        await tokens_rest_service.revoke_tokens(request)
+
+    except InvalidTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid refresh token",
+        ) from e
+
+
+@auth_router.post("/introspect",
+                  responses={
+                      status.HTTP_200_OK: {
+                          "model": IntrospectTokenResponse,
+                          "description": "Token state in RFC 7662 style.",
+                      },
+                  }
+)
+async def introspect_token(request: IntrospectTokenRequest,
+                           api_key = Depends(valid_primary_token),
+                           tokens_rest_service: TokensRestService = Depends(get_tokens_rest_service)) \
+        -> IntrospectTokenResponse:
+    return await tokens_rest_service.introspect_token(request)
+
+
+@auth_router.post("/verify-batch",
+                  responses={
+                      status.HTTP_200_OK: {
+                          "model": VerifyTokensBatchResponse,
+                          "description": "Per-token validity and claims, in request order.",
+                      },
+                  }
+)
+async def verify_tokens_batch(request: VerifyTokensBatchRequest,
+                              api_key = Depends(valid_primary_token),
+                              tokens_rest_service: TokensRestService = Depends(get_tokens_rest_service)) \
+        -> VerifyTokensBatchResponse:
+    return await tokens_rest_service.verify_tokens_batch(request)
+
+
+@auth_router.get("/introspect/stats")
+async def introspect_cache_stats(api_key = Depends(valid_primary_token),
+                                 verified_token_cache: VerifiedTokenCache = Depends(get_verified_token_cache)) \
+        -> dict[str, int]:
+    # Статистика кэша текущего воркера
+    return verified_token_cache.stats()
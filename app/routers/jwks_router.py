@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Request, Response, status
+
+from app.services.jwt_keys import JWTKeyRing, get_jwt_key_ring
+from app.utils.etag import etag_matches
+from settings.settings import Settings, get_settings
+
+jwks_router = APIRouter(
+    prefix="/.well-known",
+    tags=["jwks"],
+)
+
+
+@jwks_router.get("/jwks.json",
+                 responses={
+                     status.HTTP_200_OK: {"description": "Public keys for local verification of access tokens."},
+                     status.HTTP_304_NOT_MODIFIED: {"description": "Key set has not changed."},
+                 })
+async def get_jwks(request: Request,
+                   key_ring: JWTKeyRing = Depends(get_jwt_key_ring, use_cache=True),
+                   settings: Settings = Depends(get_settings, use_cache=True)) -> Response:
+    body, etag = key_ring.jwks()
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
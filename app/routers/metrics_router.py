@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.metrics import CacheMetricsPublisher, get_cache_metrics_publisher, render_metrics
+from app.security.security import valid_primary_token
+
+metrics_router = APIRouter(
+    tags=["metrics"],
+)
+
+
+@metrics_router.get("/metrics", response_class=Response)
+async def get_metrics(api_key = Depends(valid_primary_token),
+                      cache_metrics_publisher: CacheMetricsPublisher = Depends(get_cache_metrics_publisher)) \
+        -> Response:
+    # Кэши этого воркера публикуются сразу, остальных - по расписанию
+    cache_metrics_publisher.publish()
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends
+
+from app.middlewares.admission_control import AdmissionController, get_admission_controller
+from app.middlewares.request_stats import RequestStats, get_request_stats
+from app.security.primary_token_cache import PrimaryTokenCache, get_primary_token_cache
+from app.security.security import valid_primary_token
+from app.security.verified_token_cache import VerifiedTokenCache, get_verified_token_cache
+from app.services.user_response_cache import UserResponseCache, get_user_response_cache
+from app.utils.single_flight import SingleFlight, get_single_flight
+
+stats_router = APIRouter(
+    prefix="/stats",
+    tags=["stats"],
+)
+
+
+@stats_router.get("/requests")
+async def get_request_stats_snapshot(api_key = Depends(valid_primary_token),
+                                     request_stats: RequestStats = Depends(get_request_stats)) -> list[dict]:
+    # Тайминги текущего воркера с момента его запуска
+    return request_stats.snapshot()
+
+
+@stats_router.get("/caches")
+async def get_cache_stats(api_key = Depends(valid_primary_token),
+                          user_response_cache: UserResponseCache = Depends(get_user_response_cache),
+                          verified_token_cache: VerifiedTokenCache = Depends(get_verified_token_cache),
+                          primary_token_cache: PrimaryTokenCache = Depends(get_primary_token_cache)) \
+        -> dict[str, dict[str, int]]:
+    # size, hits, misses, evictions кэшей текущего воркера
+    return {
+        "users": user_response_cache.stats(),
+        "verified_tokens": verified_token_cache.stats(),
+        "primary_tokens": primary_token_cache.valid.stats(),
+        "primary_tokens_negative": primary_token_cache.invalid.stats(),
+    }
+
+
+@stats_router.get("/single-flight")
+async def get_single_flight_stats(api_key = Depends(valid_primary_token),
+                                  single_flight: SingleFlight = Depends(get_single_flight)) \
+        -> dict[str, dict[str, int]]:
+    # executed - выполненные запросы, coalesced - присоединившиеся к уже идущему, retried - повторы после отмены
+    return single_flight.stats()
+
+
+@stats_router.get("/admission")
+async def get_admission_stats(api_key = Depends(valid_primary_token),
+                              admission_controller: AdmissionController = Depends(get_admission_controller)) \
+        -> dict[str, dict[str, int]]:
+    # Текущий лимит, занятые слоты и очередь пулов допуска текущего воркера
+    return admission_controller.stats()
@@ -1,21 +1,42 @@
 import datetime
-from email.header import Header
 
-from fastapi import APIRouter, Response, Depends
+from fastapi import APIRouter, Response, Depends, Query, Header
+from fastapi.responses import StreamingResponse
 from starlette import status
 
 from app.routers.base import get_response_modes
-from app.schemas.requests.user_requests import CreateUserRequest, PutUserRequest
+from app.schemas.requests.user_requests import CreateUserRequest, PutUserRequest, BulkCreateUsersRequest
 from app.schemas.responses.error_responses import ServerErrorResponse, BadRequestResponse, UnauthorizedResponse, \
     ForbiddenResponse
-from app.schemas.responses.user_responses import CreateUserResponse, UserResponseEntity
+from app.schemas.responses.user_responses import CreateUserResponse, UserResponseEntity, BulkCreateUsersResponse
 from app.security.security import valid_primary_token
-from app.services.rest_service import get_user_rest_service, UserRestService
+from app.services.rest_service import get_user_rest_service, UserRestService, JSONBody
 
 user_router = APIRouter(
     prefix="/users",
     tags=["users"],
 )
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class JSONBytesResponse(Response):
+    # Тело уже сериализовано (см. app.schemas.serializers): FastAPI отдает Response как есть,
+    # а response_model маршрута остается только для схемы OpenAPI
+    media_type = "application/json"
+
+
+def conditional_response(json_body: JSONBody) -> Response:
+    headers = {"ETag": json_body.etag}
+    if json_body.next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = str(json_body.next_cursor)
+
+    if json_body.body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONBytesResponse(json_body.body, headers=headers)
+
 @user_router.post("/",
                   responses={
                         status.HTTP_201_CREATED: {
@@ -32,7 +53,22 @@ async def create_user(request_body: CreateUserRequest,
     return await user_rest_service.create_user(request_body)
 
 
+@user_router.post("/bulk",
+                  responses={
+                      status.HTTP_200_OK: {
+                          "model": BulkCreateUsersResponse,
+                          "description": "Users created; existing and repeated logins are skipped.",
+                      },
+                  }
+)
+async def create_users_bulk(request_body: BulkCreateUsersRequest,
+                            api_key: str = Depends(valid_primary_token),
+                            user_rest_service: UserRestService = Depends(get_user_rest_service)) -> BulkCreateUsersResponse:
+    return await user_rest_service.create_users_bulk(request_body)
+
+
 @user_router.put("/{id}/",
+                 response_model=UserResponseEntity,
                  responses={
                      status.HTTP_200_OK: {
                          "model": UserResponseEntity,
@@ -41,33 +77,53 @@ async def create_user(request_body: CreateUserRequest,
                  })
 async def edit_user(request: PutUserRequest, id: int,
                     api_key: str = Depends(valid_primary_token),
-                    user_rest_service: UserRestService = Depends(get_user_rest_service)) -> UserResponseEntity:
+                    user_rest_service: UserRestService = Depends(get_user_rest_service)) -> Response:
 
-    return await user_rest_service.put_user(request, id)
+    return conditional_response(await user_rest_service.put_user(request, id))
 
 
 @user_router.get("/{id}/",
+                 response_model=UserResponseEntity,
                  responses={
                      status.HTTP_200_OK: {
                          "model": UserResponseEntity,
                          "description": "User retrieved successfully."
-                     }
+                     },
+                     status.HTTP_304_NOT_MODIFIED: {
+                         "description": "User has not changed since the version in If-None-Match."
+                     },
                  })
 async def get_user(id: int,
+                   if_none_match: str | None = Header(default=None),
                    api_key: str = Depends(valid_primary_token),
-                   user_rest_service: UserRestService = Depends(get_user_rest_service)) -> UserResponseEntity:
-    return await user_rest_service.find_user_by_id(id)
+                   user_rest_service: UserRestService = Depends(get_user_rest_service)) -> Response:
+    return conditional_response(await user_rest_service.find_user_by_id(id, if_none_match))
 
 
 @user_router.get("/",
+                 response_model=list[UserResponseEntity],
                  responses={
                      status.HTTP_200_OK: {
                          "model": list[UserResponseEntity],
-                         "description": "Users retrieved successfully."
-                     }
+                         "description": "Users retrieved successfully. "
+                                        f"The {NEXT_CURSOR_HEADER} header holds the `after` value of the next page. "
+                                        "With `stream=true` users are written as NDJSON.",
+                         "content": {"application/x-ndjson": {}},
+                     },
+                     status.HTTP_304_NOT_MODIFIED: {
+                         "description": "Page has not changed since the ETag in If-None-Match."
+                     },
                  })
-async def get_all_users(api_key: str = Depends(valid_primary_token),
-                            user_rest_service: UserRestService = Depends(get_user_rest_service)) -> list[UserResponseEntity]:
-    return await user_rest_service.find_all_users()
+async def get_all_users(limit: int = Query(default=DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+                        after: int | None = Query(default=None, ge=0),
+                        stream: bool = Query(default=False),
+                        if_none_match: str | None = Header(default=None),
+                        api_key: str = Depends(valid_primary_token),
+                        user_rest_service: UserRestService = Depends(get_user_rest_service)) -> Response:
+    if stream:
+        return StreamingResponse(user_rest_service.stream_all_users(after),
+                                 media_type="application/x-ndjson")
+
+    return conditional_response(await user_rest_service.find_all_users(limit, after, if_none_match))
 
 
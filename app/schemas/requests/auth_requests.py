@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 from app.schemas.requests.base import BaseAuthRequest
 
@@ -10,3 +12,18 @@ class TokensRequest(BaseAuthRequest):
 class RefreshTokensRequest(BaseModel):
     refresh_token: str
 
+
+class RevokeTokensRequest(BaseModel):
+    refresh_token: str
+    # True - выход со всех устройств: отзываются все refresh-токены пользователя
+    all_sessions: bool = False
+
+
+class IntrospectTokenRequest(BaseModel):
+    token: str
+    token_type_hint: Literal["access", "refresh"] | None = None
+
+
+class VerifyTokensBatchRequest(BaseModel):
+    tokens: list[str] = Field(..., min_length=1, max_length=1000)
+    token_type: Literal["access", "refresh"] | None = "access"
@@ -14,3 +14,7 @@ class PutUserRequest(BaseModel):
     first_name: str = Field(default=None, min_length=3, max_length=50)
     last_name: str = Field(default=None, min_length=3, max_length=50)
     second_name: str = Field(default=None, min_length=3, max_length=50)
+
+
+class BulkCreateUsersRequest(BaseModel):
+    users: list[CreateUserRequest] = Field(..., min_length=1, max_length=1000)
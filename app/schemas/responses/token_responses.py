@@ -1,5 +1,34 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
 from app.schemas.responses.base import BaseTokensResponse
+from app.schemas.schemas import Token
 
 
 class TokensResponse(BaseTokensResponse):
-    pass
\ No newline at end of file
+    pass
+
+
+class RefreshTokensResponse(Token):
+    # Поля Token описывают новый access-токен; refresh-токен одноразовый и выдается заново
+    refresh_token: Token
+
+
+class IntrospectTokenResponse(BaseModel):
+    # RFC 7662: для недействительного токена возвращается только active=false
+    active: bool
+    token_type: str | None = None
+    exp: datetime | None = None
+    claims: dict | None = None
+
+
+class VerifiedTokenItem(BaseModel):
+    valid: bool
+    exp: datetime | None = None
+    claims: dict | None = None
+
+
+class VerifyTokensBatchResponse(BaseModel):
+    # Результаты в порядке токенов запроса
+    results: list[VerifiedTokenItem]
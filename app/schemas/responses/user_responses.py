@@ -21,6 +21,18 @@ class CreateUserResponse(BaseUserResponse, BaseTokensResponse):
     pass
 
 
+class BulkCreateUserItem(BaseModel):
+    login: str
+    created: bool
+    id: int | None = None
+
+
+class BulkCreateUsersResponse(BaseModel):
+    created: int
+    skipped: int
+    items: list[BulkCreateUserItem]
+
+
 class UserResponseEntity(BaseUserResponse):
 
     @classmethod
@@ -0,0 +1,32 @@
+from operator import attrgetter
+from typing import Any, Iterable
+
+import orjson
+from pydantic import BaseModel
+
+from app.schemas.responses.user_responses import UserResponseEntity
+
+
+class RowSerializer:
+    """JSON напрямую из ORM-объектов и Row по полям схемы ответа, без создания и валидации моделей.
+
+    Поля и порядок берутся из схемы, поэтому ответ совпадает с тем, что описано в OpenAPI.
+    """
+
+    def __init__(self, schema: type[BaseModel]):
+        self.fields = tuple(schema.model_fields)
+        getter = attrgetter(*self.fields)
+        # attrgetter с одним полем возвращает значение, а не кортеж
+        self._getter = getter if len(self.fields) > 1 else lambda obj: (getter(obj),)
+
+    def to_dict(self, obj: Any) -> dict:
+        return dict(zip(self.fields, self._getter(obj)))
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(self.to_dict(obj))
+
+    def dumps_many(self, objs: Iterable[Any]) -> bytes:
+        return orjson.dumps([self.to_dict(obj) for obj in objs])
+
+
+user_serializer = RowSerializer(UserResponseEntity)
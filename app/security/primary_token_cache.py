@@ -0,0 +1,58 @@
+from starlette.requests import Request
+
+from app.utils.ttl_cache import TTLCache, MISSING
+from settings.settings import Settings
+
+PRIMARY_TOKENS_CHANNEL = "primary_tokens_changed"
+PRIMARY_TOKENS_FINGERPRINT_QUERY = (
+    "SELECT md5(coalesce(string_agg(token, ',' ORDER BY id), '')) FROM primary_tokens"
+)
+
+
+class PrimaryTokenCache:
+    """Кэш результатов проверки API-ключей: валидные ключи и короткоживущие отказы."""
+
+    def __init__(self, max_size: int, ttl: float, negative_max_size: int, negative_ttl: float):
+        self.valid = TTLCache(max_size, ttl)
+        self.invalid = TTLCache(negative_max_size, negative_ttl)
+        # Счетчик инвалидаций: результат проверки, начатой до инвалидации, в кэш не попадает
+        self._generation = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "PrimaryTokenCache":
+        return cls(
+            max_size=settings.PRIMARY_TOKEN_CACHE_SIZE,
+            ttl=settings.PRIMARY_TOKEN_CACHE_TTL_SECONDS,
+            negative_max_size=settings.PRIMARY_TOKEN_NEGATIVE_CACHE_SIZE,
+            negative_ttl=settings.PRIMARY_TOKEN_NEGATIVE_CACHE_TTL_SECONDS,
+        )
+
+    def lookup(self, token: str) -> bool | None:
+        if self.valid.get(token, MISSING) is not MISSING:
+            return True
+        if self.invalid.get(token, MISSING) is not MISSING:
+            return False
+        return None
+
+    def begin_read(self) -> int:
+        return self._generation
+
+    def store(self, token: str, is_valid: bool, generation: int) -> None:
+        if generation != self._generation:
+            return
+        if is_valid:
+            self.invalid.pop(token)
+            self.valid.set(token, True)
+        else:
+            self.valid.pop(token)
+            self.invalid.set(token, False)
+
+    def invalidate(self, payload: str | None = None) -> None:
+        # Ключи меняются редко, поэтому при любом изменении таблицы сбрасываем кэш целиком
+        self._generation += 1
+        self.valid.clear()
+        self.invalid.clear()
+
+
+def get_primary_token_cache(request: Request) -> PrimaryTokenCache:
+    return request.app.state.primary_token_cache
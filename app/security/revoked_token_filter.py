@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+from starlette.requests import Request
+
+from app.utils.bloom_filter import BloomFilter
+from settings.settings import Settings
+
+REFRESH_TOKENS_REVOKED_CHANNEL = "refresh_tokens_revoked"
+SYNC_BATCH_SIZE = 5000
+# revoked_at - время начала транзакции: строки долгих транзакций появляются "в прошлом",
+# поэтому каждая синхронизация перечитывает это окно до последней метки
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class RevokedTokenFilter:
+    """Фильтр Блума отозванных jti воркера: в БД идем только при возможном совпадении.
+
+    Фильтр наполняется по NOTIFY и периодической инкрементальной синхронизацией;
+    перестраивается целиком после пропуска уведомлений или при переполнении.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        self._watermark: tuple[datetime, int] | None = None
+        self._rebuild_pending: list[str] | None = None
+        self._needs_rebuild = True
+        self.ready = False
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RevokedTokenFilter":
+        return cls(capacity=settings.REFRESH_TOKEN_FILTER_CAPACITY,
+                   error_rate=settings.REFRESH_TOKEN_FILTER_ERROR_RATE)
+
+    def might_be_revoked(self, jti: str) -> bool:
+        # Пока фильтр не построен, любой токен нужно проверять в БД
+        return not self.ready or jti in self._filter
+
+    def add(self, jti: str) -> None:
+        self._filter.add(jti)
+        if self._rebuild_pending is not None:
+            self._rebuild_pending.append(jti)
+
+    def on_notification(self, payload: str | None) -> None:
+        if payload is None:
+            # Уведомления могли быть пропущены
+            self._needs_rebuild = True
+        else:
+            self.add(payload)
+
+    async def sync(self, session_manager) -> None:
+        if self._needs_rebuild or self._filter.is_saturated():
+            await self._rebuild(session_manager)
+        else:
+            await self._sync_incremental(session_manager)
+
+    async def _sync_incremental(self, session_manager) -> None:
+        since = None
+        if self._watermark is not None:
+            since = (self._watermark[0] - SYNC_OVERLAP, 0)
+
+        async for id, jti, revoked_at in self._revoked_since(session_manager, since):
+            if self._watermark is None or (revoked_at, id) > self._watermark:
+                self._watermark = (revoked_at, id)
+                self._filter.add(jti)
+            elif jti not in self._filter:
+                self._filter.add(jti)
+
+    async def _rebuild(self, session_manager) -> None:
+        self._needs_rebuild = False
+        self._rebuild_pending = []
+        try:
+            jtis, watermark = [], None
+            async for id, jti, revoked_at in self._revoked_since(session_manager, None):
+                jtis.append(jti)
+                watermark = (revoked_at, id)
+
+            # Запас по емкости, чтобы не перестраивать фильтр на каждой синхронизации
+            bloom_filter = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+            for jti in jtis + self._rebuild_pending:
+                bloom_filter.add(jti)
+        except BaseException:
+            self._needs_rebuild = True
+            raise
+        finally:
+            self._rebuild_pending = None
+
+        self._filter = bloom_filter
+        self._watermark = watermark
+        self.ready = True
+
+    @staticmethod
+    async def _revoked_since(session_manager, since: tuple[datetime, int] | None):
+        while True:
+            async with session_manager.start_without_commit() as open_session_manager:
+                rows = await open_session_manager.refresh_tokens.find_revoked_since(since, SYNC_BATCH_SIZE)
+            for row in rows:
+                yield row
+            if len(rows) < SYNC_BATCH_SIZE:
+                return
+            since = (rows[-1].revoked_at, rows[-1].id)
+
+
+def get_revoked_token_filter(request: Request) -> RevokedTokenFilter:
+    return request.app.state.revoked_token_filter
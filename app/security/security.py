@@ -1,15 +1,30 @@
 from fastapi import Security, Depends
 from fastapi.security import APIKeyHeader
 
+from app.security.primary_token_cache import PrimaryTokenCache, get_primary_token_cache
 from app.services.check_primary_token_service import CheckPrimaryTokenService, get_check_primary_token_service
+from app.utils.single_flight import SingleFlight, get_single_flight
 
 api_key_header = APIKeyHeader(name="X-API-KEY", auto_error=True)
 
 async def valid_primary_token(api_key: str = Security(api_key_header),
-                              check_primary_token_service: CheckPrimaryTokenService = Depends(get_check_primary_token_service)
+                              check_primary_token_service: CheckPrimaryTokenService = Depends(get_check_primary_token_service),
+                              primary_token_cache: PrimaryTokenCache = Depends(get_primary_token_cache),
+                              single_flight: SingleFlight = Depends(get_single_flight)
                               ) -> str:
 
-    if not await check_primary_token_service.find_primary_token(api_key):
+    is_valid = primary_token_cache.lookup(api_key)
+    if is_valid is None:
+        async def check() -> bool:
+            generation = primary_token_cache.begin_read()
+            found = await check_primary_token_service.find_primary_token(api_key) is not None
+            primary_token_cache.store(api_key, found, generation)
+            return found
+
+        # Пачка запросов с новым ключом после сброса кэша проверяет его одним запросом
+        is_valid = await single_flight.do("primary_tokens", api_key, check)
+
+    if not is_valid:
         from fastapi import HTTPException
         from starlette.status import HTTP_401_UNAUTHORIZED
 
@@ -18,4 +33,4 @@ async def valid_primary_token(api_key: str = Security(api_key_header),
             detail="Invalid API Key",
         )
 
-    return api_key
\ No newline at end of file
+    return api_key
@@ -0,0 +1,42 @@
+import hashlib
+import time
+
+from starlette.requests import Request
+
+from app.utils.ttl_cache import TTLCache
+from settings.settings import Settings
+
+
+class VerifiedTokenCache:
+    """Кэш успешно проверенных JWT: payload хранится до exp токена, ключ - sha256 токена."""
+
+    def __init__(self, max_size: int):
+        self.cache = TTLCache(max_size, ttl=0)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "VerifiedTokenCache":
+        return cls(max_size=settings.VERIFIED_TOKEN_CACHE_SIZE)
+
+    def get(self, token: str) -> dict | None:
+        return self.cache.get(self.digest(token), None)
+
+    def store(self, token: str, payload: dict, expires_at: float) -> None:
+        # expires_at - unix-время, после которого токен нельзя отдавать из кэша
+        ttl = expires_at - time.time()
+        if ttl > 0:
+            self.cache.set(self.digest(token), payload, ttl=ttl)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self.cache.stats()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        # Сами токены в памяти не держим
+        return hashlib.sha256(token.encode()).digest()
+
+
+def get_verified_token_cache(request: Request) -> VerifiedTokenCache:
+    return request.app.state.verified_token_cache
@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from starlette.requests import Request
+
+from app.utils.datetime_utils import utcnow, to_utc
+from settings.settings import Settings
+
+KEYS_FILE_NAME = "keys.json"
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "ES256", "RS256")
+
+
+@dataclass(frozen=True)
+class JWTKey:
+    kid: str | None
+    algorithm: str
+    signing_key: Any
+    verifying_key: Any
+    activates_at: datetime | None = None
+    retires_at: datetime | None = None
+
+    def is_active(self, now: datetime) -> bool:
+        return (self.activates_at is None or self.activates_at <= now) and not self.is_retired(now)
+
+    def is_retired(self, now: datetime) -> bool:
+        return self.retires_at is not None and self.retires_at <= now
+
+    def to_jwk(self) -> dict:
+        jwk = jwt.get_algorithm_by_name(self.algorithm).to_jwk(self.verifying_key, as_dict=True)
+        jwk.update(kid=self.kid, alg=self.algorithm, use="sig")
+        return jwk
+
+
+class JWTKeyRing:
+    """Ключи подписи JWT: подписываем самым новым активным, проверяем любым неотозванным по kid."""
+
+    def __init__(self, keys: list[JWTKey]):
+        if not keys:
+            raise ValueError("Key ring must contain at least one key")
+        # Самые новые ключи первыми
+        self.keys = sorted(keys, key=lambda k: k.activates_at or datetime.min.replace(tzinfo=timezone.utc),
+                           reverse=True)
+        self._keys_by_kid = {key.kid: key for key in self.keys}
+        self._jwks_cache: tuple[tuple, bytes, str] | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "JWTKeyRing":
+        legacy_key = None
+        if settings.ALGORITHM not in ASYMMETRIC_ALGORITHMS:
+            # Симметричный ключ без kid: в JWKS не публикуется
+            legacy_key = JWTKey(None, settings.ALGORITHM, settings.SECRET_KEY, settings.SECRET_KEY)
+        if not settings.JWT_KEYS_DIR:
+            if legacy_key is None:
+                raise ValueError(f"JWT_KEYS_DIR is required for {settings.ALGORITHM}")
+            return cls([legacy_key])
+
+        keys = _load_keys(settings.JWT_KEYS_DIR)
+        if legacy_key is not None:
+            # После перехода на ключи из каталога уже выданные токены должны проверяться до истечения:
+            # симметричный ключ подписывает, пока не активирован первый ключ каталога,
+            # и проверяет еще самый долгий срок жизни токена после этого
+            if keys:
+                token_lifetime = max(timedelta(hours=settings.REFRESH_TOKEN_EXPIRE_HOURS),
+                                     timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+                first_activation = min(key.activates_at for key in keys)
+                legacy_key = replace(legacy_key, retires_at=first_activation + token_lifetime)
+            keys.append(legacy_key)
+        return cls(keys)
+
+    @classmethod
+    def from_directory(cls, path: str) -> "JWTKeyRing":
+        return cls(_load_keys(path))
+
+    def signing_key(self, now: datetime | None = None) -> JWTKey:
+        now = now or utcnow()
+        for key in self.keys:
+            if key.is_active(now):
+                return key
+        raise LookupError("No active JWT signing key")
+
+    def verification_key(self, kid: str | None, now: datetime | None = None) -> JWTKey | None:
+        key = self._keys_by_kid.get(kid)
+        if key is None or key.is_retired(now or utcnow()):
+            return None
+        return key
+
+    def published_keys(self, now: datetime | None = None) -> list[JWTKey]:
+        # Будущие ключи публикуются заранее, чтобы клиенты успели их закэшировать до ротации
+        now = now or utcnow()
+        return [key for key in self.keys if key.kid is not None and not key.is_retired(now)]
+
+    def jwks(self, now: datetime | None = None) -> tuple[bytes, str]:
+        # Тело и ETag пересчитываются только при изменении набора опубликованных ключей
+        keys = self.published_keys(now)
+        kids = tuple(key.kid for key in keys)
+        if self._jwks_cache is None or self._jwks_cache[0] != kids:
+            body = json.dumps({"keys": [key.to_jwk() for key in keys]}, separators=(",", ":")).encode()
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            self._jwks_cache = (kids, body, etag)
+        return self._jwks_cache[1], self._jwks_cache[2]
+
+
+def get_jwt_key_ring(request: Request) -> JWTKeyRing:
+    return request.app.state.jwt_key_ring
+
+
+def _load_keys(path: str) -> list[JWTKey]:
+    with open(os.path.join(path, KEYS_FILE_NAME)) as f:
+        entries = json.load(f)
+    return [_load_key(path, entry) for entry in entries]
+
+
+def _load_key(path: str, entry: dict) -> JWTKey:
+    # Без activates_at срок вывода симметричного ключа не от чего отсчитывать (см. from_settings)
+    if not entry.get("activates_at"):
+        raise ValueError(f"JWT key {entry.get('kid')} has no activates_at")
+    with open(os.path.join(path, entry["file"]), "rb") as f:
+        private_key = serialization.load_pem_private_key(f.read(), password=None)
+    return JWTKey(
+        kid=entry["kid"],
+        algorithm=entry["alg"],
+        signing_key=private_key,
+        verifying_key=private_key.public_key(),
+        activates_at=_parse_datetime(entry["activates_at"]),
+        retires_at=_parse_datetime(entry.get("retires_at")),
+    )
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    return to_utc(datetime.fromisoformat(value)) if value else None
+
+
+def _generate_private_key(algorithm: str):
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+
+def add_key(path: str, algorithm: str, activates_at: datetime, retire_previous_at: datetime | None) -> dict:
+    # Новый ключ добавляется к набору; прежние активные ключи получают дату вывода из оборота
+    os.makedirs(path, exist_ok=True)
+    keys_file = os.path.join(path, KEYS_FILE_NAME)
+    entries = []
+    if os.path.exists(keys_file):
+        with open(keys_file) as f:
+            entries = json.load(f)
+
+    kid = f"{activates_at:%Y%m%d%H%M%S}-{os.urandom(4).hex()}"
+    file_name = f"{kid}.pem"
+    private_key = _generate_private_key(algorithm)
+    pem = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                    serialization.NoEncryption())
+    fd = os.open(os.path.join(path, file_name), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+
+    if retire_previous_at is not None:
+        for entry in entries:
+            if entry.get("retires_at") is None:
+                entry["retires_at"] = retire_previous_at.isoformat()
+
+    entry = {"kid": kid, "alg": algorithm, "file": file_name,
+             "activates_at": activates_at.isoformat(), "retires_at": None}
+    entries.append(entry)
+    with open(keys_file, "w") as f:
+        json.dump(entries, f, indent=2)
+    return entry
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Add a JWT signing key to the key directory.")
+    parser.add_argument("--dir", required=True)
+    parser.add_argument("--alg", choices=ASYMMETRIC_ALGORITHMS, default="EdDSA")
+    parser.add_argument("--activate-in-hours", type=float, default=24,
+                        help="Publish now, start signing later so JWKS caches pick the key up first.")
+    parser.add_argument("--retire-previous-after-hours", type=float, default=None,
+                        help="Hours after activation when previous keys stop verifying "
+                             "(at least the longest token lifetime).")
+    args = parser.parse_args()
+
+    activates_at = utcnow() + timedelta(hours=args.activate_in_hours)
+    retire_previous_at = None
+    if args.retire_previous_after_hours is not None:
+        retire_previous_at = activates_at + timedelta(hours=args.retire_previous_after_hours)
+
+    entry = add_key(args.dir, args.alg, activates_at, retire_previous_at)
+    print(json.dumps(entry, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,24 @@
 import jwt
-from typing import Dict, Tuple, Optional, Any
+from typing import Dict, Tuple, Optional, Any, Sequence
 import secrets
 from datetime import     timedelta
 
 from fastapi import Depends
-from jwt import InvalidTokenError
+from jwt import InvalidTokenError, DecodeError
 
+from app.metrics import JWT_DURATION
 from app.schemas.schemas import Token
+from app.security.verified_token_cache import VerifiedTokenCache, get_verified_token_cache
+from app.services.jwt_keys import JWTKeyRing, JWTKey, get_jwt_key_ring
 from app.utils.datetime_utils import utcnow
-from settings.settings import Settings, load_settings
+from settings.settings import Settings, get_settings
 
 
 class JWTTokenService:
-    def __init__(self, settings: Settings):
-        self.secret_key = settings.SECRET_KEY
-        self.algorithm = settings.ALGORITHM
+    def __init__(self, settings: Settings, key_ring: JWTKeyRing | None = None,
+                 verified_token_cache: VerifiedTokenCache | None = None):
+        self.key_ring = key_ring or JWTKeyRing.from_settings(settings)
+        self.verified_token_cache = verified_token_cache
         self.access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         self.refresh_token_expires = timedelta(hours=settings.REFRESH_TOKEN_EXPIRE_HOURS)
         self.settings = settings
@@ -36,12 +40,12 @@ class JWTTokenService:
             payload.update(additional_data)
 
         return Token(
-            token=jwt.encode(payload, self.secret_key, algorithm=self.algorithm),
+            token=self.__encode(payload),
             expired_at=expired_at,
         )
 
 
-    def generate_refresh_token(self, user_id: int) -> Token:
+    def generate_refresh_token(self, user_id: int, jti: str | None = None) -> Token:
         now = utcnow()
         expired_at = now + self.refresh_token_expires
 
@@ -50,28 +54,46 @@ class JWTTokenService:
             'type': 'refresh',
             'exp': expired_at,
             'iat': now,
-            'jti': secrets.token_urlsafe(16)
+            'jti': jti or self.new_jti()
         }
 
         return Token(
-            token=jwt.encode(payload, self.secret_key, algorithm=self.algorithm),
+            token=self.__encode(payload),
             expired_at=expired_at
         )
 
-    def generate_tokens(self, user_id: int, additional_data: Dict = None) -> Tuple[Token, Token]:
+    def generate_tokens(self, user_id: int, additional_data: Dict = None,
+                        refresh_jti: str | None = None) -> Tuple[Token, Token]:
         access_token = self.generate_access_token(user_id, additional_data)
-        refresh_token = self.generate_refresh_token(user_id)
+        refresh_token = self.generate_refresh_token(user_id, refresh_jti)
 
         return access_token, refresh_token
 
-    def verify_token(self, token: str, token_type: str = "access") -> Optional[Dict]:
-        payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+    def verify_token(self, token: str, token_type: str | None = "access") -> Optional[Dict]:
+        # token_type=None: принимается токен любого типа
+        payload = self.__decode(token)
 
-        if payload.get('type') != token_type:
+        if token_type is not None and payload.get('type') != token_type:
             return None
 
         return payload
 
+    def verify_tokens(self, tokens: Sequence[str], token_type: str | None = None) -> list[Optional[Dict]]:
+        # Пачка: одинаковые токены проверяются один раз, ключ для каждого kid выбирается один раз;
+        # недействительный токен дает None, а не исключение
+        keys: dict[str | None, JWTKey | None] = {}
+        payloads: dict[str, Optional[Dict]] = {}
+        for token in dict.fromkeys(tokens):
+            try:
+                payload = self.__decode(token, keys)
+            except InvalidTokenError:
+                payload = None
+            if payload is not None and token_type is not None and payload.get('type') != token_type:
+                payload = None
+            payloads[token] = payload
+
+        return [payloads[token] for token in tokens]
+
 
     def refresh_access_token(self, refresh_token: str, additional_data: Dict = None) -> Token:
         payload = self.verify_token(refresh_token, "refresh")
@@ -84,6 +106,47 @@ class JWTTokenService:
 
         return new_access_token
 
+    @staticmethod
+    def new_jti() -> str:
+        return secrets.token_urlsafe(16)
+
+    def __decode(self, token: str, keys: dict[str | None, JWTKey | None] | None = None) -> Dict:
+        if self.verified_token_cache is not None:
+            payload = self.verified_token_cache.get(token)
+            if payload is not None:
+                return dict(payload)
+
+        # Ключ выбирается по kid из заголовка, алгоритм берется из ключа, а не из токена
+        kid = jwt.get_unverified_header(token).get("kid")
+        if keys is None:
+            key = self.key_ring.verification_key(kid)
+        else:
+            if kid not in keys:
+                keys[kid] = self.key_ring.verification_key(kid)
+            key = keys[kid]
+        if key is None:
+            raise DecodeError("Unknown signing key")
+        with JWT_DURATION.labels("verify").time():
+            payload = jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+        if self.verified_token_cache is not None:
+            # Запись не переживает ни exp токена, ни вывод ключа из оборота
+            expires_at = payload["exp"]
+            if key.retires_at is not None:
+                expires_at = min(expires_at, key.retires_at.timestamp())
+            self.verified_token_cache.store(token, dict(payload), expires_at)
+
+        return payload
+
+    def __encode(self, payload: Dict) -> str:
+        key = self.key_ring.signing_key()
+        headers = {"kid": key.kid} if key.kid is not None else None
+        with JWT_DURATION.labels("sign").time():
+            return jwt.encode(payload, key.signing_key, algorithm=key.algorithm, headers=headers)
+
 
-def get_jwt_token_service(settings = Depends(load_settings, use_cache=True)) -> JWTTokenService:
-    return JWTTokenService(settings)
\ No newline at end of file
+def get_jwt_token_service(settings = Depends(get_settings, use_cache=True),
+                          key_ring: JWTKeyRing = Depends(get_jwt_key_ring, use_cache=True),
+                          verified_token_cache: VerifiedTokenCache = Depends(get_verified_token_cache, use_cache=True)
+                          ) -> JWTTokenService:
+    return JWTTokenService(settings, key_ring, verified_token_cache)
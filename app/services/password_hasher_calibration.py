@@ -0,0 +1,47 @@
+import argparse
+import statistics
+import time
+
+from app.services.password_hashers import ScryptPasswordHasher
+
+MIN_LN = 10
+MAX_LN = 20
+SAMPLES = 5
+
+
+def measure(hasher: ScryptPasswordHasher, samples: int = SAMPLES) -> float:
+    timings = []
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, r: int = 8, p: int = 1) -> tuple[int, float]:
+    # Самая большая стоимость, при которой один хэш укладывается в целевое время
+    best_ln, best_ms = MIN_LN, measure(ScryptPasswordHasher(ln=MIN_LN, r=r, p=p))
+    for ln in range(MIN_LN + 1, MAX_LN + 1):
+        elapsed_ms = measure(ScryptPasswordHasher(ln=ln, r=r, p=p))
+        if elapsed_ms > target_ms:
+            break
+        best_ln, best_ms = ln, elapsed_ms
+    return best_ln, best_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pick scrypt parameters for a target per-hash latency.")
+    parser.add_argument("--target-ms", type=float, default=50)
+    parser.add_argument("-r", type=int, default=8)
+    parser.add_argument("-p", type=int, default=1)
+    args = parser.parse_args()
+
+    ln, elapsed_ms = calibrate(args.target_ms, args.r, args.p)
+    print(f"# median {elapsed_ms:.1f} ms per hash on this machine (target {args.target_ms:.0f} ms)")
+    print(f"PASSWORD_SCRYPT_LN={ln}")
+    print(f"PASSWORD_SCRYPT_R={args.r}")
+    print(f"PASSWORD_SCRYPT_P={args.p}")
+
+
+if __name__ == "__main__":
+    main()
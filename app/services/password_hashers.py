@@ -0,0 +1,101 @@
+import base64
+import hashlib
+import hmac
+import os
+from abc import ABC, abstractmethod
+from typing import Sequence
+
+# Модуль выполняется в процессах пула хэширования, поэтому не импортирует ничего тяжелого
+
+
+class BasePasswordHasher(ABC):
+    algorithm: str = None
+
+    @abstractmethod
+    def hash(self, password: str) -> str:
+        ...
+
+    @abstractmethod
+    def verify(self, password: str, encoded: str) -> bool:
+        ...
+
+    def dummy_hash(self) -> str:
+        # Хэш случайного пароля с текущими параметрами: его проверка стоит столько же, сколько настоящего
+        return self.hash(os.urandom(16).hex())
+
+    def identify(self, encoded: str) -> bool:
+        return encoded.startswith(f"${self.algorithm}$")
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return False
+
+
+class Sha256PasswordHasher(BasePasswordHasher):
+    # Старый формат: hex sha256 без соли и префикса. Только для проверки существующих хэшей
+    algorithm = "sha256"
+
+    def hash(self, password: str) -> str:
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password: str, encoded: str) -> bool:
+        return hmac.compare_digest(self.hash(password), encoded)
+
+    def identify(self, encoded: str) -> bool:
+        return len(encoded) == 64 and not encoded.startswith("$")
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    # Формат: $scrypt$ln=14,r=8,p=1$<salt>$<hash>, salt и hash в base64 без паддинга
+    algorithm = "scrypt"
+
+    def __init__(self, ln: int = 14, r: int = 8, p: int = 1, salt_size: int = 16, key_size: int = 32):
+        self.ln = ln
+        self.r = r
+        self.p = p
+        self.salt_size = salt_size
+        self.key_size = key_size
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(self.salt_size)
+        key = self._derive(password, salt, self.ln, self.r, self.p, self.key_size)
+        return f"${self.algorithm}${self._format_params(self.ln, self.r, self.p)}${_b64encode(salt)}${_b64encode(key)}"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        ln, r, p, salt, key = self._parse(encoded)
+        return hmac.compare_digest(self._derive(password, salt, ln, r, p, len(key)), key)
+
+    def dummy_hash(self) -> str:
+        # Случайный ключ вместо результата KDF: совпасть с ним не может ни один пароль
+        return (f"${self.algorithm}${self._format_params(self.ln, self.r, self.p)}"
+                f"${_b64encode(os.urandom(self.salt_size))}${_b64encode(os.urandom(self.key_size))}")
+
+    def needs_rehash(self, encoded: str) -> bool:
+        ln, r, p, salt, key = self._parse(encoded)
+        return (ln, r, p, len(key)) != (self.ln, self.r, self.p, self.key_size)
+
+    def _parse(self, encoded: str) -> tuple[int, int, int, bytes, bytes]:
+        _, _, params, salt, key = encoded.split("$")
+        values = dict(item.split("=") for item in params.split(","))
+        return int(values["ln"]), int(values["r"]), int(values["p"]), _b64decode(salt), _b64decode(key)
+
+    @staticmethod
+    def _format_params(ln: int, r: int, p: int) -> str:
+        return f"ln={ln},r={r},p={p}"
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, ln: int, r: int, p: int, key_size: int) -> bytes:
+        n = 2 ** ln
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p, dklen=key_size)
+
+
+def hash_many(hasher: BasePasswordHasher, passwords: Sequence[str]) -> list[str]:
+    return [hasher.hash(password) for password in passwords]
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
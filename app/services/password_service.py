@@ -1,14 +1,126 @@
-import hashlib
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Sequence, Callable, Any
+
+from fastapi import HTTPException, status
+from starlette.requests import Request
+
+from app.services.password_hashers import BasePasswordHasher, Sha256PasswordHasher, ScryptPasswordHasher, hash_many
+from settings.settings import Settings
+
+# Пачка паролей занимает процесс пула на HASH_CHUNK_SIZE * ~70 мс (scrypt ln=14)
+HASH_CHUNK_SIZE = 10
+BUSY_RETRY_AFTER_SECONDS = 1
+
+
+class PasswordHashingPool:
+    """Пул процессов для KDF: хэширование не блокирует event loop воркера.
+
+    max_pending ограничивает число хэшей в очереди и в работе: пачка считается
+    по числу паролей в ней. Пачки массового создания занимают не больше max_workers - 1
+    процессов одновременно, чтобы логины не стояли в очереди за всей выгрузкой.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        # spawn: дочерние процессы не наследуют потоки и event loop воркера
+        self._executor = ProcessPoolExecutor(max_workers=max_workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        self._max_pending = max_pending
+        self._pending = 0
+        self._batch_slots = asyncio.Semaphore(max(max_workers - 1, 1))
+
+    async def run(self, fn: Callable, *args, cost: int = 1) -> Any:
+        # Очередь ограничена: при перегрузке лучше быстро ответить 503, чем копить задержку
+        if self._pending + cost > self._max_pending:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Password hashing is overloaded",
+                                headers={"Retry-After": str(BUSY_RETRY_AFTER_SECONDS)})
+
+        self._pending += cost
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= cost
+
+    async def run_batch(self, fn: Callable, *args, cost: int) -> Any:
+        # Пачка ждет свободного слота до постановки в очередь пула и не занимает место в max_pending
+        async with self._batch_slots:
+            return await self.run(fn, *args, cost=cost)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
 
 
 class PasswordService:
+    def __init__(self, hasher: BasePasswordHasher, pool: PasswordHashingPool | None = None):
+        # Новые пароли хэшируются hasher, проверяются хэши любого из известных форматов
+        self.hasher = hasher
+        self.hashers = [hasher] + [h for h in (ScryptPasswordHasher(), Sha256PasswordHasher())
+                                   if h.algorithm != hasher.algorithm]
+        self.pool = pool
+        self._dummy_hash = hasher.dummy_hash()
+
+    @classmethod
+    def from_settings(cls, settings: Settings, pool: PasswordHashingPool | None = None) -> "PasswordService":
+        if settings.PASSWORD_HASHER == ScryptPasswordHasher.algorithm:
+            hasher = ScryptPasswordHasher(ln=settings.PASSWORD_SCRYPT_LN,
+                                          r=settings.PASSWORD_SCRYPT_R,
+                                          p=settings.PASSWORD_SCRYPT_P)
+        elif settings.PASSWORD_HASHER == Sha256PasswordHasher.algorithm:
+            hasher = Sha256PasswordHasher()
+        else:
+            raise ValueError(f"Unknown password hasher: {settings.PASSWORD_HASHER}")
+        return cls(hasher, pool)
+
+    async def hashed(self, password: str) -> str:
+        return await self.__run(self.hasher.hash, password)
+
+    async def hashed_many(self, passwords: Sequence[str]) -> list[str]:
+        if self.pool is None:
+            return hash_many(self.hasher, passwords)
+
+        chunks = [passwords[i:i + HASH_CHUNK_SIZE] for i in range(0, len(passwords), HASH_CHUNK_SIZE)]
+        tasks = [asyncio.ensure_future(self.pool.run_batch(hash_many, self.hasher, chunk, cost=len(chunk)))
+                 for chunk in chunks]
+        try:
+            hashed_chunks = await asyncio.gather(*tasks)
+        except BaseException:
+            # 503 на одной пачке: остальные уже не нужны и не должны занимать пул
+            for task in tasks:
+                task.cancel()
+            raise
+        return [hashed for chunk in hashed_chunks for hashed in chunk]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        hasher = self.__identify(hashed_password)
+        if hasher is None:
+            return False
+        if isinstance(hasher, Sha256PasswordHasher):
+            # Дешевая проверка, отправлять ее в пул процессов дороже самой проверки
+            return hasher.verify(plain_password, hashed_password)
+        return await self.__run(hasher.verify, plain_password, hashed_password)
+
+    async def verify_dummy(self, plain_password: str) -> None:
+        # Для неизвестного логина: ответ занимает столько же, сколько для известного,
+        # и по времени нельзя узнать, существует ли логин
+        await self.verify(plain_password, self._dummy_hash)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        hasher = self.__identify(hashed_password)
+        return hasher is not self.hasher or self.hasher.needs_rehash(hashed_password)
 
-    def hashed(self, password: str) -> str:
-        return hashlib.sha256(password.encode()).hexdigest()
+    def __identify(self, hashed_password: str) -> BasePasswordHasher | None:
+        for hasher in self.hashers:
+            if hasher.identify(hashed_password):
+                return hasher
+        return None
 
-    def verify(self, plain_password: str, hashed_password: str) -> bool:
-        return self.hashed(plain_password) == hashed_password
+    async def __run(self, fn: Callable, *args) -> Any:
+        if self.pool is None:
+            return fn(*args)
+        return await self.pool.run(fn, *args)
 
 
-def get_password_service() -> PasswordService:
-    return PasswordService()
+def get_password_service(request: Request) -> PasswordService:
+    return request.app.state.password_service
@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from typing import Sequence, Tuple
+
+from fastapi import Depends
+from jwt import InvalidTokenError
+
+from app.schemas.schemas import Token
+from app.security.revoked_token_filter import RevokedTokenFilter, get_revoked_token_filter
+from app.services.base import BaseDBService
+from app.services.jwt_token_service import JWTTokenService, get_jwt_token_service
+from db.session_manager import SessionManager, get_session_manager
+
+
+class RefreshTokenService(BaseDBService):
+    """Выдача, ротация и отзыв refresh-токенов; jti каждого выданного токена хранится в refresh_tokens."""
+
+    def __init__(self,
+                 session_manager: SessionManager,
+                 jwt_token_service: JWTTokenService,
+                 revoked_token_filter: RevokedTokenFilter):
+        super().__init__(session_manager)
+        self.jwt_token_service = jwt_token_service
+        self.revoked_token_filter = revoked_token_filter
+
+
+    async def issue_tokens(self, user_id: int) -> Tuple[Token, Token]:
+        jti = self.jwt_token_service.new_jti()
+        access_token, refresh_token = self.jwt_token_service.generate_tokens(user_id, refresh_jti=jti)
+
+        async with self.session_manager.start_with_commit() as session_manager:
+            await session_manager.refresh_tokens.add(jti, user_id, refresh_token.expired_at)
+
+        return access_token, refresh_token
+
+
+    async def rotate(self, refresh_token: str) -> Tuple[Token, Token]:
+        # Refresh-токен одноразовый: взамен выдается новая пара, старый отзывается
+        payload = self.__verify(refresh_token)
+        jti, user_id = payload["jti"], payload["user_id"]
+
+        if self.revoked_token_filter.might_be_revoked(jti) and await self.find_revoked([jti]):
+            await self.__revoke_after_reuse(jti, user_id)
+
+        new_jti = self.jwt_token_service.new_jti()
+        access_token, new_refresh_token = self.jwt_token_service.generate_tokens(user_id, refresh_jti=new_jti)
+
+        async with self.session_manager.start_with_commit() as session_manager:
+            rotated_user_id = await session_manager.refresh_tokens.rotate(
+                jti, user_id, datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+                new_jti, new_refresh_token.expired_at,
+            )
+
+        if rotated_user_id is None:
+            # Токен отозван параллельно или истек
+            await self.__revoke_after_reuse(jti, user_id)
+
+        self.revoked_token_filter.add(jti)
+        return access_token, new_refresh_token
+
+
+    async def revoke(self, refresh_token: str, all_sessions: bool = False) -> None:
+        payload = self.__verify(refresh_token)
+
+        async with self.session_manager.start_with_commit() as session_manager:
+            if all_sessions:
+                await session_manager.refresh_tokens.revoke_all_for_user(payload["user_id"])
+            else:
+                await session_manager.refresh_tokens.revoke(payload["jti"])
+
+        self.revoked_token_filter.add(payload["jti"])
+
+
+    async def find_revoked(self, jtis: Sequence[str]) -> set[str]:
+        # Фильтр отсеивает заведомо неотозванные jti, остальные проверяются одним запросом
+        candidates = [jti for jti in jtis if self.revoked_token_filter.might_be_revoked(jti)]
+        if not candidates:
+            return set()
+
+        async with self.session_manager.start_without_commit() as session_manager:
+            return await session_manager.refresh_tokens.find_revoked_jtis(candidates)
+
+
+    def __verify(self, refresh_token: str) -> dict:
+        payload = self.jwt_token_service.verify_token(refresh_token, "refresh")
+        if not payload or "jti" not in payload:
+            raise InvalidTokenError("Invalid refresh token")
+        return payload
+
+
+    async def __revoke_after_reuse(self, jti: str, user_id: int) -> None:
+        # Повторное предъявление отозванного токена - признак утечки: отзываем все сессии пользователя
+        async with self.session_manager.start_with_commit() as session_manager:
+            if await session_manager.refresh_tokens.find_revoked_jtis([jti]):
+                await session_manager.refresh_tokens.revoke_all_for_user(user_id)
+        raise InvalidTokenError("Refresh token has been revoked")
+
+
+def get_refresh_token_service(
+        session_manager: SessionManager = Depends(get_session_manager, use_cache=True),
+        jwt_token_service: JWTTokenService = Depends(get_jwt_token_service, use_cache=True),
+        revoked_token_filter: RevokedTokenFilter = Depends(get_revoked_token_filter, use_cache=True),
+    ) -> RefreshTokenService:
+
+    return RefreshTokenService(session_manager, jwt_token_service, revoked_token_filter)
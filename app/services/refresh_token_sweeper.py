@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from aiologger import Logger
+
+from app.security.revoked_token_filter import RevokedTokenFilter
+from app.utils.failure_log import FailureLog
+from db.session_manager import SessionManager
+
+
+class RefreshTokenSweeper:
+    """Фоновая задача воркера: досинхронизирует фильтр отозванных токенов и пачками удаляет истекшие."""
+
+    def __init__(self, session_manager: SessionManager, revoked_token_filter: RevokedTokenFilter,
+                 sync_interval: float, sweep_interval: float, batch_size: int, logger: Logger | None = None):
+        self.session_manager = session_manager
+        self.revoked_token_filter = revoked_token_filter
+        self.sync_interval = sync_interval
+        self.sweep_interval = sweep_interval
+        self.batch_size = batch_size
+        self._failures = FailureLog(logger, "Refresh token sweeper")
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def purge_expired(self) -> int:
+        # Короткая транзакция на пачку: удаление не блокирует таблицу надолго
+        deleted = 0
+        while True:
+            async with self.session_manager.start_with_commit() as session_manager:
+                batch_deleted = await session_manager.refresh_tokens.delete_expired(self.batch_size)
+            deleted += batch_deleted
+            if batch_deleted < self.batch_size:
+                return deleted
+            await asyncio.sleep(0)
+
+    async def _run_forever(self) -> None:
+        next_sweep_at = time.monotonic()
+        while True:
+            try:
+                await self.revoked_token_filter.sync(self.session_manager)
+                if time.monotonic() >= next_sweep_at:
+                    next_sweep_at = time.monotonic() + self.sweep_interval
+                    await self.purge_expired()
+                self._failures.succeeded("sync")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # БД недоступна: фильтр остается прежним, попробуем на следующем шаге
+                self._failures.failed("sync", e)
+            await asyncio.sleep(self.sync_interval)
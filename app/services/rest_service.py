@@ -1,16 +1,38 @@
-from fastapi import Depends, HTTPException, status
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator
 
-from app.models.models import User
-from app.schemas.requests.auth_requests import TokensRequest
-from app.schemas.requests.user_requests import CreateUserRequest, PutUserRequest
-from app.schemas.responses.token_responses import TokensResponse
-from app.schemas.responses.user_responses import CreateUserResponse, UserResponseEntity
-from app.schemas.schemas import Token
+from fastapi import Depends, HTTPException, status
+from jwt import InvalidTokenError
+from sqlalchemy.exc import IntegrityError
+
+from app.schemas.requests.auth_requests import TokensRequest, IntrospectTokenRequest, RevokeTokensRequest, \
+    VerifyTokensBatchRequest
+from app.schemas.requests.user_requests import CreateUserRequest, PutUserRequest, BulkCreateUsersRequest
+from app.schemas.responses.token_responses import TokensResponse, IntrospectTokenResponse, RefreshTokensResponse, \
+    VerifiedTokenItem, VerifyTokensBatchResponse
+from app.schemas.responses.user_responses import CreateUserResponse, BulkCreateUsersResponse, \
+    BulkCreateUserItem
+from app.schemas.serializers import user_serializer
 from app.services.base import BaseDBService
 from app.services.jwt_token_service import JWTTokenService, get_jwt_token_service
 from app.services.password_service import get_password_service, PasswordService
+from app.services.refresh_token_service import RefreshTokenService, get_refresh_token_service
+from app.services.user_response_cache import UserResponseCache, get_user_response_cache
+from app.utils.etag import version_etag, aggregate_etag, etag_matches
+from app.utils.single_flight import SingleFlight, get_single_flight
 from db.session_manager import SessionManager, get_session_manager
-from settings.settings import Settings, load_settings
+from settings.settings import Settings, get_settings
+
+STREAM_BATCH_SIZE = 500
+
+
+@dataclass
+class JSONBody:
+    # body=None: представление не изменилось с присланного If-None-Match
+    body: bytes | None
+    etag: str
+    next_cursor: int | None = None
 
 
 class UserRestService(BaseDBService):
@@ -18,131 +40,267 @@ class UserRestService(BaseDBService):
                  password_service: PasswordService,
                  session_manager: SessionManager,
                  jwt_token_service: JWTTokenService,
-                 settings: Settings):
+                 settings: Settings,
+                 refresh_token_service: RefreshTokenService,
+                 user_response_cache: UserResponseCache,
+                 single_flight: SingleFlight):
         super().__init__(session_manager)
         self.jwt_token_service = jwt_token_service
         self.password_service = password_service
         self.settings = settings
+        self.refresh_token_service = refresh_token_service
+        self.user_response_cache = user_response_cache
+        self.single_flight = single_flight
 
     async def create_user(self, request: CreateUserRequest) -> CreateUserResponse:
+        hashed_password = await self.password_service.hashed(request.password)
+
+        user_kwargs = request.model_dump(exclude={"password"})
+        user_kwargs["hashed_password"] = hashed_password
+
         async with self.session_manager.start_with_commit() as session_manager:
-            hashed_password = self.password_service.hashed(request.password)
-            await self.__check_user_or_raise(request.login, hashed_password, session_manager)
+            user_id = await session_manager.users.insert_skip_existing(user_kwargs)
 
-            new_user = self.__create_user_obj(request, hashed_password)
-            saved_user: User = await session_manager.users.save(new_user)
+            if user_id is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail="User already exists")
 
-            resp_kwargs = request.model_dump()
-            resp_kwargs["id"] = saved_user.id
-            resp_kwargs.pop("password")
+        resp_kwargs = request.model_dump(exclude={"password"})
+        resp_kwargs["id"] = user_id
+        resp_kwargs["access_token"], resp_kwargs["refresh_token"] = \
+            await self.refresh_token_service.issue_tokens(user_id)
 
-            resp_kwargs["access_token"], resp_kwargs["refresh_token"] = self.jwt_token_service.generate_tokens(saved_user.id)
+        return CreateUserResponse(**resp_kwargs)
 
-            return CreateUserResponse(**resp_kwargs)
 
+    async def create_users_bulk(self, request: BulkCreateUsersRequest) -> BulkCreateUsersResponse:
+        # Повторы логина внутри пачки пропускаются так же, как уже существующие логины
+        logins = set()
+        unique_requests = []
+        for user_request in request.users:
+            if user_request.login not in logins:
+                logins.add(user_request.login)
+                unique_requests.append(user_request)
 
-    async def put_user(self, request: PutUserRequest, user_id: int) -> UserResponseEntity:
-        async with self.session_manager.start_with_commit() as session_manager:
-            source_user = await session_manager.users.find_by_id(user_id)
+        hashed_passwords = await self.password_service.hashed_many([r.password for r in unique_requests])
 
-            if source_user is None:
-                raise HTTPException(status_code=404, detail="User not found")
+        rows = []
+        for user_request, hashed_password in zip(unique_requests, hashed_passwords):
+            row = user_request.model_dump(exclude={"password"})
+            row["hashed_password"] = hashed_password
+            rows.append(row)
 
-            request_items = request.model_dump().items()
+        async with self.session_manager.start_with_commit() as session_manager:
+            inserted = await session_manager.users.insert_many_skip_existing(
+                rows, copy_threshold=self.settings.BULK_INSERT_COPY_THRESHOLD
+            )
 
-            if len(request_items) == 0:
-                raise HTTPException(status_code=400, detail="empty request body")
+        created_ids = {login: id for id, login in inserted}
+        items = []
+        for user_request in request.users:
+            user_id = created_ids.pop(user_request.login, None)
+            items.append(BulkCreateUserItem(login=user_request.login, created=user_id is not None, id=user_id))
 
-            for attr, req_value in request_items:
-                if req_value:
-                    setattr(source_user, attr, req_value)
+        created = len(inserted)
+        return BulkCreateUsersResponse(created=created, skipped=len(items) - created, items=items)
 
-            saved_user = await session_manager.users.save(source_user)
 
-            return UserResponseEntity.of_user(saved_user)
+    async def put_user(self, request: PutUserRequest, user_id: int) -> JSONBody:
+        values = request.model_dump(exclude_none=True)
 
+        if len(values) == 0:
+            raise HTTPException(status_code=400, detail="empty request body")
 
-    async def find_user_by_id(self, user_id: int) -> UserResponseEntity:
-        async with self.session_manager.start_without_commit() as session_manager:
-            user = await session_manager.users.find_by_id(user_id)
+        async with self.session_manager.start_with_commit() as session_manager:
+            try:
+                user = await session_manager.users.update_by_id(user_id, values)
+            except IntegrityError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail="User already exists") from e
 
             if user is None:
                 raise HTTPException(status_code=404, detail="User not found")
 
-            return UserResponseEntity.of_user(user)
+        # Свой кэш сбрасываем сразу, не дожидаясь NOTIFY, которое получат все воркеры
+        self.user_response_cache.invalidate(str(user_id))
+        return JSONBody(user_serializer.dumps(user), version_etag(user.id, user.version))
 
 
-    async def __check_user_or_raise(self, login, hashed_password, session_manager):
-        user = await session_manager.users.find_by_login_and_password(
-            login, hashed_password
-        )
+    async def find_user_by_id(self, user_id: int, if_none_match: str | None = None) -> JSONBody:
+        cached = self.user_response_cache.get(user_id)
+        if cached is not None:
+            version, body = cached
+            etag = version_etag(user_id, version)
+            return JSONBody(None if etag_matches(if_none_match, etag) else body, etag)
 
-        if user is not None:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="User already exists")
+        generation = self.user_response_cache.begin_read()
+        if if_none_match:
+            async with self.session_manager.start_without_commit() as session_manager:
+                # Клиенту с актуальной версией хватает чтения одного столбца
+                version = await session_manager.users.find_version(user_id)
+            if version is not None and etag_matches(if_none_match, version_etag(user_id, version)):
+                return JSONBody(None, version_etag(user_id, version))
 
+        # Одновременные промахи по одному id делят один запрос; поколение в ключе не дает
+        # присоединиться к чтению, начатому до записи этого воркера
+        from_primary = self.session_manager.reads_from_primary()
+        key = (user_id, generation, from_primary)
+        loaded = await self.single_flight.do("users", key, lambda: self.__load_user(user_id))
+        if loaded is None:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        version, body = loaded
+        self.user_response_cache.store(user_id, version, body, generation, from_replica=not from_primary)
+        return JSONBody(body, version_etag(user_id, version))
+
+
+    async def __load_user(self, user_id: int) -> tuple[int, bytes] | None:
+        async with self.session_manager.start_without_commit() as session_manager:
+            user = await session_manager.users.find_by_id(user_id)
+            if user is None:
+                return None
+            return user.version, user_serializer.dumps(user)
 
-    def __create_user_obj(self, request, hashed_password):
-        user_kwargs = request.model_dump()
-        del user_kwargs["password"]
-        user_kwargs["hashed_password"] = hashed_password
-        return User(**user_kwargs)
 
+    async def find_all_users(self, limit: int, after: int | None = None,
+                             if_none_match: str | None = None) -> JSONBody:
+        async with self.session_manager.start_without_commit() as session_manager:
+            # Лишняя строка показывает, есть ли следующая страница
+            if if_none_match:
+                versions = await session_manager.users.get_page_versions(limit + 1, after)
+                etag = aggregate_etag(versions, limit, after)
+                if etag_matches(if_none_match, etag):
+                    return JSONBody(None, etag, versions[limit - 1].id if len(versions) > limit else None)
+
+            users = await session_manager.users.get_page(limit + 1, after)
+
+            next_cursor = users[limit - 1].id if len(users) > limit else None
+            etag = aggregate_etag([(u.id, u.version) for u in users], limit, after)
+            return JSONBody(user_serializer.dumps_many(users[:limit]), etag, next_cursor)
 
-    async def find_all_users(self) -> list[UserResponseEntity]:
+
+    async def stream_all_users(self, after: int | None = None) -> AsyncIterator[bytes]:
         async with self.session_manager.start_without_commit() as session_manager:
-            users = await session_manager.users.get_all()
-            return [UserResponseEntity.of_user(u) for u in users]
+            async for user in session_manager.users.stream_all(STREAM_BATCH_SIZE, after):
+                yield user_serializer.dumps(user) + b"\n"
 
 
 
 def get_user_rest_service(
         session_manager: SessionManager = Depends(get_session_manager, use_cache=True),
         jwt_token_service: JWTTokenService = Depends(get_jwt_token_service, use_cache=True),
-        settings: Settings = Depends(load_settings, use_cache=True),
+        settings: Settings = Depends(get_settings, use_cache=True),
         password_service: PasswordService = Depends(get_password_service, use_cache=True),
+        refresh_token_service: RefreshTokenService = Depends(get_refresh_token_service, use_cache=True),
+        user_response_cache: UserResponseCache = Depends(get_user_response_cache, use_cache=True),
+        single_flight: SingleFlight = Depends(get_single_flight, use_cache=True),
     ) -> UserRestService:
 
-    return UserRestService(password_service, session_manager, jwt_token_service, settings)
+    return UserRestService(password_service, session_manager, jwt_token_service, settings, refresh_token_service,
+                           user_response_cache, single_flight)
 
 
 class TokensRestService(BaseDBService):
     def __init__(self,
                  session_manager: SessionManager,
                  jwt_token_service: JWTTokenService,
-                 password_service: PasswordService):
+                 password_service: PasswordService,
+                 refresh_token_service: RefreshTokenService):
         super().__init__(session_manager)
         self.jwt_token_service = jwt_token_service
         self.password_service = password_service
+        self.refresh_token_service = refresh_token_service
 
 
     async def get_tokens(self, request: TokensRequest) -> TokensResponse:
 
         async with self.session_manager.start_without_commit() as session_manager:
             users = await session_manager.users.find_by_login(request.login)
-            users = [u for u in users if self.password_service.verify(request.password, u.hashed_password)]
+            credentials = [(u.id, u.hashed_password) for u in users]
 
-            if len(users) == 0:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
-                                    detail="Invalid login or password")
+        if not credentials:
+            await self.password_service.verify_dummy(request.password)
 
-            user = users[0]
-            access_token, refresh_token = self.jwt_token_service.generate_tokens(user.id)
+        user_id, hashed_password = None, None
+        for candidate_id, candidate_hash in credentials:
+            if await self.password_service.verify(request.password, candidate_hash):
+                user_id, hashed_password = candidate_id, candidate_hash
+                break
 
-            return TokensResponse(
-                access_token=access_token,
-                refresh_token=refresh_token
-            )
+        if user_id is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                detail="Invalid login or password")
+
+        if self.password_service.needs_rehash(hashed_password):
+            # Пароль известен только в момент входа: переводим старый хэш на текущий алгоритм
+            new_hashed_password = await self.password_service.hashed(request.password)
+            async with self.session_manager.start_with_commit() as session_manager:
+                await session_manager.users.update_password_hash(user_id, hashed_password, new_hashed_password)
+
+        access_token, refresh_token = await self.refresh_token_service.issue_tokens(user_id)
+
+        return TokensResponse(
+            access_token=access_token,
+            refresh_token=refresh_token
+        )
+
+
+    async def refresh_tokens(self, refresh_token: str) -> RefreshTokensResponse:
+        access_token, new_refresh_token = await self.refresh_token_service.rotate(refresh_token)
+        return RefreshTokensResponse(**access_token.model_dump(), refresh_token=new_refresh_token)
+
+
+    async def revoke_tokens(self, request: RevokeTokensRequest) -> None:
+        await self.refresh_token_service.revoke(request.refresh_token, request.all_sessions)
+
+
+    async def introspect_token(self, request: IntrospectTokenRequest) -> IntrospectTokenResponse:
+        # token_type_hint только подсказка (RFC 7662, 2.1): токен другого типа тоже проверяется.
+        # Тип JWT записан в нем самом, поэтому перебирать типы по подсказке не нужно
+        try:
+            payload = self.jwt_token_service.verify_token(request.token, token_type=None)
+        except InvalidTokenError:
+            payload = None
+
+        if payload is not None and payload.get("type") == "refresh" \
+                and await self.refresh_token_service.find_revoked([payload.get("jti")]):
+            payload = None
+
+        if payload is None:
+            return IntrospectTokenResponse(active=False)
+
+        return IntrospectTokenResponse(
+            active=True,
+            token_type=payload.get("type"),
+            exp=datetime.fromtimestamp(payload["exp"], timezone.utc),
+            claims=payload,
+        )
+
+
+    async def verify_tokens_batch(self, request: VerifyTokensBatchRequest) -> VerifyTokensBatchResponse:
+        payloads = self.jwt_token_service.verify_tokens(request.tokens, request.token_type)
+
+        # Отзываются только refresh-токены: все они проверяются одним запросом jti = ANY(:jtis)
+        refresh_jtis = [p["jti"] for p in payloads if p is not None and p.get("type") == "refresh" and "jti" in p]
+        revoked_jtis = await self.refresh_token_service.find_revoked(list(dict.fromkeys(refresh_jtis)))
 
+        results = []
+        for payload in payloads:
+            if payload is None or (payload.get("type") == "refresh" and payload.get("jti") in revoked_jtis):
+                results.append(VerifiedTokenItem(valid=False))
+            else:
+                results.append(VerifiedTokenItem(valid=True,
+                                                 exp=datetime.fromtimestamp(payload["exp"], timezone.utc),
+                                                 claims=payload))
 
-    async def refresh_tokens(self, refresh_token: str) -> Token:
-        return self.jwt_token_service.refresh_access_token(refresh_token)
+        return VerifyTokensBatchResponse(results=results)
 
 
 def get_tokens_rest_service(
         session_manager: SessionManager = Depends(get_session_manager, use_cache=True),
         jwt_token_service: JWTTokenService = Depends(get_jwt_token_service, use_cache=True),
         password_service: PasswordService = Depends(get_password_service, use_cache=True),
+        refresh_token_service: RefreshTokenService = Depends(get_refresh_token_service, use_cache=True),
     ) -> TokensRestService:
 
-    return TokensRestService(session_manager, jwt_token_service, password_service)
\ No newline at end of file
+    return TokensRestService(session_manager, jwt_token_service, password_service, refresh_token_service)
\ No newline at end of file
@@ -0,0 +1,67 @@
+import time
+
+from starlette.requests import Request
+
+from app.utils.ttl_cache import TTLCache, MISSING
+from settings.settings import Settings
+
+USERS_CHANNEL = "users_changed"
+
+
+class UserResponseCache:
+    """Сериализованные ответы GET /users/{id}/ воркера; сбрасываются по NOTIFY при изменении строки."""
+
+    def __init__(self, max_size: int, ttl: float, replica_lag: float = 0):
+        self.cache = TTLCache(max_size, ttl)
+        # Счетчик инвалидаций: ответ, прочитанный до инвалидации, в кэш не попадает
+        self._generation = 0
+        # NOTIFY приходит с primary раньше, чем реплика применит изменение: ответ, прочитанный
+        # с реплики в течение replica_lag после инвалидации, может быть старым и в кэш не попадает
+        self.replica_lag = replica_lag
+        self._invalidated = TTLCache(max_size, replica_lag)
+        self._cleared_at = float("-inf")
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "UserResponseCache":
+        return cls(max_size=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS,
+                   replica_lag=settings.DB_READ_YOUR_WRITES_SECONDS)
+
+    def get(self, user_id: int) -> tuple[int, bytes] | None:
+        # (version, тело ответа)
+        return self.cache.get(user_id, None)
+
+    def begin_read(self) -> int:
+        return self._generation
+
+    def store(self, user_id: int, version: int, body: bytes, generation: int, from_replica: bool = False) -> None:
+        if generation != self._generation:
+            return
+        if from_replica and self._recently_invalidated(user_id):
+            return
+        self.cache.set(user_id, (version, body))
+
+    def invalidate(self, payload: str | None = None) -> None:
+        # payload - id измененного пользователя; пустой (TRUNCATE) или None (переподключение) - сбросить все
+        self._generation += 1
+        if not payload:
+            self.cache.clear()
+            self._cleared_at = time.monotonic()
+            return
+
+        user_id = int(payload)
+        self.cache.pop(user_id)
+        if len(self._invalidated) >= self._invalidated.max_size:
+            # Вытесненная отметка потерялась бы: считаем, что изменилось все
+            self._cleared_at = time.monotonic()
+        self._invalidated.set(user_id, True)
+
+    def _recently_invalidated(self, user_id: int) -> bool:
+        return (time.monotonic() - self._cleared_at < self.replica_lag
+                or self._invalidated.get(user_id, MISSING) is not MISSING)
+
+    def stats(self) -> dict[str, int]:
+        return self.cache.stats()
+
+
+def get_user_response_cache(request: Request) -> UserResponseCache:
+    return request.app.state.user_response_cache
@@ -0,0 +1,25 @@
+import hashlib
+from typing import Iterable
+
+
+def version_etag(id: int, version: int) -> str:
+    return f'"{id}.{version}"'
+
+
+def aggregate_etag(versions: Iterable[tuple[int, int]], *parts: object) -> str:
+    # Страница не изменилась, пока не изменился набор (id, version) и параметры запроса
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(f"{part};".encode())
+    for id, version in versions:
+        digest.update(f"{id}.{version},".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match сравнивается слабо (RFC 9110): W/ не учитывается
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
@@ -0,0 +1,27 @@
+from aiologger import Logger
+
+
+class FailureLog:
+    """Ошибки фоновых задач: в лог попадает смена состояния, а не каждая неудачная попытка.
+
+    Пока операция падает с ошибкой того же типа, повторно она не пишется;
+    восстановление пишется один раз.
+    """
+
+    def __init__(self, logger: Logger | None, component: str):
+        self.logger = logger
+        self.component = component
+        # Операция -> тип последней ошибки
+        self._failures: dict[str, str] = {}
+
+    def failed(self, operation: str, error: Exception) -> None:
+        kind = type(error).__name__
+        if self._failures.get(operation) == kind:
+            return
+        self._failures[operation] = kind
+        if self.logger is not None:
+            self.logger.error(f"{self.component}: {operation} failed: {error!r}", exc_info=error)
+
+    def succeeded(self, operation: str) -> None:
+        if self._failures.pop(operation, None) is not None and self.logger is not None:
+            self.logger.info(f"{self.component}: {operation} recovered")
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Сэмплирующий профайлер одной asyncio-задачи.
+
+    Отдельный поток раз в interval снимает стек потока event loop, но только когда
+    на нем выполняется профилируемая задача: другие запросы воркера в профиль не попадают
+    и не замедляются, в отличие от cProfile, который видит весь поток.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter[tuple[tuple[str, str, int], ...]] = Counter()
+        self.duration = 0.0
+        self._started_at = 0.0
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread_id: int | None = None
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._sampler = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._started_at = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._started_at
+
+    def collapsed(self) -> str:
+        # Формат flamegraph.pl / speedscope: "корень;...;лист число_сэмплов"
+        lines = [";".join(_frame_name(frame).replace(";", ":") for frame in stack) + f" {count}"
+                 for stack, count in self.samples.items()]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> str:
+        frames, frame_index, samples, weights = [], {}, [], []
+        for stack, count in self.samples.items():
+            sample = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                sample.append(frame_index[frame])
+            samples.append(sample)
+            weights.append(count * self.interval * 1000)
+
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "auth-service",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        })
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if asyncio.current_task(self._loop) is not self._task:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                # Строка начала функции, а не текущая: в flamegraph узел - функция
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+
+def _frame_name(frame: tuple[str, str, int]) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})"
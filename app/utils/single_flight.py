@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from starlette.requests import Request
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    """Объединяет одновременные одинаковые вызовы воркера: выполняется один, остальные ждут его результат.
+
+    Ошибка ведущего вызова получают все ожидающие. Если ведущий отменен (клиент ушел),
+    ожидающие не отменяются, а повторяют вызов сами. Результат разделяется между запросами,
+    поэтому он должен быть неизменяемым (bytes, bool, кортежи), а не ORM-объектом.
+    """
+
+    def __init__(self):
+        self._calls: dict[tuple[str, Hashable], asyncio.Future] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    async def do(self, namespace: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        stats = self._stats.setdefault(namespace, {"executed": 0, "coalesced": 0, "retried": 0})
+        call_key = (namespace, key)
+
+        while (future := self._calls.get(call_key)) is not None:
+            stats["coalesced"] += 1
+            try:
+                # shield: отмена ожидающего не должна отменять общий вызов
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                stats["retried"] += 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[call_key] = future
+        stats["executed"] += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[call_key]
+            # Ошибку уже получил ведущий: без ожидающих asyncio не должен ругаться, что ее никто не забрал
+            future.exception()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {namespace: dict(stats) for namespace, stats in self._stats.items()}
+
+
+def get_single_flight(request: Request) -> SingleFlight:
+    return request.app.state.single_flight
@@ -0,0 +1,19 @@
+import re
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+\b")
+_NUMBER = re.compile(r"(?<![\w$.?])\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\bVALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    # Значения заменяются на ?, списки IN и многострочные VALUES сворачиваются:
+    # одинаковые по форме запросы дают одну строку, а данные в лог не попадают
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("IN (?)", statement)
+    statement = _VALUES_ROWS.sub(r"\1, ...", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
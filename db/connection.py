@@ -1,18 +1,47 @@
-from fastapi import Depends
+from aiologger import Logger
 from sqlalchemy import NullPool
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+from starlette.requests import Request
 
-from settings.settings import Settings, load_settings
+from app.metrics import InstrumentedQueuePool, instrument_engine
+from db.replica_router import ReplicaRouter, Replica
+from settings.settings import Settings
 
 
-def create_session_factory(settings: Settings) -> async_sessionmaker[AsyncSession]:
+def create_engine(settings: Settings, use_pool: bool = True, url: str | None = None,
+                  name: str = "primary") -> AsyncEngine:
+    if use_pool:
+        pool_kwargs = dict(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        )
+    else:
+        # Без пула: для тестов и скриптов, которые живут вне lifespan приложения
+        pool_kwargs = dict(poolclass=NullPool)
+
+    url = url or settings.get_database_url()
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        # Таймаут по умолчанию без лишнего запроса: передается при подключении;
+        # методы репозиториев меняют его через SET LOCAL (BaseRepository._apply_statement_timeout)
+        connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
     engine = create_async_engine(
-        url=settings.get_database_url(),
+        url=url,
         echo=settings.DEBUG == True,  # Включает логирование SQL-запросов (для отладки)
         pool_pre_ping=True,  # Проверяет соединение перед использованием
-        poolclass=NullPool,  # Отключает пул соединений
+        connect_args=connect_args,
+        **pool_kwargs,
     )
+    # name - метка пула в метриках: primary или replica<N>
+    instrument_engine(engine, name)
+    return engine
 
+
+def create_session_maker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
     return async_sessionmaker(
         autocommit=False,
         autoflush=False,
@@ -21,6 +50,29 @@ def create_session_factory(settings: Settings) -> async_sessionmaker[AsyncSessio
     )
 
 
+def create_replica_router(settings: Settings, logger: Logger | None = None) -> ReplicaRouter | None:
+    urls = settings.get_replica_database_urls()
+    if not urls:
+        return None
+
+    replicas = []
+    for i, url in enumerate(urls):
+        engine = create_engine(settings, url=url, name=f"replica{i}")
+        replicas.append(Replica(engine, create_session_maker(engine)))
+
+    return ReplicaRouter(
+        replicas,
+        strategy=settings.DB_REPLICA_STRATEGY,
+        read_your_writes_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+        health_check_interval=settings.DB_REPLICA_HEALTH_CHECK_SECONDS,
+        logger=logger,
+    )
+
+
+def create_session_factory(settings: Settings) -> async_sessionmaker[AsyncSession]:
+    return create_session_maker(create_engine(settings, use_pool=False))
+
 
-def get_session_factory(settings: Settings = Depends(load_settings, use_cache=True)) -> async_sessionmaker[AsyncSession]:
-    return create_session_factory(settings)
\ No newline at end of file
+def get_session_factory(request: Request) -> async_sessionmaker[AsyncSession]:
+    # Фабрика создается один раз на процесс в lifespan (см. app.main)
+    return request.app.state.session_factory
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Callable
+
+from aiologger import Logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.failure_log import FailureLog
+
+# Callback получает payload уведомления или None, если изменения могли быть пропущены
+NotificationCallback = Callable[[str | None], None]
+
+
+class PgNotificationListener:
+    """Доставляет Postgres NOTIFY подписчикам воркера.
+
+    Пока LISTEN-соединение недоступно, изменения отслеживаются опросом
+    fingerprint-запросов каналов.
+    """
+
+    def __init__(self, engine: AsyncEngine, poll_interval: float, logger: Logger | None = None):
+        self._engine = engine
+        self._poll_interval = poll_interval
+        self._callbacks: dict[str, list[NotificationCallback]] = {}
+        self._poll_queries: dict[str, str] = {}
+        self._fingerprints: dict[str, object] = {}
+        self._task: asyncio.Task | None = None
+        self._listen_supported = True
+        self._failures = FailureLog(logger, "Notification listener")
+        self.connected = False
+
+    def subscribe(self, channel: str, callback: NotificationCallback, poll_query: str | None = None) -> None:
+        self._callbacks.setdefault(channel, []).append(callback)
+        if poll_query is not None:
+            self._poll_queries[channel] = poll_query
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._engine.dispose()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._listen_supported:
+                    await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Кэши воркера до переподключения устаревают только по TTL или опросу
+                self._failures.failed("LISTEN", e)
+            self.connected = False
+
+            try:
+                await self._poll()
+                self._failures.succeeded("poll")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures.failed("poll", e)
+            await asyncio.sleep(self._poll_interval)
+
+    async def _listen(self) -> None:
+        async with self._engine.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            if not hasattr(driver_connection, "add_listener"):
+                # LISTEN поддерживается только драйвером asyncpg, остаемся на опросе
+                self._listen_supported = False
+                return
+
+            closed = asyncio.Event()
+            driver_connection.add_termination_listener(lambda _: closed.set())
+            for channel in self._callbacks:
+                await driver_connection.add_listener(channel, self._on_notification)
+
+            self.connected = True
+            self._failures.succeeded("LISTEN")
+            # Пока соединения не было, уведомления могли быть потеряны
+            self._notify_all(None)
+
+            while not closed.is_set():
+                try:
+                    await asyncio.wait_for(closed.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    await driver_connection.execute("SELECT 1")
+
+    async def _poll(self) -> None:
+        if not self._poll_queries:
+            return
+
+        async with self._engine.connect() as conn:
+            for channel, query in self._poll_queries.items():
+                fingerprint = (await conn.execute(text(query))).scalar()
+                if self._fingerprints.get(channel) != fingerprint:
+                    self._fingerprints[channel] = fingerprint
+                    self._notify(channel, None)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        self._notify(channel, payload)
+
+    def _notify_all(self, payload: str | None) -> None:
+        for channel in self._callbacks:
+            self._notify(channel, payload)
+
+    def _notify(self, channel: str, payload: str | None) -> None:
+        for callback in self._callbacks.get(channel, []):
+            callback(payload)
@@ -0,0 +1,149 @@
+import asyncio
+import itertools
+import time
+from contextvars import ContextVar, Token
+
+from aiologger import Logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, AsyncSession
+from starlette.requests import Request
+
+from app.utils.failure_log import FailureLog
+
+ROUND_ROBIN = "round_robin"
+LEAST_CONNECTIONS = "least_connections"
+# Время последней записи клиента (unix-время в секундах): приходит в запросе, возвращается после записи
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+class WriteMarker:
+    """Метка read-your-writes одного HTTP-запроса.
+
+    Окно хранит не воркер, а клиент: после записи ответ несет X-Last-Write, и клиент,
+    передав его в следующем запросе, читает с primary на любом воркере. Другие клиенты
+    с тем же API-ключом на primary не переводятся. Клиент без заголовка видит
+    свою запись на реплике только после ее репликации.
+    """
+
+    __slots__ = ("last_write_at", "wrote")
+
+    def __init__(self, last_write_at: float | None = None):
+        self.last_write_at = last_write_at
+        self.wrote = False
+
+    def is_recent(self, window: float) -> bool:
+        # Будущее время допускается в пределах окна: часы хостов могут расходиться
+        if self.last_write_at is None:
+            return False
+        now = time.time()
+        return now - window < self.last_write_at <= now + window
+
+
+_write_marker: ContextVar[WriteMarker | None] = ContextVar("write_marker", default=None)
+
+
+def start_write_marker(header: str | None) -> tuple[WriteMarker, Token]:
+    try:
+        last_write_at = float(header) if header else None
+    except ValueError:
+        last_write_at = None
+    write_marker = WriteMarker(last_write_at)
+    return write_marker, _write_marker.set(write_marker)
+
+
+def finish_write_marker(token: Token) -> None:
+    _write_marker.reset(token)
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine, session_factory: async_sessionmaker[AsyncSession]):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.healthy = True
+
+    def checked_out(self) -> int:
+        return self.engine.pool.checkedout()
+
+
+class ReplicaRouter:
+    """Выбирает реплику для чтения; None означает, что читать нужно с primary."""
+
+    def __init__(self, replicas: list[Replica], strategy: str,
+                 read_your_writes_seconds: float, health_check_interval: float, logger: Logger | None = None):
+        if strategy not in (ROUND_ROBIN, LEAST_CONNECTIONS):
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+
+        self.replicas = replicas
+        self.strategy = strategy
+        self.health_check_interval = health_check_interval
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._counter = itertools.count()
+        self._failures = FailureLog(logger, "Replica health check")
+        self._task: asyncio.Task | None = None
+
+    def pins_primary(self) -> bool:
+        # Клиент недавно писал (X-Last-Write в запросе или запись в этом запросе): читаем с primary
+        write_marker = _write_marker.get()
+        return write_marker is not None and write_marker.is_recent(self.read_your_writes_seconds)
+
+    def choose(self) -> async_sessionmaker[AsyncSession] | None:
+        if self.pins_primary():
+            return None
+
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+
+        if self.strategy == LEAST_CONNECTIONS:
+            replica = min(healthy, key=lambda r: r.checked_out())
+        else:
+            replica = healthy[next(self._counter) % len(healthy)]
+        return replica.session_factory
+
+    def mark_write(self) -> None:
+        write_marker = _write_marker.get()
+        if write_marker is not None:
+            write_marker.last_write_at = time.time()
+            write_marker.wrote = True
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._check_health_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def check_health(self) -> None:
+        await asyncio.gather(*(self._check_replica(r) for r in self.replicas))
+
+    async def _check_health_forever(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_check_interval)
+
+    async def _check_replica(self, replica: Replica) -> None:
+        try:
+            await asyncio.wait_for(self._ping(replica), timeout=self.health_check_interval)
+            replica.healthy = True
+            self._failures.succeeded(str(replica.engine.url))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            replica.healthy = False
+            self._failures.failed(str(replica.engine.url), e)
+
+    async def _ping(self, replica: Replica) -> None:
+        async with replica.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+
+def get_replica_router(request: Request) -> ReplicaRouter | None:
+    return request.app.state.replica_router
@@ -1,4 +1,5 @@
 from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
 from typing import Any, AsyncGenerator
 
 from fastapi import Depends
@@ -6,53 +7,148 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
 from app.repositories.primary_token_repository import PrimaryTokenRepository
+from app.repositories.refresh_token_repository import RefreshTokenRepository
 from app.repositories.user_repository import UserRepository
 from db.connection import get_session_factory
+from db.replica_router import ReplicaRouter, get_replica_router
+
+
+class UnitOfWork:
+    # Сессии создаются лениво, при первом обращении репозитория
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+        self.session: AsyncSession | None = None
+        self.read_session: AsyncSession | None = None
+
+    def get_session(self) -> AsyncSession:
+        if self.session is None:
+            self.session = self.session_factory()
+        return self.session
+
+    def get_read_session(self, replica_router: ReplicaRouter | None) -> AsyncSession:
+        # После обращения к primary в этом запросе читаем оттуда же, чтобы видеть свои изменения
+        if self.session is not None or replica_router is None:
+            return self.get_session()
+
+        if self.read_session is None:
+            replica_session_factory = replica_router.choose()
+            if replica_session_factory is None:
+                return self.get_session()
+            self.read_session = replica_session_factory()
+        return self.read_session
+
+    async def commit(self) -> None:
+        if self.session is not None:
+            await self.session.commit()
+
+    async def rollback(self) -> None:
+        for session in (self.session, self.read_session):
+            if session is not None:
+                await session.rollback()
+
+    async def close(self) -> None:
+        for session in (self.session, self.read_session):
+            if session is not None:
+                await session.close()
+        self.session = None
+        self.read_session = None
+
+
+# Текущая единица работы задачи (запроса); у каждой asyncio-задачи своя копия контекста
+_current_unit_of_work: ContextVar[UnitOfWork | None] = ContextVar("current_unit_of_work", default=None)
+# True внутри start_without_commit, False внутри start_with_commit: только чтение можно отправить на реплику
+_read_only: ContextVar[bool | None] = ContextVar("read_only", default=None)
 
 
 class SessionManager:
-    def __init__(self, session_factory: async_sessionmaker):
+    def __init__(self, session_factory: async_sessionmaker, replica_router: ReplicaRouter | None = None):
         self._session_factory = session_factory
-        self._session = None
+        self._replica_router = replica_router
 
-    def get_session(self) -> AsyncSession:
-        return self._session
+    def get_session(self) -> AsyncSession | None:
+        unit_of_work = self._get_unit_of_work()
+        if unit_of_work is None:
+            return None
+        if _read_only.get():
+            return unit_of_work.get_read_session(self._replica_router)
+        return unit_of_work.get_session()
+
+    def reads_from_primary(self) -> bool:
+        # Куда пойдет следующее чтение вне уже открытой единицы работы
+        return self._replica_router is None or self._replica_router.pins_primary()
 
     def get_session_factory(self) -> async_sessionmaker[AsyncSession]:
         return self._session_factory
 
 
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncGenerator["SessionManager", Any]:
+        # Вложенные блоки присоединяются к уже открытой единице работы
+        if self._get_unit_of_work() is not None:
+            yield self
+            return
+
+        unit_of_work = UnitOfWork(self._session_factory)
+        token = _current_unit_of_work.set(unit_of_work)
+        try:
+            yield self
+        except BaseException:
+            await unit_of_work.rollback()
+            raise
+        finally:
+            await unit_of_work.close()
+            _current_unit_of_work.reset(token)
+
     @asynccontextmanager
     async def start_with_commit(self) -> AsyncGenerator["SessionManager", Any]:
-        async with self._session_factory() as session:
+        async with self.unit_of_work():
+            unit_of_work = self._get_unit_of_work()
+            read_only_token = _read_only.set(False)
             try:
-                self._session = session
                 yield self
-                await self._session.commit()
-            except Exception as e:
-                await self._session.rollback()
+                await unit_of_work.commit()
+                if self._replica_router is not None:
+                    self._replica_router.mark_write()
+            except BaseException as e:
+                await unit_of_work.rollback()
                 raise e
             finally:
-                await self._session.close()
-                self._session = None
+                _read_only.reset(read_only_token)
 
     @asynccontextmanager
     async def start_without_commit(self) -> AsyncGenerator["SessionManager", Any]:
-        async with self._session_factory() as session:
-            self._session = session
-            yield self
-            await self._session.close()
-            self._session = None
+        async with self.unit_of_work():
+            # Чтение внутри транзакции на запись остается на primary
+            read_only_token = _read_only.set(_read_only.get() is not False)
+            try:
+                yield self
+            finally:
+                _read_only.reset(read_only_token)
 
 
     @property
     def users(self) -> UserRepository:
-        return UserRepository(self._session)
+        return UserRepository(self.get_session())
 
     @property
     def primary_tokens(self) -> PrimaryTokenRepository:
-        return PrimaryTokenRepository(self._session)
+        return PrimaryTokenRepository(self.get_session())
+
+    @property
+    def refresh_tokens(self) -> RefreshTokenRepository:
+        return RefreshTokenRepository(self.get_session())
+
+    def _get_unit_of_work(self) -> UnitOfWork | None:
+        unit_of_work = _current_unit_of_work.get()
+        if unit_of_work is None or unit_of_work.session_factory is not self._session_factory:
+            return None
+        return unit_of_work
 
 
-def get_session_manager(session_factory: async_sessionmaker = Depends(get_session_factory, use_cache=True)) -> SessionManager:
-    return SessionManager(session_factory)
\ No newline at end of file
+async def get_session_manager(session_factory: async_sessionmaker = Depends(get_session_factory, use_cache=True),
+                              replica_router: ReplicaRouter | None = Depends(get_replica_router, use_cache=True)
+                              ) -> AsyncGenerator[SessionManager, Any]:
+    # Одна сессия на запрос: ее разделяют проверка API-ключа и сервис
+    session_manager = SessionManager(session_factory, replica_router)
+    async with session_manager.unit_of_work():
+        yield session_manager
@@ -0,0 +1,36 @@
+"""widen hashed password
+
+Revision ID: 236a0610fb3d
+Revises: 8af1cec00cb4
+Create Date: 2026-10-18 18:12:40.523117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '236a0610fb3d'
+down_revision: Union[str, Sequence[str], None] = '8af1cec00cb4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index(op.f('ix_users_hashed_password'), table_name='users')
+    op.alter_column('users', 'hashed_password',
+                    existing_type=sa.String(length=100),
+                    type_=sa.String(length=255),
+                    existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('users', 'hashed_password',
+                    existing_type=sa.String(length=255),
+                    type_=sa.String(length=100),
+                    existing_nullable=False)
+    op.create_index(op.f('ix_users_hashed_password'), 'users', ['hashed_password'], unique=False)
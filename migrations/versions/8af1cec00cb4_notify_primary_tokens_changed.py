@@ -0,0 +1,46 @@
+"""notify primary tokens changed
+
+Revision ID: 8af1cec00cb4
+Revises: 48887086754d
+Create Date: 2026-10-18 17:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8af1cec00cb4'
+down_revision: Union[str, Sequence[str], None] = '48887086754d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_primary_tokens_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('primary_tokens_changed', TG_OP);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER primary_tokens_changed
+        AFTER INSERT OR UPDATE OR DELETE ON primary_tokens
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_primary_tokens_changed()
+    """)
+    op.execute("""
+        CREATE TRIGGER primary_tokens_truncated
+        AFTER TRUNCATE ON primary_tokens
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_primary_tokens_changed()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS primary_tokens_truncated ON primary_tokens")
+    op.execute("DROP TRIGGER IF EXISTS primary_tokens_changed ON primary_tokens")
+    op.execute("DROP FUNCTION IF EXISTS notify_primary_tokens_changed()")
@@ -0,0 +1,51 @@
+"""notify users changed
+
+Revision ID: fd533b882526
+Revises: ac30c9f5b79c
+Create Date: 2026-10-18 16:59:23.271282
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fd533b882526'
+down_revision: Union[str, Sequence[str], None] = 'ac30c9f5b79c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # id измененного или удаленного пользователя; TRUNCATE - пустой payload (сбросить все)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_users_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('users_changed', '');
+            ELSE
+                PERFORM pg_notify('users_changed', OLD.id::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER users_changed
+        AFTER UPDATE OR DELETE ON users
+        FOR EACH ROW EXECUTE FUNCTION notify_users_changed()
+    """)
+    op.execute("""
+        CREATE TRIGGER users_truncated
+        AFTER TRUNCATE ON users
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_users_changed()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS users_truncated ON users")
+    op.execute("DROP TRIGGER IF EXISTS users_changed ON users")
+    op.execute("DROP FUNCTION IF EXISTS notify_users_changed()")
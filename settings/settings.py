@@ -1,4 +1,5 @@
 import os
+import threading
 from functools import lru_cache
 from typing import Optional
 
@@ -20,19 +21,92 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     BASE_URL: str = ""
 
+    DB_POOL_SIZE: int = Field(default=10)
+    DB_POOL_MAX_OVERFLOW: int = Field(default=10)
+    DB_POOL_RECYCLE_SECONDS: int = Field(default=1800)
+    DB_POOL_TIMEOUT_SECONDS: float = Field(default=30)
+    DB_NOTIFY_POLL_INTERVAL_SECONDS: float = Field(default=5)
+    # statement_timeout соединений (0 - без ограничения) и переопределения для методов
+    # репозиториев: Repository.method=мс через запятую
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=10000)
+    DB_STATEMENT_TIMEOUTS: str = Field(default="UserRepository.insert_many_skip_existing=60000,"
+                                               "RefreshTokenRepository.delete_expired=30000")
+    # Запросы дольше порога пишутся в logs/slow_queries.log; 0 - не писать
+    DB_SLOW_QUERY_THRESHOLD_MS: float = Field(default=100)
+
+    # Реплики для чтения через запятую: host:port,host:port
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_STRATEGY: str = Field(default="round_robin")
+    DB_REPLICA_HEALTH_CHECK_SECONDS: float = Field(default=5)
+    DB_READ_YOUR_WRITES_SECONDS: float = Field(default=5)
+
+    PASSWORD_HASHER: str = Field(default="scrypt")
+    PASSWORD_SCRYPT_LN: int = Field(default=14)
+    PASSWORD_SCRYPT_R: int = Field(default=8)
+    PASSWORD_SCRYPT_P: int = Field(default=1)
+    PASSWORD_HASH_WORKERS: int = Field(default=2)
+    PASSWORD_HASH_MAX_PENDING: int = Field(default=64)
+
+    BULK_INSERT_COPY_THRESHOLD: int = Field(default=500)
+
+    PRIMARY_TOKEN_CACHE_SIZE: int = Field(default=1024)
+    PRIMARY_TOKEN_CACHE_TTL_SECONDS: float = Field(default=60)
+    PRIMARY_TOKEN_NEGATIVE_CACHE_SIZE: int = Field(default=10000)
+    PRIMARY_TOKEN_NEGATIVE_CACHE_TTL_SECONDS: float = Field(default=5)
+    VERIFIED_TOKEN_CACHE_SIZE: int = Field(default=10000)
+    USER_CACHE_SIZE: int = Field(default=10000)
+    USER_CACHE_TTL_SECONDS: float = Field(default=60)
+    # Как часто статистика кэшей воркера переносится в /metrics
+    METRICS_CACHE_PUBLISH_SECONDS: float = Field(default=15)
+
+    # Допуск запросов на воркер: отдельные пулы для /tokens/ и /users/, очередь с крайним сроком;
+    # ADMISSION_ADAPTIVE подбирает лимит в [MIN, MAX] по задержке (AIMD); цель задержки у каждого пула
+    # своя: логин всегда платит за scrypt, откалиброванный примерно на 100 мс
+    ADMISSION_TOKENS_LIMIT: int = Field(default=32)
+    ADMISSION_USERS_LIMIT: int = Field(default=64)
+    ADMISSION_QUEUE_SIZE: int = Field(default=128)
+    ADMISSION_QUEUE_TIMEOUT_MS: float = Field(default=500)
+    ADMISSION_ADAPTIVE: bool = Field(default=False)
+    ADMISSION_MIN_LIMIT: int = Field(default=4)
+    ADMISSION_MAX_LIMIT: int = Field(default=256)
+    ADMISSION_TOKENS_LATENCY_TARGET_MS: float = Field(default=500)
+    ADMISSION_USERS_LATENCY_TARGET_MS: float = Field(default=100)
+
+    # Профилирование запроса по заголовкам X-Profile и X-Admin-Key; пустой ключ - выключено
+    PROFILING_ADMIN_KEY: str = ""
+    PROFILING_DIR: str = "logs/profiles"
+    PROFILING_MAX_PER_MINUTE: int = Field(default=6)
+    PROFILING_SAMPLE_INTERVAL_MS: float = Field(default=1)
+    PROFILING_RETENTION_MINUTES: float = Field(default=1440)
+    PROFILING_MAX_FILES: int = Field(default=100)
+
     SECRET_KEY: str
     ALGORITHM: str = Field(default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=15)
     REFRESH_TOKEN_EXPIRE_HOURS: int = Field(default=7)
+    # Каталог с keys.json и PEM-ключами (EdDSA/ES256/RS256); пусто - симметричная подпись SECRET_KEY
+    JWT_KEYS_DIR: str = ""
+    JWKS_MAX_AGE_SECONDS: int = Field(default=300)
+
+    REFRESH_TOKEN_FILTER_CAPACITY: int = Field(default=100000)
+    REFRESH_TOKEN_FILTER_ERROR_RATE: float = Field(default=0.001)
+    REFRESH_TOKEN_FILTER_SYNC_SECONDS: float = Field(default=5)
+    REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS: float = Field(default=300)
+    REFRESH_TOKEN_SWEEP_BATCH_SIZE: int = Field(default=1000)
 
     def get_database_url(self) -> str:
         return f"{self.DB_PREFIX}://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    def get_replica_database_urls(self) -> list[str]:
+        hosts = [h.strip() for h in self.DB_REPLICA_HOSTS.split(",") if h.strip()]
+        return [f"{self.DB_PREFIX}://{self.DB_USER}:{self.DB_PASSWORD}@{host}/{self.DB_NAME}" for host in hosts]
+
     def get_env_file_path(self) -> str:
         return self.e
 
     model_config = SettingsConfigDict(
         env_file_encoding = 'utf-8',
+        frozen=True,
     )
 
 
@@ -42,4 +116,32 @@ def load_settings() -> Settings:
     env_path = get_env_file_path(env=env)
     env_vars = dotenv_values(env_path)
     env_vars['ENV'] = env
-    return Settings(_env_file=env_path, **env_vars)
\ No newline at end of file
+    return Settings(_env_file=env_path, **env_vars)
+
+
+# Настройки читаются один раз на процесс; reload_settings атомарно подменяет экземпляр
+_settings: Settings | None = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    settings = _settings
+    if settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _set_settings(load_settings())
+            settings = _settings
+    return settings
+
+
+def reload_settings() -> Settings:
+    # Невалидный env-файл бросит исключение, и текущие настройки останутся в силе
+    settings = load_settings()
+    with _settings_lock:
+        _set_settings(settings)
+    return settings
+
+
+def _set_settings(settings: Settings) -> None:
+    global _settings
+    _settings = settings
@@ -0,0 +1,3 @@
+#!/bin/bash
+
+python -m app.middlewares.benchmark "$@"
\ No newline at end of file
@@ -0,0 +1,3 @@
+#!/bin/bash
+
+python -m app.services.password_hasher_calibration "$@"
\ No newline at end of file
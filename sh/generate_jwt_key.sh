@@ -0,0 +1,3 @@
+#!/bin/bash
+
+python -m app.services.jwt_keys "$@"
\ No newline at end of file
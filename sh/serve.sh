@@ -0,0 +1,9 @@
+#!/bin/bash
+
+# Воркеры пишут метрики в общий каталог, /metrics любого воркера отдает сумму по всем;
+# файлы прошлого запуска удаляются, иначе их значения попадут в счетчики
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/auth-service-metrics}"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+rm -f "$PROMETHEUS_MULTIPROC_DIR"/*.db
+
+uvicorn app.main:app --host "${HOST:-0.0.0.0}" --port "${PORT:-8000}" --workers "${WORKERS:-4}" "$@"
@@ -0,0 +1,110 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.middlewares.admission_control import AdmissionLimiter, AdmissionController
+from app.middlewares.admission_middleware import AdmissionMiddleware
+
+
+@pytest.mark.unit
+class TestAdmissionLimiter:
+
+    @pytest.mark.asyncio
+    async def test_waiters_should_be_admitted_in_order_on_release(self):
+        limiter = AdmissionLimiter("users", limit=1, max_queue=2, queue_timeout=1)
+        assert await limiter.acquire()
+
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+
+        assert await first
+        assert not second.done()
+        limiter.release()
+        assert await second
+        assert limiter.stats()["in_flight"] == 1
+
+
+    @pytest.mark.asyncio
+    async def test_full_queue_should_reject_immediately(self):
+        limiter = AdmissionLimiter("users", limit=1, max_queue=0, queue_timeout=1)
+        assert await limiter.acquire()
+
+        assert not await limiter.acquire()
+        assert limiter.stats()["rejected"] == 1
+
+
+    @pytest.mark.asyncio
+    async def test_queue_deadline_should_give_up_and_leave_queue(self):
+        limiter = AdmissionLimiter("users", limit=1, max_queue=1, queue_timeout=0.01)
+        assert await limiter.acquire()
+
+        assert not await limiter.acquire()
+        limiter.release()
+
+        stats = limiter.stats()
+        assert stats["timed_out"] == 1
+        assert stats["waiting"] == stats["in_flight"] == 0
+
+
+    @pytest.mark.asyncio
+    async def test_adaptive_limit_should_shrink_on_slow_and_grow_on_fast_requests(self):
+        limiter = AdmissionLimiter("users", limit=8, max_queue=0, queue_timeout=1, adaptive=True,
+                                   min_limit=2, max_limit=16, latency_target=0.05)
+        await limiter.acquire()
+        limiter.release(latency=1)
+        assert limiter.stats()["limit"] == 6
+
+        # Лимит растет, только пока он занят целиком
+        for _ in range(20):
+            for _ in range(6):
+                await limiter.acquire()
+            for _ in range(6):
+                limiter.release(latency=0.001)
+        assert limiter.stats()["limit"] > 6
+
+
+@pytest.mark.unit
+def test_controller_should_route_by_prefix():
+    tokens = AdmissionLimiter("tokens", limit=1, max_queue=0, queue_timeout=1)
+    users = AdmissionLimiter("users", limit=1, max_queue=0, queue_timeout=1)
+    controller = AdmissionController({"/tokens/": tokens, "/users/": users})
+
+    assert controller.pool_for("/tokens/refresh") is tokens
+    assert controller.pool_for("/users/5/") is users
+    assert controller.pool_for("/metrics") is None
+
+
+@pytest.mark.unit
+def test_controller_should_use_per_pool_latency_targets(settings):
+    settings = settings.model_copy(update={"ADMISSION_TOKENS_LATENCY_TARGET_MS": 400,
+                                           "ADMISSION_USERS_LATENCY_TARGET_MS": 50})
+    controller = AdmissionController.from_settings(settings)
+
+    assert controller.pool_for("/tokens/").latency_target == 0.4
+    assert controller.pool_for("/users/").latency_target == 0.05
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_middleware_should_measure_latency_until_response_start():
+    latencies = []
+    limiter = AdmissionLimiter("users", limit=1, max_queue=0, queue_timeout=1)
+    limiter.release = lambda latency=None: latencies.append(latency)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        # Медленный клиент читает потоковое тело
+        await asyncio.sleep(0.2)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def send(message):
+        pass
+
+    state = SimpleNamespace(admission_controller=AdmissionController({"/users/": limiter}))
+    scope = {"type": "http", "path": "/users/", "app": SimpleNamespace(state=state)}
+    await AdmissionMiddleware(app)(scope, None, send)
+
+    assert len(latencies) == 1 and latencies[0] < 0.1
@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app.middlewares.disconnect_middleware import DisconnectMiddleware, CLIENT_CLOSED_REQUEST
+from db.connection import create_engine, create_session_maker
+from db.session_manager import SessionManager
+
+SCOPE = {"type": "http", "method": "GET", "path": "/", "headers": []}
+
+
+def client(disconnect_after: float | None):
+    sent = []
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    return sent, receive, send
+
+
+@pytest.mark.unit
+class TestDisconnectMiddleware:
+
+    @pytest.mark.asyncio
+    async def test_disconnect_should_cancel_handler_and_report_499(self):
+        cancelled = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await receive()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        sent, receive, send = client(disconnect_after=0.01)
+        started_at = time.perf_counter()
+        await DisconnectMiddleware(app)(SCOPE, receive, send)
+
+        assert time.perf_counter() - started_at < 1
+        assert cancelled.is_set()
+        assert sent[0] == {"type": "http.response.start", "status": CLIENT_CLOSED_REQUEST, "headers": []}
+        assert asyncio.current_task().cancelling() == 0
+
+
+    @pytest.mark.asyncio
+    async def test_completed_request_should_pass_through(self):
+        async def app(scope, receive, send):
+            message = await receive()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": message["body"] + b"ok"})
+
+        sent, receive, send = client(disconnect_after=None)
+        await DisconnectMiddleware(app)(SCOPE, receive, send)
+
+        assert [m.get("status") for m in sent] == [200, None]
+        assert sent[-1]["body"] == b"ok"
+
+
+    @pytest.mark.asyncio
+    async def test_body_should_not_be_read_ahead_of_app(self):
+        chunks = [{"type": "http.request", "body": b"a", "more_body": True},
+                  {"type": "http.request", "body": b"b", "more_body": False}]
+        received = 0
+        received_before_app_read = None
+        cancelled = asyncio.Event()
+
+        async def receive():
+            nonlocal received
+            received += 1
+            if chunks:
+                return chunks.pop(0)
+            await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        async def app(scope, receive, send):
+            nonlocal received_before_app_read
+            await asyncio.sleep(0.01)
+            received_before_app_read = received
+            body = b""
+            while True:
+                message = await receive()
+                body += message["body"]
+                if not message["more_body"]:
+                    break
+            assert body == b"ab"
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {**SCOPE, "method": "POST", "headers": [(b"content-length", b"2")]}
+        await DisconnectMiddleware(app)(scope, receive, send)
+
+        assert received_before_app_read == 0
+        assert cancelled.is_set()
+        assert sent[0]["status"] == CLIENT_CLOSED_REQUEST
+
+
+@pytest.mark.db
+class TestDisconnectMiddlewareWithDB:
+
+    @pytest.mark.asyncio
+    async def test_cancelled_query_should_return_connection_to_pool(self, settings):
+        engine = create_engine(settings)
+        session_manager = SessionManager(create_session_maker(engine))
+
+        async def app(scope, receive, send):
+            async with session_manager.start_without_commit() as open_session_manager:
+                await open_session_manager.get_session().execute(text("SELECT pg_sleep(5)"))
+
+        try:
+            sent, receive, send = client(disconnect_after=0.1)
+            started_at = time.perf_counter()
+            await DisconnectMiddleware(app)(SCOPE, receive, send)
+
+            assert time.perf_counter() - started_at < 2
+            assert sent[-2]["status"] == CLIENT_CLOSED_REQUEST
+            assert engine.pool.checkedout() == 0
+            async with session_manager.start_without_commit() as open_session_manager:
+                assert (await open_session_manager.get_session().execute(text("SELECT 1"))).scalar_one() == 1
+        finally:
+            await engine.dispose()
@@ -0,0 +1,50 @@
+import os
+import time
+
+import pytest
+
+from app.middlewares.profiling_middleware import _reserve_profile_file
+
+HOUR = 3600
+
+
+def create_profile(directory, name: str, age: float) -> str:
+    path = os.path.join(directory, name)
+    open(path, "w").close()
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.mark.unit
+class TestReserveProfileFile:
+
+    def test_should_delete_profiles_older_than_retention(self, tmp_path):
+        old = create_profile(tmp_path, "old.collapsed.txt", age=2 * HOUR)
+        recent = create_profile(tmp_path, "recent.collapsed.txt", age=2 * 60)
+
+        path = _reserve_profile_file(str(tmp_path), max_per_minute=5, extension=".txt",
+                                     retention=HOUR, max_files=10)
+
+        assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(recent), os.path.basename(path)])
+        assert not os.path.exists(old)
+
+
+    def test_should_keep_at_most_max_files(self, tmp_path):
+        for i in range(5):
+            create_profile(tmp_path, f"{i}.collapsed.txt", age=(i + 2) * 60)
+
+        path = _reserve_profile_file(str(tmp_path), max_per_minute=5, extension=".txt",
+                                     retention=HOUR, max_files=3)
+
+        assert sorted(os.listdir(tmp_path)) == sorted(["0.collapsed.txt", "1.collapsed.txt",
+                                                       os.path.basename(path)])
+
+
+    def test_over_rate_cap_should_not_reserve(self, tmp_path):
+        create_profile(tmp_path, "first.collapsed.txt", age=1)
+        create_profile(tmp_path, "second.collapsed.txt", age=1)
+
+        assert _reserve_profile_file(str(tmp_path), max_per_minute=2, extension=".txt",
+                                     retention=HOUR, max_files=10) is None
+        assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from app.middlewares.read_your_writes_middleware import ReadYourWritesMiddleware
+from db.replica_router import ReplicaRouter, LAST_WRITE_HEADER
+
+
+def scope(headers: list[tuple[bytes, bytes]] | None = None) -> dict:
+    return {"type": "http", "method": "GET", "path": "/", "headers": headers or []}
+
+
+async def run(app, request_scope: dict) -> dict:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await ReadYourWritesMiddleware(app)(request_scope, receive, send)
+    return dict(sent[0]["headers"])
+
+
+async def respond(send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+@pytest.mark.unit
+class TestReadYourWritesMiddleware:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self):
+        self.router = ReplicaRouter([], strategy="round_robin", read_your_writes_seconds=5, health_check_interval=1)
+        yield
+
+
+    @pytest.mark.asyncio
+    async def test_write_should_return_marker(self):
+        async def app(scope, receive, send):
+            self.router.mark_write()
+            await respond(send)
+
+        started_at = time.time()
+        headers = await run(app, scope())
+
+        assert started_at - 0.001 <= float(headers[LAST_WRITE_HEADER.lower().encode()]) <= time.time() + 0.001
+
+
+    @pytest.mark.asyncio
+    async def test_read_should_not_return_marker(self):
+        async def app(scope, receive, send):
+            await respond(send)
+
+        assert LAST_WRITE_HEADER.lower().encode() not in await run(app, scope())
+
+
+    @pytest.mark.asyncio
+    async def test_request_marker_should_pin_reads_to_primary(self):
+        pinned = None
+
+        async def app(scope, receive, send):
+            nonlocal pinned
+            pinned = self.router.pins_primary()
+            await respond(send)
+
+        await run(app, scope([(LAST_WRITE_HEADER.lower().encode(), str(time.time()).encode())]))
+
+        assert pinned is True
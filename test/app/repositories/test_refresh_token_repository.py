@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+
+from app.repositories.refresh_token_repository import RefreshTokenRepository
+from app.repositories.user_repository import UserRepository
+from app.security.revoked_token_filter import RevokedTokenFilter
+from app.testutils.user_utils import UserGenerator
+from app.utils.datetime_utils import utcnow
+from db.session_manager import SessionManager
+
+
+@pytest.mark.db
+class TestRefreshTokenRepository:
+    @pytest_asyncio.fixture(scope="function", autouse=True)
+    async def setup(self, session_factory) -> None:
+        async with session_factory() as session:
+            await UserRepository(session).delete_all()
+            saved_user = await UserRepository(session).save(UserGenerator.generate_user(1))
+            self.user_id = saved_user.id
+            await session.commit()
+
+
+    @pytest.mark.asyncio
+    async def test_rotate_should_succeed_only_once(self, session_factory) -> None:
+        expires_at = utcnow() + timedelta(hours=1)
+        async with session_factory() as session:
+            repository = RefreshTokenRepository(session)
+            await repository.add("old", self.user_id, expires_at)
+
+            assert await repository.rotate("old", self.user_id, expires_at, "new", expires_at) == self.user_id
+            assert await repository.rotate("old", self.user_id, expires_at, "other", expires_at) is None
+            assert await repository.find_revoked_jtis(["old", "new", "missing"]) == {"old"}
+            await session.commit()
+
+
+    @pytest.mark.asyncio
+    async def test_rotate_expired_token_should_fail(self, session_factory) -> None:
+        async with session_factory() as session:
+            repository = RefreshTokenRepository(session)
+            await repository.add("expired", self.user_id, utcnow() - timedelta(seconds=1))
+
+            assert await repository.rotate("expired", self.user_id, utcnow() - timedelta(seconds=1),
+                                           "new", utcnow() + timedelta(hours=1)) is None
+            await session.commit()
+
+
+    @pytest.mark.asyncio
+    async def test_rotate_untracked_token_should_succeed_only_once(self, session_factory) -> None:
+        expires_at = utcnow() + timedelta(hours=1)
+        async with session_factory() as session:
+            repository = RefreshTokenRepository(session)
+
+            assert await repository.rotate("legacy", self.user_id, expires_at, "new", expires_at) == self.user_id
+            assert await repository.rotate("legacy", self.user_id, expires_at, "other", expires_at) is None
+            assert await repository.find_revoked_jtis(["legacy", "new", "other"]) == {"legacy"}
+            await session.commit()
+
+
+    @pytest.mark.asyncio
+    async def test_delete_expired_should_remove_in_batches(self, session_factory) -> None:
+        async with session_factory() as session:
+            repository = RefreshTokenRepository(session)
+            for i in range(5):
+                await repository.add(f"expired{i}", self.user_id, utcnow() - timedelta(seconds=1))
+            await repository.add("active", self.user_id, utcnow() + timedelta(hours=1))
+
+            assert await repository.delete_expired(batch_size=3) == 3
+            assert await repository.delete_expired(batch_size=3) == 2
+            assert [token.jti for token in await repository.get_all()] == ["active"]
+            await session.commit()
+
+
+    @pytest.mark.asyncio
+    async def test_revoked_token_filter_should_sync_incrementally(self, session_factory) -> None:
+        expires_at = utcnow() + timedelta(hours=1)
+        revoked_token_filter = RevokedTokenFilter(capacity=100, error_rate=0.001)
+        session_manager = SessionManager(session_factory)
+
+        async with session_manager.start_with_commit() as open_session_manager:
+            for jti in ("first", "second", "active"):
+                await open_session_manager.refresh_tokens.add(jti, self.user_id, expires_at)
+            await open_session_manager.refresh_tokens.revoke("first")
+
+        await revoked_token_filter.sync(session_manager)
+        assert revoked_token_filter.ready
+        assert revoked_token_filter.might_be_revoked("first")
+        assert not revoked_token_filter.might_be_revoked("second")
+
+        async with session_manager.start_with_commit() as open_session_manager:
+            await open_session_manager.refresh_tokens.revoke("second")
+
+        await revoked_token_filter.sync(session_manager)
+        assert revoked_token_filter.might_be_revoked("second")
+        assert not revoked_token_filter.might_be_revoked("active")
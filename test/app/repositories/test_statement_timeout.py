@@ -0,0 +1,55 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+from app.repositories.base import parse_statement_timeouts
+from app.repositories.user_repository import UserRepository
+from settings.settings import reload_settings
+
+
+@pytest.mark.db
+class TestStatementTimeout:
+    @pytest_asyncio.fixture(scope="function", autouse=True)
+    async def setup(self, monkeypatch):
+        monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "10000")
+        monkeypatch.setenv("DB_STATEMENT_TIMEOUTS", "UserRepository.find_by_id=1234")
+        reload_settings()
+        yield
+        monkeypatch.undo()
+        reload_settings()
+
+
+    @staticmethod
+    async def current_timeout(session) -> str:
+        return (await session.execute(text("SHOW statement_timeout"))).scalar_one()
+
+
+    @pytest.mark.asyncio
+    async def test_method_override_should_apply_only_to_its_calls(self, session_factory):
+        async with session_factory() as session:
+            user_repository = UserRepository(session)
+            assert await self.current_timeout(session) == "10s"
+
+            await user_repository.find_by_id(1)
+            assert await self.current_timeout(session) == "1234ms"
+
+            await user_repository.find_version(1)
+            assert await self.current_timeout(session) == "10s"
+
+
+    @pytest.mark.asyncio
+    async def test_override_should_end_with_transaction(self, session_factory):
+        async with session_factory() as session:
+            user_repository = UserRepository(session)
+            await user_repository.find_by_id(1)
+            await session.rollback()
+
+            assert await self.current_timeout(session) == "10s"
+            await user_repository.find_by_id(1)
+            assert await self.current_timeout(session) == "1234ms"
+
+
+@pytest.mark.unit
+def test_parse_statement_timeouts():
+    assert parse_statement_timeouts(" UserRepository.find_by_id=100, UserRepository.stream_all=0,") == \
+        {"UserRepository.find_by_id": 100, "UserRepository.stream_all": 0}
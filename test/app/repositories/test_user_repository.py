@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest_asyncio
 import pytest
 from sqlalchemy.exc import SQLAlchemyError
@@ -87,3 +89,83 @@ class TestUserRepository:
             user_repository = UserRepository(session)
             with pytest.raises(SQLAlchemyError):
                 await user_repository.delete_by_id(9999)
+
+    @pytest.mark.asyncio
+    async def test_save_all_should_assign_ids(self, session_factory) -> None:
+        users = [UserGenerator.generate_user(i) for i in range(3)]
+
+        async with session_factory() as session:
+            user_repository = UserRepository(session)
+            saved_users = await user_repository.save_all(users)
+            assert all(u.id is not None for u in saved_users)
+            await session.commit()
+
+        async with session_factory() as session:
+            all_users = await UserRepository(session).get_all()
+            assert len(all_users) == 3
+
+
+    @pytest.mark.asyncio
+    async def test_delete_by_id_should_return_deleted_user(self, session_factory) -> None:
+        new_user = UserGenerator.generate_user(1)
+
+        async with session_factory() as session:
+            user_repository = UserRepository(session)
+            user_id = (await user_repository.save(new_user)).id
+            await session.commit()
+
+        async with session_factory() as session:
+            deleted_user = await UserRepository(session).delete_by_id(user_id)
+            assert deleted_user.id == user_id
+            self.assert_user(UserGenerator.generate_user(1), deleted_user)
+            await session.commit()
+
+
+    @pytest.mark.asyncio
+    async def test_delete_where_should_return_deleted_ids(self, session_factory) -> None:
+        async with session_factory() as session:
+            user_repository = UserRepository(session)
+            users = await user_repository.save_all([UserGenerator.generate_user(i) for i in range(4)])
+            user_ids = [u.id for u in users]
+            await session.commit()
+
+        async with session_factory() as session:
+            user_repository = UserRepository(session)
+            deleted_ids = await user_repository.delete_where(User.id.in_(user_ids[:2]))
+            await session.commit()
+
+        assert sorted(deleted_ids) == user_ids[:2]
+
+        async with session_factory() as session:
+            remaining_users = await UserRepository(session).get_all()
+            assert sorted(u.id for u in remaining_users) == user_ids[2:]
+
+
+    @pytest.mark.asyncio
+    async def test_truncate_should_restart_identity(self, session_factory) -> None:
+        async with session_factory() as session:
+            user_repository = UserRepository(session)
+            await user_repository.save_all([UserGenerator.generate_user(i) for i in range(2)])
+            await user_repository.truncate(cascade=True)
+            await session.commit()
+
+        async with session_factory() as session:
+            saved_user = await UserRepository(session).save(UserGenerator.generate_user(1))
+            assert saved_user.id == 1
+            await session.commit()
+
+
+    @pytest.mark.asyncio
+    async def test_concurrent_insert_skip_existing_should_create_one_user(self, session_factory) -> None:
+        values = {c: getattr(UserGenerator.generate_user(1), c) for c in
+                  ("login", "hashed_password", "first_name", "last_name", "second_name")}
+
+        async def insert_user():
+            async with session_factory() as session:
+                user_id = await UserRepository(session).insert_skip_existing(values)
+                await session.commit()
+                return user_id
+
+        user_ids = await asyncio.gather(*(insert_user() for _ in range(5)))
+
+        assert len([i for i in user_ids if i is not None]) == 1
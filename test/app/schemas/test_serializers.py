@@ -0,0 +1,36 @@
+import orjson
+import pytest
+
+from app.schemas.responses.user_responses import UserResponseEntity
+from app.schemas.serializers import RowSerializer, user_serializer
+from app.testutils.user_utils import UserGenerator
+
+
+@pytest.mark.unit
+class TestRowSerializer:
+    def test_should_match_pydantic_serialization(self):
+        user = UserGenerator.generate_user(1)
+        user.id = 1
+
+        expected = UserResponseEntity.of_user(user).model_dump()
+        assert orjson.loads(user_serializer.dumps(user)) == expected
+        assert orjson.loads(user_serializer.dumps_many([user, user])) == [expected, expected]
+
+
+    def test_should_keep_schema_field_order(self):
+        user = UserGenerator.generate_user(1)
+        user.id = 1
+
+        assert list(orjson.loads(user_serializer.dumps(user))) == list(UserResponseEntity.model_fields)
+
+
+    def test_single_field_schema_should_be_supported(self):
+        from pydantic import BaseModel
+
+        class IdOnly(BaseModel):
+            id: int
+
+        user = UserGenerator.generate_user(1)
+        user.id = 5
+
+        assert RowSerializer(IdOnly).dumps(user) == b'{"id":5}'
@@ -0,0 +1,48 @@
+import pytest
+
+from app.security.primary_token_cache import PrimaryTokenCache
+
+
+@pytest.mark.unit
+class TestPrimaryTokenCache:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self):
+        self.cache = PrimaryTokenCache(max_size=10, ttl=60, negative_max_size=10, negative_ttl=60)
+        yield
+
+
+    def test_unknown_token_should_return_none(self):
+        assert self.cache.lookup("token") is None
+
+
+    def test_stored_tokens_should_be_found(self):
+        self.cache.store("valid", True, self.cache.begin_read())
+        self.cache.store("invalid", False, self.cache.begin_read())
+
+        assert self.cache.lookup("valid") is True
+        assert self.cache.lookup("invalid") is False
+
+
+    def test_valid_token_should_replace_negative_entry(self):
+        self.cache.store("token", False, self.cache.begin_read())
+        self.cache.store("token", True, self.cache.begin_read())
+
+        assert self.cache.lookup("token") is True
+
+
+    def test_invalidate_should_clear_both_caches(self):
+        self.cache.store("valid", True, self.cache.begin_read())
+        self.cache.store("invalid", False, self.cache.begin_read())
+        self.cache.invalidate()
+
+        assert self.cache.lookup("valid") is None
+        assert self.cache.lookup("invalid") is None
+
+
+    def test_result_read_before_invalidation_should_not_be_stored(self):
+        generation = self.cache.begin_read()
+        # Ключ удален, пока шла проверка
+        self.cache.invalidate()
+        self.cache.store("token", True, generation)
+
+        assert self.cache.lookup("token") is None
@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from app.security.verified_token_cache import VerifiedTokenCache
+from app.services.jwt_token_service import JWTTokenService
+
+
+@pytest.mark.unit
+class TestVerifiedTokenCache:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, settings):
+        self.cache = VerifiedTokenCache(max_size=10)
+        self.jwt_token_service = JWTTokenService(settings, verified_token_cache=self.cache)
+        yield
+
+
+    def test_repeated_verification_should_hit_cache(self):
+        token = self.jwt_token_service.generate_access_token(1).token
+
+        first = self.jwt_token_service.verify_token(token)
+        second = self.jwt_token_service.verify_token(token)
+
+        assert first == second
+        assert self.cache.stats()["misses"] == 1
+        assert self.cache.stats()["hits"] == 1
+
+
+    def test_cached_payload_should_still_check_token_type(self):
+        token = self.jwt_token_service.generate_refresh_token(1).token
+        self.jwt_token_service.verify_token(token, "refresh")
+
+        assert self.jwt_token_service.verify_token(token, "access") is None
+
+
+    def test_expired_entry_should_not_be_returned(self):
+        self.cache.store("token", {"user_id": 1}, time.time() - 1)
+
+        assert self.cache.get("token") is None
+        assert len(self.cache.cache) == 0
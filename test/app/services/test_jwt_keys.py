@@ -0,0 +1,134 @@
+import json
+import os
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+from fastapi import FastAPI
+
+from app import main
+from app.security.verified_token_cache import VerifiedTokenCache
+from app.services.jwt_keys import JWTKeyRing, add_key, KEYS_FILE_NAME
+from app.services.jwt_token_service import JWTTokenService
+from app.utils.datetime_utils import utcnow
+
+
+@pytest.mark.unit
+class TestJWTKeyRing:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, tmp_path, settings):
+        self.keys_dir = str(tmp_path)
+        self.settings = settings
+        yield
+
+
+    def test_should_sign_with_active_key_and_verify_by_kid(self):
+        entry = add_key(self.keys_dir, "EdDSA", utcnow() - timedelta(minutes=1), None)
+        service = JWTTokenService(self.settings, JWTKeyRing.from_directory(self.keys_dir))
+
+        token = service.generate_access_token(1).token
+
+        header = jwt.get_unverified_header(token)
+        assert header["kid"] == entry["kid"]
+        assert header["alg"] == "EdDSA"
+        assert service.verify_token(token)["user_id"] == 1
+
+
+    def test_pending_key_should_be_published_but_not_used_for_signing(self):
+        current = add_key(self.keys_dir, "ES256", utcnow() - timedelta(hours=1), None)
+        pending = add_key(self.keys_dir, "RS256", utcnow() + timedelta(hours=1), utcnow() + timedelta(hours=2))
+        key_ring = JWTKeyRing.from_directory(self.keys_dir)
+
+        assert key_ring.signing_key().kid == current["kid"]
+        assert {key.kid for key in key_ring.published_keys()} == {current["kid"], pending["kid"]}
+        assert key_ring.signing_key(utcnow() + timedelta(hours=1, minutes=1)).kid == pending["kid"]
+
+
+    def test_retired_key_should_not_verify(self):
+        add_key(self.keys_dir, "EdDSA", utcnow() - timedelta(hours=2), None)
+        old_service = JWTTokenService(self.settings, JWTKeyRing.from_directory(self.keys_dir))
+        token = old_service.generate_access_token(1).token
+
+        add_key(self.keys_dir, "EdDSA", utcnow() - timedelta(hours=1), utcnow() - timedelta(minutes=1))
+        service = JWTTokenService(self.settings, JWTKeyRing.from_directory(self.keys_dir))
+
+        with pytest.raises(jwt.DecodeError):
+            service.verify_token(token)
+        assert service.verify_token(service.generate_access_token(2).token)["user_id"] == 2
+
+
+    def test_jwks_should_contain_only_public_keys(self):
+        add_key(self.keys_dir, "EdDSA", utcnow(), None)
+        key_ring = JWTKeyRing.from_directory(self.keys_dir)
+
+        body, etag = key_ring.jwks()
+        same_body, same_etag = key_ring.jwks()
+
+        [jwk] = jwt.PyJWKSet.from_json(body.decode()).keys
+        assert jwk.key_id == key_ring.signing_key().kid
+        assert "d" not in jwk._jwk_data
+        assert (same_body, same_etag) == (body, etag)
+
+
+    def test_symmetric_key_should_not_be_published(self):
+        key_ring = JWTKeyRing.from_settings(self.settings)
+
+        assert key_ring.published_keys() == []
+        assert key_ring.signing_key().kid is None
+
+
+    def test_switch_to_keys_dir_should_keep_verifying_legacy_tokens(self):
+        legacy_service = JWTTokenService(self.settings, JWTKeyRing.from_settings(self.settings))
+        legacy_token = legacy_service.generate_refresh_token(1).token
+
+        add_key(self.keys_dir, "EdDSA", utcnow() - timedelta(minutes=1), None)
+        settings = self.settings.model_copy(update={"JWT_KEYS_DIR": self.keys_dir})
+        key_ring = JWTKeyRing.from_settings(settings)
+        service = JWTTokenService(settings, key_ring)
+
+        assert service.verify_token(legacy_token, "refresh")["user_id"] == 1
+        assert key_ring.signing_key().kid is not None
+        assert all(key.kid is not None for key in key_ring.published_keys())
+
+
+    def test_legacy_key_should_sign_until_first_key_activates_and_retire_after_token_lifetime(self):
+        activates_at = utcnow() + timedelta(hours=1)
+        add_key(self.keys_dir, "EdDSA", activates_at, None)
+        key_ring = JWTKeyRing.from_settings(self.settings.model_copy(update={"JWT_KEYS_DIR": self.keys_dir}))
+
+        assert key_ring.signing_key().kid is None
+        assert key_ring.signing_key(activates_at + timedelta(minutes=1)).kid is not None
+
+        retires_at = activates_at + timedelta(hours=self.settings.REFRESH_TOKEN_EXPIRE_HOURS)
+        assert key_ring.verification_key(None, retires_at - timedelta(minutes=1)) is not None
+        assert key_ring.verification_key(None, retires_at) is None
+
+
+    def test_key_without_activation_time_should_not_load(self):
+        add_key(self.keys_dir, "EdDSA", utcnow(), None)
+        keys_file = os.path.join(self.keys_dir, KEYS_FILE_NAME)
+        with open(keys_file) as f:
+            entries = json.load(f)
+        del entries[0]["activates_at"]
+        with open(keys_file, "w") as f:
+            json.dump(entries, f)
+
+        # Иначе срок вывода симметричного ключа сдвигался бы на каждой перезагрузке
+        with pytest.raises(ValueError):
+            JWTKeyRing.from_settings(self.settings.model_copy(update={"JWT_KEYS_DIR": self.keys_dir}))
+
+
+    def test_settings_reload_should_pick_up_new_keys_and_drop_verified_tokens(self, monkeypatch):
+        application = FastAPI()
+        application.state.jwt_key_ring = JWTKeyRing.from_settings(self.settings)
+        application.state.verified_token_cache = VerifiedTokenCache(max_size=10)
+        application.state.verified_token_cache.store("token", {"user_id": 1}, time.time() + 60)
+        entry = add_key(self.keys_dir, "EdDSA", utcnow() - timedelta(minutes=1), None)
+        monkeypatch.setattr(main, "reload_settings",
+                            lambda: self.settings.model_copy(update={"JWT_KEYS_DIR": self.keys_dir}))
+
+        main.reload_app_settings(application)
+
+        assert application.state.jwt_key_ring.signing_key().kid == entry["kid"]
+        assert application.state.verified_token_cache.get("token") is None
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.password_hashers import BasePasswordHasher, ScryptPasswordHasher
+from app.services.password_service import PasswordService, PasswordHashingPool
+
+
+@pytest.mark.unit
+class TestPasswordService:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self):
+        self.password_service = PasswordService(ScryptPasswordHasher(ln=10))
+        yield
+
+
+    @pytest.mark.asyncio
+    async def test_hashed_should_be_salted_and_self_describing(self):
+        first = await self.password_service.hashed("password")
+        second = await self.password_service.hashed("password")
+
+        assert first.startswith("$scrypt$ln=10,r=8,p=1$")
+        assert first != second
+        assert await self.password_service.verify("password", first)
+        assert not await self.password_service.verify("another", first)
+
+
+    @pytest.mark.asyncio
+    async def test_legacy_sha256_hash_should_verify_and_need_rehash(self):
+        legacy_hash = hashlib.sha256(b"password").hexdigest()
+
+        assert await self.password_service.verify("password", legacy_hash)
+        assert not await self.password_service.verify("another", legacy_hash)
+        assert self.password_service.needs_rehash(legacy_hash)
+
+
+    @pytest.mark.asyncio
+    async def test_hash_with_old_params_should_need_rehash(self):
+        old_hash = ScryptPasswordHasher(ln=11).hash("password")
+        current_hash = await self.password_service.hashed("password")
+
+        assert await self.password_service.verify("password", old_hash)
+        assert self.password_service.needs_rehash(old_hash)
+        assert not self.password_service.needs_rehash(current_hash)
+
+
+    @pytest.mark.asyncio
+    async def test_unknown_hash_format_should_not_verify(self):
+        assert not await self.password_service.verify("password", "not-a-hash")
+
+
+    @pytest.mark.asyncio
+    async def test_dummy_hash_should_use_current_params_and_not_verify(self):
+        dummy_hash = ScryptPasswordHasher(ln=10).dummy_hash()
+
+        assert dummy_hash.startswith("$scrypt$ln=10,r=8,p=1$")
+        assert not self.password_service.needs_rehash(dummy_hash)
+        assert not await self.password_service.verify("password", dummy_hash)
+
+
+    def test_hasher_without_hash_and_verify_should_not_instantiate(self):
+        with pytest.raises(TypeError):
+            BasePasswordHasher()
+
+
+    @pytest.mark.asyncio
+    async def test_process_pool_should_hash_and_verify(self):
+        pool = PasswordHashingPool(max_workers=1, max_pending=4)
+        password_service = PasswordService(ScryptPasswordHasher(ln=10), pool)
+        try:
+            hashed_passwords = await password_service.hashed_many(["first", "second"])
+            assert await password_service.verify("first", hashed_passwords[0])
+            assert await password_service.verify("second", hashed_passwords[1])
+        finally:
+            pool.shutdown()
+
+
+    @pytest.mark.asyncio
+    async def test_full_pool_queue_should_raise_503(self):
+        pool = PasswordHashingPool(max_workers=1, max_pending=0)
+        password_service = PasswordService(ScryptPasswordHasher(ln=10), pool)
+        try:
+            with pytest.raises(HTTPException) as e:
+                await password_service.hashed("password")
+            assert e.value.status_code == 503
+        finally:
+            pool.shutdown()
+
+
+    @pytest.mark.asyncio
+    async def test_batch_should_count_every_password_against_pending_limit(self):
+        pool = PasswordHashingPool(max_workers=1, max_pending=5)
+        password_service = PasswordService(ScryptPasswordHasher(ln=10), pool)
+        try:
+            with pytest.raises(HTTPException) as e:
+                await password_service.hashed_many([f"password{i}" for i in range(10)])
+            assert e.value.status_code == 503
+        finally:
+            pool.shutdown()
+
+
+    @pytest.mark.asyncio
+    async def test_batches_should_leave_a_worker_for_single_hashes(self):
+        pool = PasswordHashingPool(max_workers=2, max_pending=64)
+        try:
+            # Процессы пула запускаются заранее, чтобы их старт не попал в замер
+            await asyncio.gather(pool.run(time.sleep, 0.1), pool.run(time.sleep, 0.1))
+
+            batches = asyncio.gather(*(pool.run_batch(time.sleep, 0.5, cost=10) for _ in range(3)))
+            await asyncio.sleep(0.05)
+            started_at = time.perf_counter()
+            await pool.run(time.sleep, 0)
+
+            assert time.perf_counter() - started_at < 0.3
+            await batches
+        finally:
+            pool.shutdown()
@@ -0,0 +1,55 @@
+import pytest
+
+from app.services.user_response_cache import UserResponseCache
+
+
+@pytest.mark.unit
+class TestUserResponseCache:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self):
+        self.cache = UserResponseCache(max_size=10, ttl=60, replica_lag=60)
+        yield
+
+
+    def test_read_started_before_invalidation_should_not_be_stored(self):
+        generation = self.cache.begin_read()
+        self.cache.invalidate("1")
+        self.cache.store(1, 1, b"old", generation)
+
+        assert self.cache.get(1) is None
+
+
+    def test_replica_read_right_after_invalidation_should_not_be_stored(self):
+        self.cache.invalidate("1")
+        self.cache.store(1, 1, b"maybe-old", self.cache.begin_read(), from_replica=True)
+
+        assert self.cache.get(1) is None
+
+
+    def test_primary_read_after_invalidation_should_be_stored(self):
+        self.cache.invalidate("1")
+        self.cache.store(1, 2, b"new", self.cache.begin_read())
+
+        assert self.cache.get(1) == (2, b"new")
+
+
+    def test_replica_read_of_other_user_should_be_stored(self):
+        self.cache.invalidate("1")
+        self.cache.store(2, 1, b"body", self.cache.begin_read(), from_replica=True)
+
+        assert self.cache.get(2) == (1, b"body")
+
+
+    def test_full_invalidation_should_hold_back_all_replica_reads(self):
+        self.cache.invalidate(None)
+        self.cache.store(2, 1, b"body", self.cache.begin_read(), from_replica=True)
+
+        assert self.cache.get(2) is None
+
+
+    def test_replica_read_after_lag_window_should_be_stored(self):
+        cache = UserResponseCache(max_size=10, ttl=60, replica_lag=0)
+        cache.invalidate("1")
+        cache.store(1, 2, b"new", cache.begin_read(), from_replica=True)
+
+        assert cache.get(1) == (2, b"new")
@@ -0,0 +1,30 @@
+import pytest
+
+from app.utils.bloom_filter import BloomFilter
+
+
+@pytest.mark.unit
+class TestBloomFilter:
+    def test_added_items_should_be_found(self):
+        bloom_filter = BloomFilter(capacity=1000)
+        for i in range(1000):
+            bloom_filter.add(f"jti{i}")
+
+        assert all(f"jti{i}" in bloom_filter for i in range(1000))
+
+
+    def test_false_positive_rate_should_stay_near_error_rate(self):
+        bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom_filter.add(f"jti{i}")
+
+        false_positives = sum(f"other{i}" in bloom_filter for i in range(10000))
+        assert false_positives < 300
+
+
+    def test_should_be_saturated_after_capacity(self):
+        bloom_filter = BloomFilter(capacity=2)
+        bloom_filter.add("a")
+        assert not bloom_filter.is_saturated()
+        bloom_filter.add("b")
+        assert bloom_filter.is_saturated()
@@ -0,0 +1,30 @@
+import pytest
+
+from app.utils.etag import version_etag, aggregate_etag, etag_matches
+
+
+@pytest.mark.unit
+class TestETag:
+    def test_version_etag_should_be_strong(self):
+        assert version_etag(1, 2) == '"1.2"'
+
+
+    def test_aggregate_etag_should_depend_on_versions_and_params(self):
+        etag = aggregate_etag([(1, 1), (2, 1)], 100, None)
+
+        assert etag == aggregate_etag([(1, 1), (2, 1)], 100, None)
+        assert etag != aggregate_etag([(1, 1), (2, 2)], 100, None)
+        assert etag != aggregate_etag([(1, 1), (2, 1)], 50, None)
+
+
+    @pytest.mark.parametrize("if_none_match, matches", [
+        ('"1.2"', True),
+        ('W/"1.2"', True),
+        ('"1.1", "1.2"', True),
+        ("*", True),
+        ('"1.1"', False),
+        ("", False),
+        (None, False),
+    ])
+    def test_etag_matches(self, if_none_match, matches):
+        assert etag_matches(if_none_match, '"1.2"') is matches
@@ -0,0 +1,54 @@
+import pytest
+
+from app.utils.failure_log import FailureLog
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def error(self, msg, exc_info=None):
+        self.records.append(("error", msg))
+
+    def info(self, msg):
+        self.records.append(("info", msg))
+
+
+@pytest.mark.unit
+class TestFailureLog:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self):
+        self.logger = RecordingLogger()
+        self.failure_log = FailureLog(self.logger, "Listener")
+        yield
+
+
+    def test_repeated_failure_should_be_logged_once(self):
+        for _ in range(3):
+            self.failure_log.failed("poll", ConnectionError("refused"))
+
+        assert [level for level, _ in self.logger.records] == ["error"]
+
+
+    def test_new_error_type_should_be_logged(self):
+        self.failure_log.failed("poll", ConnectionError("refused"))
+        self.failure_log.failed("poll", TimeoutError())
+
+        assert [level for level, _ in self.logger.records] == ["error", "error"]
+
+
+    def test_recovery_should_be_logged_once(self):
+        self.failure_log.succeeded("poll")
+        self.failure_log.failed("poll", ConnectionError("refused"))
+        self.failure_log.succeeded("poll")
+        self.failure_log.succeeded("poll")
+        self.failure_log.failed("poll", ConnectionError("refused"))
+
+        assert [level for level, _ in self.logger.records] == ["error", "info", "error"]
+
+
+    def test_operations_should_be_tracked_separately(self):
+        self.failure_log.failed("LISTEN", ConnectionError("refused"))
+        self.failure_log.failed("poll", ConnectionError("refused"))
+
+        assert len(self.logger.records) == 2
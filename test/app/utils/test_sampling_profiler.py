@@ -0,0 +1,65 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.utils.sampling_profiler import SamplingProfiler
+
+
+def busy_profiled(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def busy_other(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.mark.unit
+class TestSamplingProfiler:
+
+    @pytest.mark.asyncio
+    async def test_should_sample_only_profiled_task(self):
+        async def other():
+            for _ in range(5):
+                busy_other(0.01)
+                await asyncio.sleep(0)
+
+        async def profiled():
+            profiler = SamplingProfiler(interval=0.001)
+            profiler.start()
+            try:
+                for _ in range(5):
+                    busy_profiled(0.01)
+                    await asyncio.sleep(0)
+            finally:
+                profiler.stop()
+            return profiler
+
+        profiler, _ = await asyncio.gather(profiled(), other())
+        collapsed = profiler.collapsed()
+
+        assert "busy_profiled" in collapsed
+        assert "busy_other" not in collapsed
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+
+    @pytest.mark.asyncio
+    async def test_speedscope_should_reference_shared_frames(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        busy_profiled(0.02)
+        profiler.stop()
+
+        document = json.loads(profiler.speedscope("test"))
+        frames = document["shared"]["frames"]
+        profile = document["profiles"][0]
+
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"]) > 0
+        assert all(0 <= index < len(frames) for sample in profile["samples"] for index in sample)
+        assert any(frame["name"] == "busy_profiled" for frame in frames)
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self):
+        self.single_flight = SingleFlight()
+        self.calls = 0
+        yield
+
+
+    async def slow_value(self, value):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return value
+
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_should_share_one_execution(self):
+        results = await asyncio.gather(*(self.single_flight.do("users", 1, lambda: self.slow_value(b"user"))
+                                         for _ in range(10)))
+
+        assert results == [b"user"] * 10
+        assert self.calls == 1
+        assert self.single_flight.stats()["users"] == {"executed": 1, "coalesced": 9, "retried": 0}
+
+
+    @pytest.mark.asyncio
+    async def test_different_keys_and_sequential_calls_should_not_be_coalesced(self):
+        await asyncio.gather(self.single_flight.do("users", 1, lambda: self.slow_value(1)),
+                             self.single_flight.do("users", 2, lambda: self.slow_value(2)))
+        await self.single_flight.do("users", 1, lambda: self.slow_value(1))
+
+        assert self.calls == 3
+        assert self.single_flight.stats()["users"]["coalesced"] == 0
+
+
+    @pytest.mark.asyncio
+    async def test_error_should_propagate_to_all_waiters(self):
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("db is down")
+
+        results = await asyncio.gather(*(self.single_flight.do("users", 1, failing) for _ in range(3)),
+                                       return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert self.single_flight.stats()["users"]["executed"] == 1
+
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_should_not_cancel_waiters(self):
+        leader = asyncio.create_task(self.single_flight.do("users", 1, lambda: self.slow_value(1)))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.single_flight.do("users", 1, lambda: self.slow_value(1)))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == 1
+        assert leader.cancelled()
+        assert self.calls == 2
+        assert self.single_flight.stats()["users"]["retried"] == 1
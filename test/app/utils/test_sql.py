@@ -0,0 +1,25 @@
+import pytest
+
+from app.utils.sql import normalize_sql
+
+
+@pytest.mark.unit
+class TestNormalizeSql:
+
+    def test_should_replace_values_and_keep_casts(self):
+        statement = "SELECT users.id FROM users\n  WHERE users.login = $1::VARCHAR AND users.id > 10 AND name = 'it''s'"
+
+        assert normalize_sql(statement) == \
+            "SELECT users.id FROM users WHERE users.login = ?::VARCHAR AND users.id > ? AND name = ?"
+
+
+    def test_should_collapse_in_lists_and_values_rows(self):
+        select_in = "SELECT t.id FROM t WHERE t.id IN ($1, $2, $3)"
+        insert_many = "INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6) RETURNING t.id"
+
+        assert normalize_sql(select_in) == "SELECT t.id FROM t WHERE t.id IN (?)"
+        assert normalize_sql(insert_many) == "INSERT INTO t (a, b) VALUES (?, ?), ... RETURNING t.id"
+
+
+    def test_should_keep_identifiers_with_digits(self):
+        assert normalize_sql("TRUNCATE users_1 RESTART IDENTITY") == "TRUNCATE users_1 RESTART IDENTITY"
@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from app.utils.ttl_cache import TTLCache, MISSING
+
+
+@pytest.mark.unit
+class TestTTLCache:
+
+    def test_get_after_set_should_hit(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+
+    def test_expired_entry_should_miss(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1, ttl=0.01)
+        time.sleep(0.02)
+
+        assert cache.get("a", None) is None
+        assert len(cache) == 0
+
+
+    def test_overflow_should_evict_least_recently_used(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
@@ -23,10 +23,12 @@ async def session_manager(session_factory) -> SessionManager:
 
 @pytest.fixture(scope="module")
 def client(settings) -> TestClient:
-    return TestClient(
+    # Контекстный менеджер запускает lifespan приложения (пул соединений)
+    with TestClient(
         app,
         base_url="http://test",
-)
+    ) as client:
+        yield client
 
 
 @pytest.fixture(scope="module")
@@ -35,9 +37,9 @@ def primary_token_str() -> str:
 
 
 @pytest.fixture(scope="module")
-def password_service():
+def password_service(settings):
     from app.services.password_service import PasswordService
-    return PasswordService()
+    return PasswordService.from_settings(settings)
 
 
 @pytest.fixture(scope="module")
@@ -56,8 +58,8 @@ def request_kwargs(primary_token_str) -> dict:
 @pytest_asyncio.fixture(scope="function", autouse=True)
 async def clean_db_before_test(session_manager: SessionManager, primary_token_str: str):
     async with session_manager.start_with_commit() as open_session_manager:
-        await open_session_manager.users.delete_all()
-        await open_session_manager.primary_tokens.delete_all()
+        await open_session_manager.users.truncate(cascade=True)
+        await open_session_manager.primary_tokens.truncate()
 
     async with session_manager.start_with_commit() as open_session_manager:
         primary_token = PrimaryToken(name="test", token=primary_token_str)
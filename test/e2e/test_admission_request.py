@@ -0,0 +1,41 @@
+import pytest
+
+from app.middlewares.admission_control import AdmissionController, AdmissionLimiter
+
+
+@pytest.mark.e2e
+class TestAdmissionRequest:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, client, request_kwargs):
+        self.client = client
+        self.headers = request_kwargs["headers"]
+        controller = self.client.app.state.admission_controller
+        # Пул /users/ исчерпан и без очереди, пул /tokens/ свободен
+        saturated = AdmissionLimiter("users", limit=0, max_queue=0, queue_timeout=0.01)
+        self.client.app.state.admission_controller = AdmissionController(
+            {"/tokens/": controller.pools["/tokens/"], "/users/": saturated}
+        )
+        yield
+        self.client.app.state.admission_controller = controller
+
+
+    def test_saturated_pool_should_return_503_with_retry_after(self):
+        response = self.client.get("/users/1/", headers=self.headers)
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+
+    def test_other_pool_should_not_be_affected(self):
+        response = self.client.post("/tokens/introspect", headers=self.headers, json={"token": "invalid"})
+
+        assert response.status_code == 200
+
+
+    def test_stats_should_report_rejections(self):
+        self.client.get("/users/1/", headers=self.headers)
+
+        response = self.client.get("/stats/admission", headers=self.headers)
+
+        assert response.status_code == 200
+        assert response.json()["users"]["rejected"] == 1
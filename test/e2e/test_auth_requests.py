@@ -1,3 +1,5 @@
+import hashlib
+
 import pytest
 
 from app.models.models import User
@@ -25,7 +27,7 @@ class TestGetAccessToken:
     @pytest.mark.asyncio
     async def test_with_valid_request_should_success(self):
         request = self.get_request_body()
-        hashed_password = self.password_service.hashed(request["password"])
+        hashed_password = await self.password_service.hashed(request["password"])
 
         async with self.session_manager.start_with_commit() as session_manager:
             user = User(
@@ -50,6 +52,33 @@ class TestGetAccessToken:
         self.asserts_token.assert_token(user_id, refresh_token, "refresh")
 
 
+    @pytest.mark.asyncio
+    async def test_with_legacy_password_hash_should_rehash(self):
+        request = self.get_request_body()
+
+        async with self.session_manager.start_with_commit() as session_manager:
+            user = User(
+                login=request["login"],
+                hashed_password=hashlib.sha256(request["password"].encode()).hexdigest(),
+                first_name="first",
+                second_name="second",
+                last_name="last",
+            )
+            user_id = (await session_manager.users.save(user)).id
+
+        self.request_kwargs.update(json=request)
+        response = self.client.post(**self.request_kwargs)
+        assert response.status_code == 200
+
+        async with self.session_manager.start_without_commit() as session_manager:
+            user = await session_manager.users.find_by_id(user_id)
+            assert user.hashed_password.startswith("$scrypt$")
+            assert not self.password_service.needs_rehash(user.hashed_password)
+
+        response = self.client.post(**self.request_kwargs)
+        assert response.status_code == 200
+
+
     @pytest.mark.asyncio
     async def test_without_primary_token_should_return_403(self):
         request = self.get_request_body()
@@ -64,7 +93,7 @@ class TestGetAccessToken:
     @pytest.mark.asyncio
     async def test_with_invalid_password_should_return_401(self):
         request = self.get_request_body()
-        hashed_another_password = self.password_service.hashed("AnotherPassword!")
+        hashed_another_password = await self.password_service.hashed("AnotherPassword!")
 
         async with self.session_manager.start_with_commit() as session_manager:
             user = User(
@@ -90,6 +119,28 @@ class TestGetAccessToken:
         self.asserts_response.assert_error_response(response, 401)
 
 
+    @pytest.mark.asyncio
+    async def test_with_nonexistent_user_should_run_kdf_verify(self, monkeypatch):
+        app_password_service = self.client.app.state.password_service
+        verified_hashes = []
+        verify = app_password_service.verify
+
+        async def spy(plain_password: str, hashed_password: str) -> bool:
+            verified_hashes.append(hashed_password)
+            return await verify(plain_password, hashed_password)
+
+        monkeypatch.setattr(app_password_service, "verify", spy)
+
+        self.request_kwargs.update(json=self.get_request_body())
+        response = self.client.post(**self.request_kwargs)
+
+        self.asserts_response.assert_error_response(response, 401)
+        assert len(verified_hashes) == 1
+        # Проверка против хэша с текущими параметрами KDF, а не дешевый отказ
+        assert verified_hashes[0].startswith(f"$scrypt$ln={self.settings.PASSWORD_SCRYPT_LN},")
+        assert not app_password_service.needs_rehash(verified_hashes[0])
+
+
     @classmethod
     def get_request_body(cls) -> dict:
         return {"login": "testuser", "password": "TestPassword123!"}
@@ -120,7 +171,7 @@ class TestRefreshAccessToken:
     async def test_with_valid_should_success(self):
         user_id = await self.save_user()
 
-        tokens = self.jwt_token_service.generate_tokens(user_id)
+        tokens = await self.issue_tokens(user_id)
         access_token = tokens[0].token
         refresh_token = tokens[1].token
 
@@ -134,6 +185,69 @@ class TestRefreshAccessToken:
         assert new_access_token is not None
         self.asserts_token.assert_token(user_id, new_access_token, "access")
         assert new_access_token != access_token
+        assert body["refresh_token"]["token"] != refresh_token
+
+
+    @pytest.mark.asyncio
+    async def test_rotated_token_should_be_usable_once(self):
+        user_id = await self.save_user()
+        refresh_token = (await self.issue_tokens(user_id))[1].token
+
+        self.request_kwargs.update(json={"refresh_token": refresh_token})
+        new_refresh_token = self.client.post(**self.request_kwargs).json()["refresh_token"]["token"]
+        replay_response = self.client.post(**self.request_kwargs)
+
+        assert replay_response.status_code == 400
+
+        # Повторное предъявление отзывает и выданный взамен токен
+        self.request_kwargs.update(json={"refresh_token": new_refresh_token})
+        assert self.client.post(**self.request_kwargs).status_code == 400
+
+
+    @pytest.mark.asyncio
+    async def test_with_untracked_refresh_token_should_refresh_once(self):
+        # Токен, выданный до учета jti, принимается один раз
+        user_id = await self.save_user()
+        refresh_token = self.jwt_token_service.generate_refresh_token(user_id).token
+
+        self.request_kwargs.update(json={"refresh_token": refresh_token})
+        response = self.client.post(**self.request_kwargs)
+        assert response.status_code == 200
+        new_refresh_token = response.json()["refresh_token"]["token"]
+
+        assert self.client.post(**self.request_kwargs).status_code == 400
+
+        # Повторное предъявление отзывает и выданный взамен токен
+        self.request_kwargs.update(json={"refresh_token": new_refresh_token})
+        assert self.client.post(**self.request_kwargs).status_code == 400
+
+
+    @pytest.mark.asyncio
+    async def test_revoked_token_should_not_refresh(self):
+        user_id = await self.save_user()
+        refresh_token = (await self.issue_tokens(user_id))[1].token
+
+        revoke_response = self.client.post("/tokens/revoke", headers=self.request_kwargs["headers"],
+                                           json={"refresh_token": refresh_token})
+        self.request_kwargs.update(json={"refresh_token": refresh_token})
+        response = self.client.post(**self.request_kwargs)
+
+        assert revoke_response.status_code == 204
+        assert response.status_code == 400
+
+
+    @pytest.mark.asyncio
+    async def test_revoke_all_sessions_should_revoke_every_token(self):
+        user_id = await self.save_user()
+        refresh_tokens = [(await self.issue_tokens(user_id))[1].token for _ in range(2)]
+
+        revoke_response = self.client.post("/tokens/revoke", headers=self.request_kwargs["headers"],
+                                           json={"refresh_token": refresh_tokens[0], "all_sessions": True})
+
+        assert revoke_response.status_code == 204
+        async with self.session_manager.start_without_commit() as session_manager:
+            tokens = await session_manager.refresh_tokens.get_all()
+            assert all(token.revoked_at is not None for token in tokens)
 
 
     @pytest.mark.asyncio
@@ -182,4 +296,11 @@ class TestRefreshAccessToken:
             saved_user = await session_manager.users.save(user)
             return saved_user.id
 
+    async def issue_tokens(self, user_id: int):
+        jti = self.jwt_token_service.new_jti()
+        tokens = self.jwt_token_service.generate_tokens(user_id, refresh_jti=jti)
+        async with self.session_manager.start_with_commit() as session_manager:
+            await session_manager.refresh_tokens.add(jti, user_id, tokens[1].expired_at)
+        return tokens
+
 
@@ -69,7 +69,7 @@ class TestCreateUserRequest:
 
         async with self.session_manager.start_with_commit() as session_manager:
             user_kwargs = request.copy()
-            user_kwargs["hashed_password"] = self.password_service.hashed(user_kwargs.pop("password"))
+            user_kwargs["hashed_password"] = await self.password_service.hashed(user_kwargs.pop("password"))
             user = User(**user_kwargs)
             await session_manager.users.save(user)
 
@@ -0,0 +1,97 @@
+import pytest
+from starlette.testclient import TestClient
+
+from app.testutils.user_utils import UserGenerator
+from db.session_manager import SessionManager
+
+
+@pytest.mark.e2e
+class TestCreateUsersBulkRequest:
+
+    @pytest.fixture(scope="function", autouse=True)
+    def setup(self, session_manager: SessionManager, client: TestClient,
+              password_service, request_kwargs, asserts_response):
+        self.session_manager = session_manager
+        self.client = client
+        self.password_service = password_service
+        self.asserts_response = asserts_response
+        request_kwargs["url"] = "/users/bulk"
+        self.request_kwargs = request_kwargs
+        yield
+
+
+    @pytest.mark.asyncio
+    async def test_with_new_users_should_create_all(self):
+        request = {"users": [self.get_user_data(i) for i in range(3)]}
+        self.request_kwargs.update(json=request)
+        response = self.client.post(**self.request_kwargs)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["created"] == 3
+        assert body["skipped"] == 0
+        assert [item["login"] for item in body["items"]] == ["bulk0", "bulk1", "bulk2"]
+
+        async with self.session_manager.start_without_commit() as session_manager:
+            users = await session_manager.users.get_all()
+            assert {u.id for u in users} == {item["id"] for item in body["items"]}
+            for user in users:
+                assert await self.password_service.verify("password", user.hashed_password)
+
+
+    @pytest.mark.asyncio
+    async def test_with_existing_and_repeated_logins_should_skip_them(self):
+        async with self.session_manager.start_with_commit() as session_manager:
+            existing_user = UserGenerator.generate_user(0)
+            existing_user.login = "bulk0"
+            await session_manager.users.save(existing_user)
+
+        request = {"users": [self.get_user_data(0), self.get_user_data(1), self.get_user_data(1)]}
+        self.request_kwargs.update(json=request)
+        response = self.client.post(**self.request_kwargs)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["created"] == 1
+        assert body["skipped"] == 2
+        assert [item["created"] for item in body["items"]] == [False, True, False]
+        assert body["items"][1]["id"] is not None
+
+
+    @pytest.mark.asyncio
+    async def test_with_large_batch_should_create_all(self, settings):
+        count = settings.BULK_INSERT_COPY_THRESHOLD
+        request = {"users": [self.get_user_data(i) for i in range(count)]}
+        self.request_kwargs.update(json=request)
+        response = self.client.post(**self.request_kwargs)
+
+        assert response.status_code == 200
+        assert response.json()["created"] == count
+
+        async with self.session_manager.start_without_commit() as session_manager:
+            users = await session_manager.users.get_all()
+            assert len(users) == count
+
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("invalid_request", [
+        {},
+        {"users": []},
+        {"users": [{"login": "bulk"}]},
+    ])
+    async def test_with_invalid_request_should_return_422(self, invalid_request: dict):
+        self.request_kwargs.update(json=invalid_request)
+        response = self.client.post(**self.request_kwargs)
+
+        self.asserts_response.assert_bad_request(response)
+
+
+    @classmethod
+    def get_user_data(cls, i: int) -> dict:
+        return {
+            "login": f"bulk{i}",
+            "password": "password",
+            "first_name": "first",
+            "last_name": "last",
+            "second_name": "second",
+        }
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from starlette.testclient import TestClient
 
@@ -60,3 +62,76 @@ class TestFindAllUsersRequest:
 
         self.asserts_response.assert_error_response(response, 401)
 
+
+
+    @pytest.mark.asyncio
+    async def test_with_limit_should_paginate_by_cursor(self):
+        user_ids = await self.save_users(5)
+
+        self.request_kwargs["params"] = {"limit": 2}
+        response = self.client.get(**self.request_kwargs)
+        assert response.status_code == 200
+        assert [u["id"] for u in response.json()] == user_ids[:2]
+
+        received_ids = [u["id"] for u in response.json()]
+        while "X-Next-Cursor" in response.headers:
+            self.request_kwargs["params"] = {"limit": 2, "after": response.headers["X-Next-Cursor"]}
+            response = self.client.get(**self.request_kwargs)
+            assert response.status_code == 200
+            received_ids += [u["id"] for u in response.json()]
+
+        assert received_ids == user_ids
+
+
+    @pytest.mark.asyncio
+    async def test_with_stream_should_return_ndjson(self):
+        user_ids = await self.save_users(3)
+
+        self.request_kwargs["params"] = {"stream": "true"}
+        response = self.client.get(**self.request_kwargs)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [u["id"] for u in lines] == user_ids
+
+
+    @pytest.mark.asyncio
+    async def test_with_matching_etag_should_return_304_until_page_changes(self):
+        user_ids = await self.save_users(3)
+        self.request_kwargs["params"] = {"limit": 2}
+        etag = self.client.get(**self.request_kwargs).headers["etag"]
+
+        self.request_kwargs["headers"]["If-None-Match"] = etag
+        not_modified = self.client.get(**self.request_kwargs)
+
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["X-Next-Cursor"] == str(user_ids[1])
+
+        async with self.session_manager.start_with_commit() as session_manager:
+            await session_manager.users.update_by_id(user_ids[0], {"first_name": "Changed"})
+        modified = self.client.get(**self.request_kwargs)
+
+        assert modified.status_code == 200
+        assert modified.headers["etag"] != etag
+        assert modified.json()[0]["first_name"] == "Changed"
+
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("params", [{"limit": 0}, {"limit": 100000}, {"after": -1}])
+    async def test_with_invalid_page_params_should_return_422(self, params: dict):
+        self.request_kwargs["params"] = params
+        response = self.client.get(**self.request_kwargs)
+
+        self.asserts_response.assert_bad_request(response)
+
+
+    async def save_users(self, count: int) -> list[int]:
+        user_ids = []
+        async with self.session_manager.start_with_commit() as session_manager:
+            for i in range(count):
+                saved_user = await session_manager.users.save(UserGenerator.generate_user(i))
+                user_ids.append(saved_user.id)
+
+        return user_ids
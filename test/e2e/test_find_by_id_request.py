@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from starlette.testclient import TestClient
 
@@ -55,3 +57,90 @@ class TestFindByIdRequest:
 
     def set_url(self, user_id):
         self.request_kwargs["url"] = self.URL % user_id
+
+
+@pytest.mark.e2e
+class TestFindByIdCache:
+    URL = "/users/%d/"
+
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, client: TestClient, session_manager: SessionManager, request_kwargs):
+        self.client = client
+        self.session_manager = session_manager
+        self.headers = request_kwargs["headers"]
+        yield
+
+
+    @pytest.mark.asyncio
+    async def test_repeated_request_should_hit_cache(self):
+        user_id = await self.save_user()
+
+        hits_before = self.get_cache_stats()["hits"]
+        first = self.client.get(self.URL % user_id, headers=self.headers)
+        second = self.client.get(self.URL % user_id, headers=self.headers)
+
+        assert first.content == second.content
+        assert self.get_cache_stats()["hits"] == hits_before + 1
+
+
+    @pytest.mark.asyncio
+    async def test_put_should_invalidate_cache(self):
+        user_id = await self.save_user()
+        self.client.get(self.URL % user_id, headers=self.headers)
+
+        self.client.put(self.URL % user_id, headers=self.headers, json={"first_name": "Changed"})
+        response = self.client.get(self.URL % user_id, headers=self.headers)
+
+        assert response.json()["first_name"] == "Changed"
+
+
+    @pytest.mark.asyncio
+    async def test_with_matching_etag_should_return_304(self):
+        user_id = await self.save_user()
+        etag = self.client.get(self.URL % user_id, headers=self.headers).headers["etag"]
+
+        # Второй запрос отвечается из кэша, третий - после сброса кэша по версии из БД
+        cached = self.client.get(self.URL % user_id, headers={**self.headers, "If-None-Match": etag})
+        self.client.app.state.user_response_cache.invalidate()
+        from_db = self.client.get(self.URL % user_id, headers={**self.headers, "If-None-Match": f"W/{etag}"})
+
+        assert cached.status_code == from_db.status_code == 304
+        assert cached.headers["etag"] == from_db.headers["etag"] == etag
+
+
+    @pytest.mark.asyncio
+    async def test_put_should_change_etag(self):
+        user_id = await self.save_user()
+        etag = self.client.get(self.URL % user_id, headers=self.headers).headers["etag"]
+
+        put_response = self.client.put(self.URL % user_id, headers=self.headers, json={"first_name": "Changed"})
+        response = self.client.get(self.URL % user_id, headers={**self.headers, "If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == put_response.headers["etag"] != etag
+
+
+    @pytest.mark.asyncio
+    async def test_update_from_other_process_should_invalidate_cache(self):
+        user_id = await self.save_user()
+        self.client.get(self.URL % user_id, headers=self.headers)
+
+        # Изменение мимо API приходит в воркер через NOTIFY
+        async with self.session_manager.start_with_commit() as session_manager:
+            await session_manager.users.update_by_id(user_id, {"first_name": "Changed"})
+
+        for _ in range(50):
+            if self.client.get(self.URL % user_id, headers=self.headers).json()["first_name"] == "Changed":
+                break
+            await asyncio.sleep(0.05)
+        else:
+            pytest.fail("cached user was not invalidated")
+
+
+    async def save_user(self) -> int:
+        async with self.session_manager.start_with_commit() as session_manager:
+            saved_user = await session_manager.users.save(UserGenerator.generate_user(1))
+            return saved_user.id
+
+    def get_cache_stats(self) -> dict:
+        return self.client.get("/stats/caches", headers=self.headers).json()["users"]
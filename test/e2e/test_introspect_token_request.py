@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from app.utils.datetime_utils import utcnow
+
+
+@pytest.mark.e2e
+class TestIntrospectTokenRequest:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, client, jwt_token_service, settings, request_kwargs):
+        self.client = client
+        self.jwt_token_service = jwt_token_service
+        self.settings = settings
+        request_kwargs["url"] = "/tokens/introspect"
+        self.request_kwargs = request_kwargs
+        yield
+
+
+    def test_with_valid_token_should_be_active(self):
+        access_token = self.jwt_token_service.generate_access_token(7)
+
+        self.request_kwargs.update(json={"token": access_token.token})
+        response = self.client.post(**self.request_kwargs)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["active"] is True
+        assert body["token_type"] == "access"
+        assert body["claims"]["user_id"] == 7
+
+
+    def test_with_wrong_type_hint_should_still_be_active(self):
+        refresh_token = self.jwt_token_service.generate_refresh_token(7)
+
+        self.request_kwargs.update(json={"token": refresh_token.token, "token_type_hint": "access"})
+        response = self.client.post(**self.request_kwargs)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["active"] is True
+        assert body["token_type"] == "refresh"
+
+
+    @pytest.mark.parametrize("token", ["not-a-token", "a.b.c"])
+    def test_with_malformed_token_should_be_inactive(self, token):
+        self.request_kwargs.update(json={"token": token})
+        response = self.client.post(**self.request_kwargs)
+
+        assert response.status_code == 200
+        assert response.json()["active"] is False
+
+
+    def test_with_expired_token_should_be_inactive(self):
+        token = jwt.encode({"user_id": 7, "type": "access", "exp": utcnow() - timedelta(seconds=1)},
+                           self.settings.SECRET_KEY, algorithm=self.settings.ALGORITHM)
+
+        self.request_kwargs.update(json={"token": token})
+        response = self.client.post(**self.request_kwargs)
+
+        assert response.json()["active"] is False
+
+
+    def test_repeated_introspection_should_hit_cache(self):
+        access_token = self.jwt_token_service.generate_access_token(7)
+        self.request_kwargs.update(json={"token": access_token.token})
+
+        hits_before = self.client.get("/tokens/introspect/stats", headers=self.request_kwargs["headers"]).json()["hits"]
+        self.client.post(**self.request_kwargs)
+        self.client.post(**self.request_kwargs)
+        stats = self.client.get("/tokens/introspect/stats", headers=self.request_kwargs["headers"]).json()
+
+        assert stats["hits"] == hits_before + 1
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.mark.e2e
+class TestJWKSRequest:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, client, settings):
+        self.client = client
+        self.settings = settings
+        yield
+
+
+    def test_should_return_cacheable_key_set(self):
+        response = self.client.get("/.well-known/jwks.json")
+
+        assert response.status_code == 200
+        assert "keys" in response.json()
+        assert response.headers["etag"]
+        assert response.headers["cache-control"] == f"public, max-age={self.settings.JWKS_MAX_AGE_SECONDS}"
+
+
+    def test_with_matching_etag_should_return_not_modified(self):
+        etag = self.client.get("/.well-known/jwks.json").headers["etag"]
+
+        response = self.client.get("/.well-known/jwks.json", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+
+    @pytest.mark.parametrize("if_none_match", ['W/{etag}', '"other", {etag}', '*'])
+    def test_with_weak_or_listed_etag_should_return_not_modified(self, if_none_match):
+        etag = self.client.get("/.well-known/jwks.json").headers["etag"]
+
+        response = self.client.get("/.well-known/jwks.json",
+                                   headers={"If-None-Match": if_none_match.format(etag=etag)})
+
+        assert response.status_code == 304
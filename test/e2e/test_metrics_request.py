@@ -0,0 +1,70 @@
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+
+
+@pytest.mark.e2e
+class TestMetricsRequest:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, client, request_kwargs):
+        self.client = client
+        self.headers = request_kwargs["headers"]
+        yield
+
+
+    def get_samples(self) -> dict[str, list]:
+        response = self.client.get("/metrics", headers=self.headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+        samples = {}
+        for family in text_string_to_metric_families(response.text):
+            for sample in family.samples:
+                samples.setdefault(sample.name, []).append(sample)
+        return samples
+
+
+    def find(self, samples: list, **labels):
+        return [s for s in samples if all(s.labels.get(k) == v for k, v in labels.items())]
+
+
+    def test_should_report_route_db_pool_and_cache_metrics(self):
+        self.client.get("/users/101/", headers=self.headers)
+
+        samples = self.get_samples()
+
+        assert self.find(samples["http_request_duration_seconds_count"],
+                         method="GET", route="/users/{id}/", status="404")[0].value >= 1
+        assert self.find(samples["http_requests_in_progress"], method="GET", route="/metrics")[0].value == 1
+        assert self.find(samples["http_requests_in_progress"], method="GET", route="/users")[0].value == 0
+        assert self.find(samples["db_query_duration_seconds_count"],
+                         repository="UserRepository", method="find_by_id")[0].value >= 1
+        assert self.find(samples["db_pool_wait_seconds_count"], pool="primary")[0].value >= 1
+        assert "db_pool_checked_out_connections" in samples
+        assert self.find(samples["cache_misses_total"], cache="users")[0].value >= 1
+
+
+    def test_unknown_path_should_not_add_labels(self):
+        self.client.get("/no-such-path/1", headers=self.headers)
+
+        samples = self.get_samples()
+
+        assert self.find(samples["http_request_duration_seconds_count"],
+                         method="GET", route="<unmatched>", status="404")[0].value >= 1
+        assert self.find(samples["http_requests_in_progress"], method="GET", route="<unmatched>")[0].value == 0
+        assert not self.find(samples["http_requests_in_progress"], route="/no-such-path")
+
+
+    def test_should_report_jwt_timings(self, jwt_token_service):
+        token = jwt_token_service.generate_access_token(1).token
+        self.client.post("/tokens/introspect", headers=self.headers, json={"token": token})
+
+        samples = self.get_samples()
+
+        assert self.find(samples["jwt_operation_duration_seconds_count"], operation="sign")[0].value >= 1
+        assert self.find(samples["jwt_operation_duration_seconds_count"], operation="verify")[0].value >= 1
+
+
+    def test_without_primary_token_should_return_403(self):
+        response = self.client.get("/metrics")
+
+        assert response.status_code == 403
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+from settings.settings import reload_settings
+
+ADMIN_KEY = "profiling-admin-key"
+
+
+@pytest.mark.e2e
+class TestProfilingRequest:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, client, request_kwargs, monkeypatch, tmp_path):
+        monkeypatch.setenv("PROFILING_ADMIN_KEY", ADMIN_KEY)
+        monkeypatch.setenv("PROFILING_DIR", str(tmp_path))
+        monkeypatch.setenv("PROFILING_MAX_PER_MINUTE", "2")
+        reload_settings()
+        self.client = client
+        self.headers = request_kwargs["headers"]
+        self.profile_dir = tmp_path
+        yield
+        monkeypatch.undo()
+        reload_settings()
+
+
+    def profile(self, profile_format: str = "collapsed", admin_key: str = ADMIN_KEY):
+        headers = {**self.headers, "X-Profile": profile_format, "X-Admin-Key": admin_key}
+        return self.client.get("/users/101/", headers=headers)
+
+
+    def test_should_write_profile_file(self):
+        collapsed = self.profile()
+        speedscope = self.profile("speedscope")
+
+        assert collapsed.status_code == speedscope.status_code == 404
+        assert collapsed.headers["x-profile-result"].endswith(".collapsed.txt")
+        assert os.path.exists(self.profile_dir / collapsed.headers["x-profile-result"])
+        with open(self.profile_dir / speedscope.headers["x-profile-result"]) as f:
+            assert json.load(f)["profiles"][0]["type"] == "sampled"
+
+
+    def test_over_rate_cap_should_not_profile(self):
+        self.profile()
+        self.profile()
+        response = self.profile()
+
+        assert response.status_code == 404
+        assert response.headers["x-profile-result"] == "rate-limited"
+        assert len(os.listdir(self.profile_dir)) == 2
+
+
+    def test_with_invalid_admin_key_should_not_profile(self):
+        response = self.profile(admin_key="wrong")
+
+        assert response.status_code == 404
+        assert "x-profile-result" not in response.headers
+        assert os.listdir(self.profile_dir) == []
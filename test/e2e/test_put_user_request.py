@@ -1,5 +1,6 @@
 import pytest
 import pytest_asyncio
+from sqlalchemy import text
 from starlette.testclient import TestClient
 
 from app.models.models import User
@@ -71,6 +72,34 @@ class TestPutUserRequest:
         self.asserts_response.assert_error_response(response, 401)
 
 
+    @pytest.mark.asyncio
+    async def test_with_unchanged_values_should_skip_update(self):
+        user_id = await self.save_user()
+        xmin_before = await self.get_row_version(user_id)
+
+        self.set_url(user_id)
+        self.request_kwargs.update(json={"login": "user1", "first_name": "First1"})
+        response = self.client.put(**self.request_kwargs)
+
+        assert response.status_code == 200
+        self.asserts_response.assert_user_body(response, user_id)
+        assert response.json()["login"] == "user1"
+        assert await self.get_row_version(user_id) == xmin_before
+
+
+    @pytest.mark.asyncio
+    async def test_with_existing_login_should_return_400(self):
+        user_id = await self.save_user()
+        async with self.session_manager.start_with_commit() as session_manager:
+            await session_manager.users.save(UserGenerator.generate_user(2))
+
+        self.set_url(user_id)
+        self.request_kwargs.update(json={"login": "user2"})
+        response = self.client.put(**self.request_kwargs)
+
+        self.asserts_response.assert_error_response(response, 400)
+
+
     @pytest.mark.asyncio
     @pytest.mark.parametrize("invalid_json", [
         {},
@@ -101,6 +130,13 @@ class TestPutUserRequest:
 
         return user_id
 
+    async def get_row_version(self, user_id: int) -> str:
+        async with self.session_manager.start_without_commit() as session_manager:
+            result = await session_manager.get_session().execute(
+                text("SELECT xmin::text FROM users WHERE id = :id"), {"id": user_id}
+            )
+            return result.scalar_one()
+
     def set_url(self, user_id):
         self.request_kwargs["url"] = self.URL % user_id
 
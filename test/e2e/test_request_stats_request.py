@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.mark.e2e
+class TestRequestStatsRequest:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, client, request_kwargs):
+        self.client = client
+        self.headers = request_kwargs["headers"]
+        yield
+
+
+    def test_should_group_requests_by_route_template(self):
+        for user_id in (101, 102):
+            self.client.get(f"/users/{user_id}/", headers=self.headers)
+
+        response = self.client.get("/stats/requests", headers=self.headers)
+
+        assert response.status_code == 200
+        routes = {(r["method"], r["route"], r["status"]): r for r in response.json()}
+        stats = routes[("GET", "/users/{id}/", 404)]
+        assert stats["count"] >= 2
+        assert stats["response_bytes"] > 0
+        assert stats["max_ms"] >= stats["avg_ms"] > 0
+        assert not any("101" in route for _, route, _ in routes)
+
+
+    def test_without_primary_token_should_return_403(self):
+        response = self.client.get("/stats/requests")
+
+        assert response.status_code == 403
+
+
+    def test_single_flight_stats_should_count_executed_lookups(self):
+        self.client.app.state.user_response_cache.invalidate()
+        self.client.get("/users/101/", headers=self.headers)
+
+        response = self.client.get("/stats/single-flight", headers=self.headers)
+
+        assert response.status_code == 200
+        assert response.json()["users"]["executed"] >= 1
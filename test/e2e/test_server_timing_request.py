@@ -0,0 +1,49 @@
+import re
+
+import pytest
+
+from app.metrics import slow_query_log
+
+
+class ListLogger:
+    def __init__(self):
+        self.messages = []
+
+    def warning(self, message):
+        self.messages.append(message)
+
+
+@pytest.mark.e2e
+class TestServerTimingRequest:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, client, request_kwargs):
+        self.client = client
+        self.headers = request_kwargs["headers"]
+        yield
+        slow_query_log.configure(None, None)
+
+
+    def test_should_report_db_time_and_query_count(self):
+        self.client.app.state.user_response_cache.invalidate()
+
+        response = self.client.get("/users/987654/", headers=self.headers)
+
+        match = re.fullmatch(r'db;dur=([\d.]+);desc="(\d+) queries", app;dur=([\d.]+)',
+                             response.headers["server-timing"])
+        assert match is not None
+        db_ms, queries, app_ms = float(match[1]), int(match[2]), float(match[3])
+        assert queries >= 1
+        assert 0 < db_ms <= app_ms
+
+
+    def test_slow_query_should_be_logged_normalized_with_repository_method(self):
+        logger = ListLogger()
+        slow_query_log.configure(1e-9, logger)
+        self.client.app.state.user_response_cache.invalidate()
+
+        self.client.get("/users/987654/", headers=self.headers)
+
+        messages = [m for m in logger.messages if "UserRepository.find_by_id" in m]
+        assert messages
+        assert "987654" not in messages[0]
+        assert "users.id = ?" in messages[0]
@@ -0,0 +1,63 @@
+import pytest
+
+from app.testutils.user_utils import UserGenerator
+
+
+@pytest.mark.e2e
+class TestVerifyTokensBatchRequest:
+    @pytest.fixture(autouse=True, scope="function")
+    def setup(self, client, session_manager, jwt_token_service, request_kwargs, asserts_response):
+        self.client = client
+        self.session_manager = session_manager
+        self.jwt_token_service = jwt_token_service
+        self.asserts_response = asserts_response
+        request_kwargs["url"] = "/tokens/verify-batch"
+        self.request_kwargs = request_kwargs
+        yield
+
+
+    def test_should_return_results_in_request_order(self):
+        first = self.jwt_token_service.generate_access_token(1).token
+        second = self.jwt_token_service.generate_access_token(2).token
+
+        self.request_kwargs.update(json={"tokens": [first, "invalid", second, first]})
+        response = self.client.post(**self.request_kwargs)
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["valid"] for r in results] == [True, False, True, True]
+        assert [r["claims"]["user_id"] for r in results if r["valid"]] == [1, 2, 1]
+
+
+    @pytest.mark.asyncio
+    async def test_revoked_refresh_token_should_be_invalid(self):
+        async with self.session_manager.start_with_commit() as session_manager:
+            user_id = (await session_manager.users.save(UserGenerator.generate_user(1))).id
+            tokens = {}
+            for jti in ("active", "revoked"):
+                tokens[jti] = self.jwt_token_service.generate_refresh_token(user_id, jti)
+                await session_manager.refresh_tokens.add(jti, user_id, tokens[jti].expired_at)
+            await session_manager.refresh_tokens.revoke("revoked")
+
+        self.request_kwargs.update(json={"tokens": [tokens["active"].token, tokens["revoked"].token],
+                                         "token_type": "refresh"})
+        response = self.client.post(**self.request_kwargs)
+
+        assert [r["valid"] for r in response.json()["results"]] == [True, False]
+
+
+    def test_with_wrong_token_type_should_be_invalid(self):
+        refresh_token = self.jwt_token_service.generate_refresh_token(1).token
+
+        self.request_kwargs.update(json={"tokens": [refresh_token]})
+        response = self.client.post(**self.request_kwargs)
+
+        assert response.json()["results"] == [{"valid": False, "exp": None, "claims": None}]
+
+
+    @pytest.mark.parametrize("invalid_request", [{}, {"tokens": []}, {"tokens": ["t"] * 1001}])
+    def test_with_invalid_body_should_return_400_or_422(self, invalid_request):
+        self.request_kwargs.update(json=invalid_request)
+        response = self.client.post(**self.request_kwargs)
+
+        self.asserts_response.assert_bad_request(response)
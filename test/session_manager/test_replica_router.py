@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from app.testutils.user_utils import UserGenerator
+from db.connection import create_engine, create_session_maker
+from db.replica_router import ReplicaRouter, Replica, ROUND_ROBIN, LEAST_CONNECTIONS, start_write_marker, \
+    finish_write_marker
+from db.session_manager import SessionManager
+
+
+@pytest.fixture(scope="function")
+def replicas(settings) -> list[Replica]:
+    replicas = []
+    for _ in range(2):
+        engine = create_engine(settings, use_pool=False)
+        replicas.append(Replica(engine, create_session_maker(engine)))
+    return replicas
+
+
+def create_router(replicas: list[Replica], strategy: str = ROUND_ROBIN) -> ReplicaRouter:
+    return ReplicaRouter(replicas, strategy=strategy, read_your_writes_seconds=60, health_check_interval=1)
+
+
+@pytest.mark.unit
+class TestReplicaRouter:
+
+    def test_round_robin_should_alternate_replicas(self, replicas):
+        router = create_router(replicas)
+
+        chosen = [router.choose() for _ in range(4)]
+        assert chosen == [r.session_factory for r in replicas] * 2
+
+
+    def test_least_connections_should_choose_least_busy_replica(self, replicas):
+        router = create_router(replicas, LEAST_CONNECTIONS)
+        replicas[0].checked_out = lambda: 3
+        replicas[1].checked_out = lambda: 1
+
+        assert router.choose() is replicas[1].session_factory
+
+
+    def test_without_healthy_replicas_should_fall_back_to_primary(self, replicas):
+        router = create_router(replicas)
+        for replica in replicas:
+            replica.healthy = False
+
+        assert router.choose() is None
+
+
+    def test_after_write_should_stick_to_primary_for_rest_of_request(self, replicas):
+        router = create_router(replicas)
+        write_marker, token = start_write_marker(None)
+        try:
+            assert router.choose() is not None
+            router.mark_write()
+
+            assert router.choose() is None
+            assert write_marker.wrote
+        finally:
+            finish_write_marker(token)
+
+
+    def test_recent_write_marker_should_stick_to_primary(self, replicas):
+        router = create_router(replicas)
+        _, token = start_write_marker(str(time.time() - 1))
+        try:
+            assert router.choose() is None
+        finally:
+            finish_write_marker(token)
+
+
+    @pytest.mark.parametrize("header", [None, "", "not-a-number", "0", str(time.time() + 3600)])
+    def test_missing_or_stale_write_marker_should_read_from_replica(self, replicas, header):
+        router = create_router(replicas)
+        _, token = start_write_marker(header)
+        try:
+            assert router.choose() is not None
+        finally:
+            finish_write_marker(token)
+
+
+    @pytest.mark.asyncio
+    async def test_check_health_should_mark_unreachable_replica(self, settings, replicas):
+        router = create_router(replicas)
+        engine = create_engine(settings, use_pool=False, url=settings.get_database_url().replace(
+            f"{settings.DB_HOST}:{settings.DB_PORT}", "127.0.0.1:1"))
+        unreachable = Replica(engine, create_session_maker(engine))
+        router.replicas.append(unreachable)
+
+        await router.check_health()
+
+        assert [r.healthy for r in router.replicas] == [True, True, False]
+
+
+@pytest.mark.db
+class TestSessionManagerWithReplicas:
+
+    @pytest.mark.asyncio
+    async def test_reads_should_go_to_replica_and_writes_to_primary(self, session_factory, replicas):
+        session_manager = SessionManager(session_factory, create_router(replicas))
+
+        async with session_manager.unit_of_work():
+            async with session_manager.start_without_commit() as start:
+                assert start.get_session().bind is replicas[0].engine
+                await start.users.get_all()
+
+            async with session_manager.start_with_commit() as start:
+                assert start.get_session().bind is session_factory.kw["bind"]
+                await start.users.save(UserGenerator.generate_user(1))
+
+                async with session_manager.start_without_commit() as nested:
+                    assert nested.get_session().bind is session_factory.kw["bind"]
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from app.testutils.user_utils import UserGenerator
 from db.session_manager import SessionManager
@@ -42,3 +44,37 @@ class TestSessionManager:
             assert len(users) == 0
 
 
+    @pytest.mark.asyncio
+    async def test_nested_blocks_should_share_one_session(self, session_manager: SessionManager) -> None:
+        async with session_manager.unit_of_work():
+            async with session_manager.start_without_commit() as start:
+                read_session = start.get_session()
+                await start.users.get_all()
+
+            async with session_manager.start_with_commit() as start:
+                assert start.get_session() is read_session
+                await start.users.save(UserGenerator.generate_user(1))
+
+        assert session_manager.get_session() is None
+
+        async with session_manager.start_without_commit() as start:
+            users = await start.users.get_all()
+            assert len(users) == 1
+
+
+    @pytest.mark.asyncio
+    async def test_concurrent_tasks_should_use_own_sessions(self, session_manager: SessionManager) -> None:
+        async def save_user(i: int):
+            async with session_manager.start_with_commit() as start:
+                session = start.get_session()
+                await start.users.save(UserGenerator.generate_user(i))
+                await asyncio.sleep(0.01)
+                assert start.get_session() is session
+                return session
+
+        sessions = await asyncio.gather(*(save_user(i) for i in range(3)))
+        assert len(set(map(id, sessions))) == 3
+
+        async with session_manager.start_without_commit() as start:
+            users = await start.users.get_all()
+            assert len(users) == 3
@@ -1,6 +1,7 @@
 import pytest
+from pydantic import ValidationError
 
-from settings.settings import Settings
+from settings.settings import Settings, get_settings, reload_settings
 
 @pytest.mark.unit
 def test_env():
@@ -11,4 +12,24 @@ def test_env():
 def test_load_settings_with_test_env(settings: Settings):
     assert settings is not None
     assert settings.ENV == "test"
-    assert "test" in settings.get_database_url()
\ No newline at end of file
+    assert "test" in settings.get_database_url()
+
+@pytest.mark.unit
+def test_get_settings_should_return_same_instance():
+    assert get_settings() is get_settings()
+
+
+@pytest.mark.unit
+def test_reload_settings_should_swap_instance():
+    old_settings = get_settings()
+    new_settings = reload_settings()
+
+    assert new_settings is not old_settings
+    assert get_settings() is new_settings
+    assert new_settings == old_settings
+
+
+@pytest.mark.unit
+def test_settings_should_be_immutable(settings: Settings):
+    with pytest.raises(ValidationError):
+        settings.ACCESS_TOKEN_EXPIRE_MINUTES = 1